@@ -0,0 +1,56 @@
+"""Shared fixtures for the benchmark suite."""
+
+import random
+
+import pytest
+
+from timetable_ga.models import KERNELS, Algorithm, Schedule
+from timetable_ga.synthetic import SIZES, generate_institution
+from timetable_ga.utils import restart_id_counters
+
+DEFAULT_SIZES = "tiny,small,medium"
+
+
+def pytest_addoption(parser):
+    """Adds the option selecting the synthetic problem sizes to benchmark."""
+    parser.addoption(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"Comma separated problem sizes out of {', '.join(SIZES)} (default: {DEFAULT_SIZES})",
+    )
+    parser.addoption(
+        "--kernel",
+        default="auto",
+        help=f"Kernel evaluating the schedules out of auto, {', '.join(KERNELS)} (default: auto)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrizes the ``size`` argument with the selected problem sizes."""
+    if "size" in metafunc.fixturenames:
+        sizes = metafunc.config.getoption("sizes").split(",")
+        metafunc.parametrize("size", [s for s in sizes if s in SIZES])
+
+
+@pytest.fixture
+def configuration(request, benchmark, size):
+    """Synthetic institution of the requested size."""
+    restart_id_counters()
+    random.seed(0)
+    configuration = generate_institution(
+        SIZES[size], seed=0, kernel=request.config.getoption("kernel")
+    )
+    benchmark.extra_info["kernel"] = configuration.kernel.name
+    return configuration
+
+
+@pytest.fixture
+def prototype(configuration):  # pylint: disable=unused-argument
+    """Prototype schedule applying crossover and mutation unconditionally."""
+    return Schedule(2, 2, 100, 100)
+
+
+@pytest.fixture
+def algorithm(prototype):
+    """Algorithm with the default parameters of the service."""
+    return Algorithm(100, 8, 5, prototype)
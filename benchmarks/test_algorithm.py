@@ -0,0 +1,129 @@
+"""Benchmarks of complete runs of the genetic algorithm."""
+
+import random
+import time
+
+import pytest
+
+from timetable_ga.decomposition import decompose, solve_decomposed
+from timetable_ga.models import CROSSOVER_OPERATORS
+from timetable_ga.problem import GAParameters
+from timetable_ga.synthetic import SIZES, generate_institution
+from timetable_ga.utils import restart_id_counters
+from timetable_ga.warmstart import ScheduleChanges, get_placements, reoptimize
+
+# Upper bound of generations of a single benchmarked run
+MAX_GENERATIONS = 5000
+
+
+def test_time_to_feasible(benchmark, algorithm, size):
+    """Time and generations needed to find a schedule without violated criteria."""
+    generations = {"medium": 1000, "large": 100}.get(size, MAX_GENERATIONS)
+
+    def run():
+        random.seed(0)
+        start = time.perf_counter()
+        best = algorithm.start(max_generations=generations)
+        return best, time.perf_counter() - start
+
+    best, elapsed = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info["classes"] = SIZES[size]
+    benchmark.extra_info["generations"] = algorithm.current_generation
+    benchmark.extra_info["best_fitness"] = best.get_fitness()
+    benchmark.extra_info["feasible"] = best.get_fitness() >= 1
+    benchmark.extra_info["generations_per_second"] = algorithm.current_generation / elapsed
+
+
+def test_time_to_feasible_assign_rooms(benchmark, algorithm, size):
+    """Time and best fitness of runs evolving days and hours only, classrooms being matched."""
+    generations = {"medium": 1000, "large": 100}.get(size, MAX_GENERATIONS)
+    algorithm.prototype.assign_rooms = True
+
+    def run():
+        random.seed(0)
+        start = time.perf_counter()
+        best = algorithm.start(max_generations=generations)
+        return best, time.perf_counter() - start
+
+    best, elapsed = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info["classes"] = SIZES[size]
+    benchmark.extra_info["generations"] = algorithm.current_generation
+    benchmark.extra_info["best_fitness"] = best.get_fitness()
+    benchmark.extra_info["feasible"] = best.get_fitness() >= 1
+    benchmark.extra_info["generations_per_second"] = algorithm.current_generation / elapsed
+
+
+@pytest.mark.parametrize("operator", CROSSOVER_OPERATORS)
+def test_evaluations_to_feasible(benchmark, algorithm, size, operator):
+    """Schedules evaluated until a schedule without violated criteria is found, per crossover."""
+    generations = {"medium": 1000, "large": 100}.get(size, MAX_GENERATIONS)
+    algorithm.prototype.crossover_operator = operator
+
+    def run():
+        random.seed(0)
+        return algorithm.start(max_generations=generations)
+
+    best = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info["classes"] = SIZES[size]
+    benchmark.extra_info["crossover_operator"] = operator
+    benchmark.extra_info["evaluations"] = (
+        len(algorithm.chromosomes) + algorithm.current_generation * algorithm.replace_by_generation
+    )
+    benchmark.extra_info["best_fitness"] = best.get_fitness()
+    benchmark.extra_info["feasible"] = best.get_fitness() >= 1
+
+
+def test_reoptimize_after_teacher_change(benchmark, algorithm, configuration, size):
+    """Time needed to re-solve a timetable after the teacher of one class changed."""
+    generations = {"medium": 1000, "large": 100}.get(size, MAX_GENERATIONS)
+    random.seed(0)
+    previous = get_placements(algorithm.start(max_generations=generations))
+    previous_fitness = algorithm.get_best_chromosome().get_fitness()
+
+    changed_configuration = generate_institution(
+        SIZES[size], seed=0, kernel=configuration.kernel.name
+    )
+    changed = changed_configuration.course_classes[0]
+    changed.teacher = changed_configuration.course_classes[1].get_teacher()
+
+    def run():
+        random.seed(0)
+        start = time.perf_counter()
+        best = reoptimize(
+            algorithm,
+            previous,
+            ScheduleChanges(course_classes=[changed.backend_id]),
+            max_generations=generations,
+        )
+        return best, time.perf_counter() - start
+
+    best, _ = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info["classes"] = SIZES[size]
+    benchmark.extra_info["generations"] = algorithm.current_generation
+    benchmark.extra_info["previous_fitness"] = previous_fitness
+    benchmark.extra_info["best_fitness"] = best.get_fitness()
+
+
+@pytest.mark.parametrize("decomposed", [False, True])
+def test_departments(benchmark, request, size, decomposed):
+    """Best fitness within a time budget for an institution of four departments."""
+    seconds = {"medium": 60, "large": 300}.get(size, 10)
+    restart_id_counters()
+    configuration = generate_institution(
+        SIZES[size], seed=0, kernel=request.config.getoption("kernel"), departments=4
+    )
+    parameters = GAParameters(decompose=decomposed)
+    algorithm = parameters.make_algorithm()
+
+    def run():
+        random.seed(0)
+        if decomposed:
+            return solve_decomposed(algorithm, parameters, max_seconds=seconds)
+        return algorithm.start(max_seconds=seconds)
+
+    best = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info["classes"] = SIZES[size]
+    benchmark.extra_info["kernel"] = configuration.kernel.name
+    benchmark.extra_info["subproblems"] = len(decompose(configuration)) if decomposed else 1
+    benchmark.extra_info["best_fitness"] = best.get_fitness()
+    benchmark.extra_info["feasible"] = best.get_fitness() >= 1
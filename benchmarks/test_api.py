@@ -0,0 +1,154 @@
+"""Load tests of the endpoints of the web service, against a fake Redis for the states."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from timetable_ga import transport
+from timetable_ga.broker import celery_app
+from timetable_ga.status import StatusCache, TaskStatusReader
+from timetable_ga.store import CompactSchedule
+from timetable_ga.web import app
+
+# Simulated round trip to Redis in seconds
+REDIS_LATENCY = 0.005
+
+# Requests in flight at the same time and requests per round
+CONCURRENCY = 200
+REQUESTS = 2000
+
+# Polled tasks, so that cached states are read again
+TASKS = 20
+
+
+class SlowRedis(fakeredis.FakeRedis):
+    """Fake Redis answering ``GET`` after a network round trip."""
+
+    def get(self, name):
+        """Returns the value of the key after the simulated latency."""
+        time.sleep(REDIS_LATENCY)
+        return super().get(name)
+
+
+class SlowAsyncRedis(fakeredis.FakeAsyncRedis):
+    """Fake asyncio Redis answering ``GET`` after a network round trip."""
+
+    async def get(self, name):
+        """Returns the value of the key after the simulated latency."""
+        await asyncio.sleep(REDIS_LATENCY)
+        return await super().get(name)
+
+    async def mget(self, keys, *args):
+        """Returns the values of the keys after the simulated latency."""
+        await asyncio.sleep(REDIS_LATENCY)
+        return await super().mget(keys, *args)
+
+
+def make_blocking_app(redis):
+    """Returns an app serving the states as a sync endpoint, in the threadpool."""
+    blocking_app = FastAPI()
+
+    @blocking_app.get("/task-status/{task_id}")
+    def task_status(task_id: str):
+        meta = celery_app.backend.decode_result(
+            redis.get(celery_app.backend.get_key_for_task(task_id))
+        )
+        return {"status": meta["status"]}
+
+    return blocking_app
+
+
+async def poll(asgi_app):
+    """Polls the states of the tasks, returns the requests served per second."""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def get(i):
+            async with semaphore:
+                response = await client.get(f"/task-status/task-{i % TASKS}")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(get(i) for i in range(REQUESTS)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+def store_running_tasks(redis, count):
+    """Stores ``count`` running tasks as the result backend of Celery does."""
+    for i in range(count):
+        meta = {"task_id": f"task-{i}", "status": "STARTED", "result": None, "traceback": None}
+        redis.set(celery_app.backend.get_key_for_task(f"task-{i}"), celery_app.backend.encode(meta))
+
+
+@pytest.mark.parametrize("endpoint", ["blocking", "async", "async_cached"])
+def test_task_status_throughput(benchmark, endpoint):
+    """Requests per second of clients polling running tasks, by kind of status endpoint."""
+    server = fakeredis.FakeServer()
+    redis = SlowRedis(server=server)
+    store_running_tasks(redis, TASKS)
+    cache = StatusCache(ttl=1, max_size=TASKS) if endpoint == "async_cached" else None
+    reader = TaskStatusReader(SlowAsyncRedis(server=server), celery_app.backend, cache)
+
+    asgi_app = make_blocking_app(redis) if endpoint == "blocking" else app
+    with patch("timetable_ga.web._get_status_reader", return_value=reader):
+        requests_per_second = benchmark.pedantic(
+            lambda: asyncio.run(poll(asgi_app)), rounds=1, iterations=1
+        )
+    benchmark.extra_info["redis_latency"] = REDIS_LATENCY
+    benchmark.extra_info["concurrency"] = CONCURRENCY
+    benchmark.extra_info["requests_per_second"] = requests_per_second
+
+
+@pytest.mark.parametrize("batch_size", [1, 100])
+def test_task_status_batch(benchmark, batch_size):
+    """States read per second by a client polling many tasks, one by one or in batches."""
+    server = fakeredis.FakeServer()
+    store_running_tasks(fakeredis.FakeRedis(server=server), REQUESTS)
+    reader = TaskStatusReader(SlowAsyncRedis(server=server), celery_app.backend)
+    task_ids = [f"task-{i}" for i in range(REQUESTS)]
+
+    async def poll_batches():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            for i in range(0, REQUESTS, batch_size):
+                batch = task_ids[i : i + batch_size]
+                if batch_size == 1:
+                    response = await client.get(f"/task-status/{batch[0]}")
+                else:
+                    response = await client.post("/task-status", json={"task_ids": batch})
+                assert response.status_code == 200
+            return REQUESTS / (time.perf_counter() - start)
+
+    with patch("timetable_ga.web._get_status_reader", return_value=reader):
+        states_per_second = benchmark.pedantic(
+            lambda: asyncio.run(poll_batches()), rounds=1, iterations=1
+        )
+    benchmark.extra_info["redis_latency"] = REDIS_LATENCY
+    benchmark.extra_info["requests"] = -(-REQUESTS // batch_size)
+    benchmark.extra_info["states_per_second"] = states_per_second
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip", "zstd"])
+@pytest.mark.parametrize("media_type", [transport.JSON, transport.MSGPACK, transport.ARROW])
+def test_result_payload(benchmark, prototype, size, media_type, encoding):
+    """Time to render and compress a timetable, and the size of the body, by format."""
+    if media_type == transport.ARROW and not transport.ARROW_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    if encoding == "zstd" and transport.zstd is None:
+        pytest.skip("zstd is not available")
+    schedule = CompactSchedule.from_schedule(prototype.make_new_from_prototype())
+    summary = {"run_id": "run", "fitness": schedule.fitness, "generations": 0, "status": "finished"}
+
+    body = benchmark(
+        lambda: transport.compress(
+            transport.render_timetable(summary, schedule, media_type), encoding
+        )
+    )
+    benchmark.extra_info["bytes"] = len(body)
@@ -0,0 +1,105 @@
+"""Benchmarks of the genetic operators on synthetic institutions of growing size."""
+
+import os
+import random
+import tracemalloc
+
+import pytest
+
+from timetable_ga.checkpoint import Checkpoint
+from timetable_ga.constraints import SoftConstraints, SoftConstraintWeights
+from timetable_ga.synthetic import SIZES
+
+
+def test_calculate_fitness(benchmark, prototype, size):
+    """Evaluations per second of a single schedule."""
+    schedule = prototype.make_new_from_prototype()
+
+    benchmark(schedule.calculate_fitness)
+    benchmark.extra_info["classes"] = SIZES[size]
+
+
+def test_make_new_from_prototype(benchmark, prototype, size):
+    """Cost of creating and evaluating a random schedule."""
+    benchmark(prototype.make_new_from_prototype)
+    benchmark.extra_info["classes"] = SIZES[size]
+
+
+def test_crossover(benchmark, prototype, size):
+    """Cost of crossing two parents, including the evaluation of the offspring."""
+    parent1 = prototype.make_new_from_prototype()
+    parent2 = prototype.make_new_from_prototype()
+
+    benchmark(parent1.crossover, parent2)
+    benchmark.extra_info["classes"] = SIZES[size]
+
+
+def test_mutation(benchmark, prototype, size):
+    """Cost of mutating a schedule, including its re-evaluation."""
+    schedule = prototype.make_new_from_prototype()
+
+    benchmark(schedule.mutation)
+    benchmark.extra_info["classes"] = SIZES[size]
+
+
+def test_add_to_best(benchmark, algorithm, size):
+    """Cost of maintaining the list of best chromosomes."""
+    for i in range(len(algorithm.chromosomes)):
+        algorithm.chromosomes[i] = algorithm.prototype.make_new_from_prototype()
+
+    def add_all():
+        algorithm.clear_best()
+        for i in range(len(algorithm.chromosomes)):
+            algorithm.add_to_best(i)
+
+    benchmark(add_all)
+    benchmark.extra_info["classes"] = SIZES[size]
+
+
+def test_population_peak_memory(benchmark, algorithm, size):
+    """Peak memory of building the initial population."""
+
+    def build_population():
+        tracemalloc.start()
+        for i in range(len(algorithm.chromosomes)):
+            algorithm.chromosomes[i] = algorithm.prototype.make_new_from_prototype()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    random.seed(0)
+    peak = benchmark.pedantic(build_population, rounds=1, iterations=1)
+    benchmark.extra_info["classes"] = SIZES[size]
+    benchmark.extra_info["chromosomes"] = len(algorithm.chromosomes)
+    benchmark.extra_info["peak_memory_bytes"] = peak
+
+
+def test_checkpoint_save(benchmark, algorithm, size, tmp_path):
+    """Cost of capturing and saving a checkpoint of the population."""
+    algorithm.start(max_generations=1)
+    path = str(tmp_path / "checkpoint.npz")
+
+    benchmark(lambda: Checkpoint.capture(algorithm).save(path))
+    benchmark.extra_info["classes"] = SIZES[size]
+    benchmark.extra_info["checkpoint_bytes"] = os.path.getsize(path)
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_mutation_soft_constraints(benchmark, prototype, configuration, size, incremental):
+    """Cost of mutating a schedule with soft constraints, penalties updated or recalculated."""
+    prototype.soft_constraints = SoftConstraints(configuration, SoftConstraintWeights())
+    schedule = prototype.make_new_from_prototype()
+    if not incremental:
+        prototype.soft_constraints.INCREMENTAL_LIMIT = 0
+
+    benchmark(schedule.mutation)
+    benchmark.extra_info["classes"] = SIZES[size]
+
+
+def test_mutation_assign_rooms(benchmark, prototype, size):
+    """Cost of mutating a schedule whose classrooms are matched on the changed days."""
+    prototype.assign_rooms = True
+    schedule = prototype.make_new_from_prototype()
+
+    benchmark(schedule.mutation)
+    benchmark.extra_info["classes"] = SIZES[size]
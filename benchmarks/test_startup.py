@@ -0,0 +1,60 @@
+"""Startup of the processes of the service, each measured in a fresh interpreter."""
+
+import subprocess
+import sys
+
+import pytest
+
+from timetable_ga.synthetic import SIZES
+
+# Runs the first generation task of a worker process on a synthetic institution, after the
+# worker process hook if ``preloaded``, and prints the latency of the task in seconds
+FIRST_TASK = """
+import sys
+import time
+
+from timetable_ga import worker
+from timetable_ga.synthetic import generate_institution
+
+worker.load_configuration = lambda **_preloaded: generate_institution(int(sys.argv[2]))
+if sys.argv[1] == "preloaded":
+    worker.preload_worker()
+    worker._wait_for_preload()
+start = time.perf_counter()
+worker.timetable_generation.run(parameters={"max_generations": 1})
+print(time.perf_counter() - start)
+"""
+
+
+def run_python(*args) -> str:
+    """Runs a fresh interpreter, returns its output."""
+    return subprocess.run(
+        [sys.executable, *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+@pytest.mark.parametrize("module", [None, "main", "web", "worker"])
+def test_import_time(benchmark, module):
+    """Time to start an interpreter importing the entry point of a process, none as baseline."""
+    statement = f"import timetable_ga.{module}" if module else "pass"
+    run_python("-c", statement)
+
+    benchmark.pedantic(lambda: run_python("-c", statement), rounds=5, iterations=1)
+    modules = run_python("-c", f"{statement}; import sys; print(len(sys.modules))")
+    benchmark.extra_info["modules"] = int(modules)
+
+
+@pytest.mark.parametrize("worker", ["cold", "preloaded"])
+def test_first_task_latency(benchmark, worker, size, tmp_path, monkeypatch):
+    """Latency of the first task of a worker process, without and with the preloading hook."""
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.sqlite3"))
+    monkeypatch.setenv("CHECKPOINT_DIR", "")
+    monkeypatch.setenv("PRELOAD_STATIC_DATA", "0")
+    monkeypatch.setenv("RESULT_CACHE_TTL", "0")
+    latencies = []
+
+    def first_task():
+        latencies.append(float(run_python("-c", FIRST_TASK, worker, str(SIZES[size]))))
+
+    benchmark.pedantic(first_task, rounds=3, iterations=1)
+    benchmark.extra_info["first_task_seconds"] = min(latencies)
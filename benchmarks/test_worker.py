@@ -0,0 +1,46 @@
+"""Throughput of a worker process running the generations of many small schools."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from timetable_ga import worker
+from timetable_ga.synthetic import generate_institution
+
+# Simulated time to fetch a problem from the backend, in seconds
+BACKEND_LATENCY = 0.05
+
+# Schools per round and classes of each of them
+SCHOOLS = 16
+SCHOOL_CLASSES = 10
+
+
+def load_school(**_preloaded):
+    """Returns a small synthetic school after the simulated backend requests."""
+    time.sleep(BACKEND_LATENCY)
+    return generate_institution(SCHOOL_CLASSES)
+
+
+@pytest.mark.parametrize("threads", [1, 4, 16])
+def test_small_schools_throughput(benchmark, threads, tmp_path, monkeypatch):
+    """Schools generated per second by a worker process running ``threads`` tasks at once."""
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.sqlite3"))
+    monkeypatch.setenv("CHECKPOINT_DIR", "")
+    evolve = worker._get_evolve({"max_generations": 20})
+
+    def generate(school):
+        return worker._generate(f"school-{school}", False, evolve, {"max_generations": 20})
+
+    def run():
+        with ThreadPoolExecutor(threads) as executor:
+            return list(executor.map(generate, range(SCHOOLS)))
+
+    with patch.object(worker, "load_configuration", load_school):
+        run()
+        benchmark.pedantic(run, rounds=3, iterations=1)
+
+    # Without statistics when run with --benchmark-disable
+    if benchmark.stats:
+        benchmark.extra_info["schools_per_second"] = SCHOOLS / benchmark.stats.stats.mean
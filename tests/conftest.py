@@ -0,0 +1,49 @@
+"""Fixtures shared by the tests of the web service and the workers."""
+
+from unittest.mock import patch
+
+import pytest
+
+from timetable_ga.synthetic import generate_institution
+
+
+@pytest.fixture(autouse=True)
+def fixture_result_store(tmp_path, monkeypatch):
+    """Fixture storing the results and checkpoints of the tests in a temporary directory."""
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.sqlite3"))
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+
+
+@pytest.fixture(name="backend")
+def fixture_backend():
+    """Fixture serving a tiny synthetic institution instead of the backend."""
+    configuration = generate_institution(10)
+    with (
+        patch("timetable_ga.api.get_classrooms", return_value=configuration.classrooms),
+        patch("timetable_ga.api.get_teachers", return_value=configuration.teachers),
+        patch("timetable_ga.api.get_courses", return_value=configuration.courses),
+        patch("timetable_ga.api.get_students_groups", return_value=configuration.student_groups),
+        patch("timetable_ga.api.get_course_classes", return_value=configuration.course_classes),
+    ):
+        yield configuration
+
+
+@pytest.fixture(name="problem")
+def fixture_problem():
+    """Fixture with an inline problem of two classes."""
+    return {
+        "classrooms": [{"id": "room-0", "name": "Room 0", "number_of_seats": 30}],
+        "teachers": [{"id": "teacher-0", "name": "Teacher 0"}],
+        "courses": [{"id": "course-0", "name": "Course 0"}],
+        "student_groups": [{"id": "group-0", "name": "Group 0", "number_of_students": 20}],
+        "course_classes": [
+            {"id": "class-0", "teacher": "teacher-0", "course": "course-0", "groups": ["group-0"]},
+            {
+                "id": "class-1",
+                "teacher": "teacher-0",
+                "course": "course-0",
+                "groups": ["group-0"],
+                "duration": 3,
+            },
+        ],
+    }
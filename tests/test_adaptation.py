@@ -0,0 +1,83 @@
+"""Unit tests for the adaptive control of the mutation."""
+
+import random
+
+import pytest
+
+from timetable_ga.adaptation import AdaptiveMutation
+from timetable_ga.models import Algorithm, Schedule
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(name="algorithm")
+def fixture_algorithm():
+    """Fixture with an algorithm whose population is initialized."""
+    random.seed(0)
+    generate_institution(50)
+    algorithm = Algorithm(20, 4, 2, Schedule(2, 2, 80, 4))
+    algorithm.start(max_generations=0)
+    yield algorithm
+    restart_id_counters()
+
+
+def end_window(adaptation, algorithm, improvement):
+    """Ends a window of the controller, improving the best fitness by ``improvement``."""
+    best = algorithm.get_best_chromosome()
+    for _i in range(adaptation.window):
+        algorithm.current_generation += 1
+        best.fitness += improvement
+        adaptation.end_generation(algorithm)
+
+
+def test_raise_on_stagnation(algorithm):
+    """Test if a stagnating run mutates more, up to the maximum size past the maximum rate."""
+    adaptation = AdaptiveMutation(max_probability=9, max_size=3, window=5, min_spread=0)
+
+    end_window(adaptation, algorithm, 0.001)
+    end_window(adaptation, algorithm, 0)
+    assert adaptation.stagnant_generations == 5
+    assert algorithm.prototype.mutation_probability == pytest.approx(4)
+
+    for _i in range(3):
+        end_window(adaptation, algorithm, 0)
+    assert algorithm.prototype.mutation_probability == 9
+    assert algorithm.prototype.mutation_size == 3
+
+
+def test_lower_on_improvement(algorithm):
+    """Test if an improving run mutates less, down to the minimum rate and initial size."""
+    adaptation = AdaptiveMutation(min_probability=2, window=5, factor=2, min_spread=0)
+    algorithm.prototype.mutation_size = 2
+    end_window(adaptation, algorithm, 0.001)
+    algorithm.prototype.mutation_size = 3
+
+    end_window(adaptation, algorithm, 0.001)
+    assert algorithm.prototype.mutation_size == 2
+    assert algorithm.prototype.mutation_probability == 2
+
+    end_window(adaptation, algorithm, 0.001)
+    assert algorithm.prototype.mutation_probability == 2
+    assert adaptation.to_dict(algorithm.prototype)["stagnant_generations"] == 0
+
+
+def test_raise_on_low_diversity(algorithm):
+    """Test if a run whose fitness values are too close mutates more, even when improving."""
+    adaptation = AdaptiveMutation(window=5, min_spread=1)
+
+    end_window(adaptation, algorithm, 0.001)
+
+    assert algorithm.prototype.mutation_probability == 6
+    assert 0 < adaptation.fitness_spread < 1
+
+
+def test_algorithm_progress(algorithm):
+    """Test if the progress events of an adaptive run include the state of the controller."""
+    events = []
+    algorithm.adaptation = AdaptiveMutation(window=2)
+
+    algorithm.start(max_generations=4, progress=events.append)
+
+    assert [event["generation"] for event in events] == [1, 2, 3, 4]
+    assert events[-1]["best_fitness"] == algorithm.get_best_chromosome().get_fitness()
+    assert events[-1]["mutation"]["fitness_spread"] is not None
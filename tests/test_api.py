@@ -5,8 +5,22 @@ from unittest.mock import MagicMock, patch
 import pytest
 import requests
 
-from timetable_ga.main import get_classrooms, get_courses, get_students_groups, get_teachers
-from timetable_ga.models import Classroom, Course, Teacher
+from timetable_ga.api import (
+    get_classrooms,
+    get_courses,
+    get_students_groups,
+    get_teachers,
+    get_time_grid,
+    load_configuration,
+)
+from timetable_ga.models import (
+    Classroom,
+    Course,
+    Teacher,
+    TimeGrid,
+    get_entity_registry,
+    start_entity_registry,
+)
 
 mock_classrooms_data = [
     {"id": "ee2e8320-e8d2-41e0-bba0-0de7a1988f36", "name": "Room 1"},
@@ -275,3 +289,35 @@ def test_fetching_students_groups_dummy_file_error(_mock_get, _mock_open):
         get_students_groups(from_dummy=True)
     except FileNotFoundError as e:
         assert str(e) == "Dummy data file not found"
+
+
+def test_get_time_grid(monkeypatch):
+    """Test if the week of the backend problems is read from the environment."""
+    assert get_time_grid().days == 5
+
+    monkeypatch.setenv("TIME_GRID_DAYS", "6")
+    monkeypatch.setenv("TIME_GRID_DAY_HOURS", "14")
+    monkeypatch.setenv("TIME_GRID_BLOCKED_PERIODS", "0:6,1:6")
+    time_grid = get_time_grid()
+
+    assert (time_grid.days, time_grid.day_hours) == (6, 14)
+    assert time_grid.blocked_periods == [(0, 6), (1, 6)]
+
+
+@patch("timetable_ga.api.get_course_classes", return_value=[])
+@patch("timetable_ga.api.get_students_groups", return_value=[])
+@patch("timetable_ga.api.get_courses", return_value=[])
+@patch("timetable_ga.api.get_teachers", return_value=[])
+@patch("timetable_ga.api.get_classrooms")
+def test_load_configuration_preloaded(mock_get_classrooms, *_mocks):
+    """Test if preloaded classrooms are registered again in the registry of the new problem."""
+    start_entity_registry()
+    classrooms = [Classroom(backend_id=f"room-{i}", name=f"Room {i}") for i in range(2)]
+
+    configuration = load_configuration(classrooms, TimeGrid(days=6))
+
+    mock_get_classrooms.assert_not_called()
+    assert configuration.classrooms is classrooms
+    assert configuration.time_grid.days == 6
+    assert get_entity_registry().get_by_backend_id(Classroom, "room-1") is classrooms[1]
+    assert Classroom(backend_id="room-2", name="Room 2").id == 2
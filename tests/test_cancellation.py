@@ -0,0 +1,58 @@
+"""Unit tests for the cooperative cancellation of runs."""
+
+import random
+
+import fakeredis
+import pytest
+
+from timetable_ga.cancellation import (
+    CancellationFlag,
+    get_stop_check_interval,
+    request_cancellation,
+)
+from timetable_ga.models import Algorithm, Schedule
+from timetable_ga.synthetic import generate_institution
+
+
+def test_cancellation_flag():
+    """Test if the flag of a task is set by its cancellation only."""
+    redis = fakeredis.FakeRedis()
+    flag = CancellationFlag(redis, "task-0")
+
+    request_cancellation(redis, "task-1")
+    assert not flag()
+
+    request_cancellation(redis, "task-0")
+    assert flag()
+    assert flag.cancelled
+    assert redis.ttl("timetable-ga:cancel:task-0") > 0
+
+
+def test_algorithm_should_stop():
+    """Test if the algorithm polls the stop callback every given number of generations."""
+    random.seed(0)
+    generate_institution(50)
+    algorithm = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3))
+    polled_generations = []
+
+    def should_stop():
+        polled_generations.append(algorithm.current_generation)
+        return algorithm.current_generation >= 15
+
+    best = algorithm.start(max_generations=100, should_stop=should_stop, stop_check_interval=5)
+
+    assert polled_generations == [0, 5, 10, 15]
+    assert algorithm.current_generation == 15
+    assert best is algorithm.get_best_chromosome()
+
+
+def test_get_stop_check_interval(monkeypatch):
+    """Test if intervals of less than one generation are rejected."""
+    assert get_stop_check_interval() == 10
+
+    monkeypatch.setenv("CANCELLATION_CHECK_INTERVAL", "1")
+    assert get_stop_check_interval() == 1
+
+    monkeypatch.setenv("CANCELLATION_CHECK_INTERVAL", "0")
+    with pytest.raises(ValueError):
+        get_stop_check_interval()
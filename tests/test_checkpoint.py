@@ -0,0 +1,171 @@
+"""Unit tests for the checkpoints of evolutions."""
+
+import random
+import zipfile
+
+import numpy as np
+import pytest
+
+from timetable_ga.adaptation import AdaptiveMutation
+from timetable_ga.checkpoint import Checkpoint, Checkpointer
+from timetable_ga.diversity import DiversityTracker
+from timetable_ga.ga_consts import DAY_HOURS
+from timetable_ga.models import Algorithm, CourseClass, Schedule
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(autouse=True)
+def configuration():
+    """Fixture with a tiny synthetic configuration."""
+    restart_id_counters()
+    random.seed(0)
+    return generate_institution(10)
+
+
+def make_algorithm(**observers):
+    """Returns an algorithm with a small population."""
+    return Algorithm(20, 4, 3, Schedule(2, 2, 80, 3), **observers)
+
+
+def make_observers():
+    """Returns a mutation control adapting every generation and a diversity tracker."""
+    return {
+        "adaptation": AdaptiveMutation(window=1, min_spread=1.0),
+        "diversity": DiversityTracker(min_entropy=1.0, seed=0),
+    }
+
+
+def test_checkpoint_round_trip(tmp_path):
+    """Test if a saved checkpoint is loaded unchanged."""
+    algorithm = make_algorithm()
+    algorithm.start(max_generations=2)
+    checkpoint = Checkpoint.capture(algorithm, "fingerprint")
+    path = str(tmp_path / "checkpoint.npz")
+
+    checkpoint.save(path)
+    loaded = Checkpoint.load(path)
+
+    assert np.array_equal(loaded.genomes, checkpoint.genomes)
+    assert np.array_equal(loaded.fitness, checkpoint.fitness)
+    assert loaded.best_chromosomes == checkpoint.best_chromosomes
+    assert loaded.generation == algorithm.current_generation
+    assert loaded.rng_state == algorithm.random.getstate()
+    assert loaded.fingerprint == "fingerprint"
+    assert loaded.adaptation is None and loaded.diversity is None
+
+
+def test_checkpoint_compressed(tmp_path):
+    """Test if the checkpoint of a converging population is compressed."""
+    algorithm = make_algorithm()
+    algorithm.start(max_generations=50)
+    path = tmp_path / "checkpoint.npz"
+
+    Checkpoint.capture(algorithm).save(str(path))
+
+    with zipfile.ZipFile(path) as archive:
+        genomes = archive.getinfo("genomes.npy")
+    assert genomes.compress_type == zipfile.ZIP_DEFLATED
+    assert genomes.compress_size < genomes.file_size
+
+
+def test_checkpoint_round_trip_observers(tmp_path):
+    """Test if the states of the mutation control and the diversity tracker are saved."""
+    algorithm = make_algorithm(**make_observers())
+    algorithm.start(max_generations=3)
+    checkpoint = Checkpoint.capture(algorithm)
+    path = str(tmp_path / "checkpoint.npz")
+
+    checkpoint.save(path)
+    loaded = Checkpoint.load(path)
+
+    assert loaded.adaptation == checkpoint.adaptation
+    assert loaded.adaptation["mutation_probability"] == algorithm.prototype.mutation_probability
+    assert loaded.diversity == checkpoint.diversity
+    assert loaded.diversity["injections"] == algorithm.diversity.injections > 0
+
+
+def test_resume(tmp_path, configuration):
+    """Test if a resumed evolution continues exactly as the interrupted one."""
+    # More full-day classes than days, so the evolution runs until its last generation
+    teacher, course, group = (
+        configuration.teachers[0],
+        configuration.courses[0],
+        configuration.student_groups[0],
+    )
+    configuration.course_classes.extend(
+        CourseClass(
+            teacher=teacher, course=course, groups=[group], duration=DAY_HOURS, backend_id=str(i)
+        )
+        for i in range(6)
+    )
+    path = str(tmp_path / "checkpoint.npz")
+
+    interrupted = make_algorithm()
+    interrupted.start(max_generations=5)
+    Checkpoint.capture(interrupted).save(path)
+    interrupted.start(max_generations=10, checkpointer=Checkpointer(path, interval=3600))
+
+    random.seed(1)
+    resumed = make_algorithm()
+    resumed.start(max_generations=10, checkpointer=Checkpointer(path, interval=3600))
+
+    assert resumed.current_generation == interrupted.current_generation == 10
+    assert resumed.get_population()[0].tolist() == interrupted.get_population()[0].tolist()
+    assert resumed.best_chromosomes == interrupted.best_chromosomes
+
+
+def test_resume_observers(tmp_path):
+    """Test if a resumed evolution continues with the adapted mutation and diversity."""
+    path = str(tmp_path / "checkpoint.npz")
+
+    interrupted = make_algorithm(**make_observers())
+    interrupted.start(max_generations=5)
+    Checkpoint.capture(interrupted).save(path)
+    interrupted.start(max_generations=10, checkpointer=Checkpointer(path, interval=3600))
+
+    random.seed(1)
+    resumed = make_algorithm(**make_observers())
+    resumed.start(max_generations=10, checkpointer=Checkpointer(path, interval=3600))
+
+    assert resumed.get_population()[0].tolist() == interrupted.get_population()[0].tolist()
+    assert resumed.prototype.mutation_probability == interrupted.prototype.mutation_probability
+    assert resumed.prototype.mutation_size == interrupted.prototype.mutation_size
+    assert resumed.adaptation.get_state(resumed.prototype) == interrupted.adaptation.get_state(
+        interrupted.prototype
+    )
+    assert resumed.diversity.get_state() == interrupted.diversity.get_state()
+
+
+def test_load_other_problem(tmp_path):
+    """Test if checkpoints of other problems and corrupt checkpoints are ignored."""
+    algorithm = make_algorithm()
+    path = tmp_path / "checkpoint.npz"
+    algorithm.start(max_generations=1)
+    Checkpoint.capture(algorithm, "fingerprint").save(str(path))
+
+    assert Checkpointer(str(path), "fingerprint").load() is not None
+    assert Checkpointer(str(path), "other").load() is None
+    assert Checkpointer(str(tmp_path / "missing.npz")).load() is None
+
+    path.write_bytes(b"corrupt")
+    assert Checkpointer(str(path), "fingerprint").load() is None
+
+
+def test_checkpointer_overhead(tmp_path, monkeypatch):
+    """Test if saves are spaced out to keep their cost under the maximum overhead."""
+    algorithm = make_algorithm()
+    algorithm.start(max_generations=1)
+    clock = iter(range(100))
+    monkeypatch.setattr("timetable_ga.checkpoint.time.perf_counter", lambda: next(clock))
+    checkpointer = Checkpointer(str(tmp_path / "checkpoint.npz"), interval=0, max_overhead=0.5)
+
+    for _i in range(12):
+        checkpointer.end_generation(algorithm)
+
+    # Each save takes a tick, so the next one waits for two ticks of evolution
+    assert checkpointer.saves == 6
+    assert checkpointer.get_overhead() == pytest.approx(6 / 19)
+
+    checkpointer.remove()
+    assert not (tmp_path / "checkpoint.npz").exists()
@@ -0,0 +1,64 @@
+"""Unit tests for the coalescing of generation requests."""
+
+import time
+
+import fakeredis
+import pytest
+
+from timetable_ga.cancellation import request_cancellation
+from timetable_ga.coalescing import IN_FLIGHT_TTL, RequestCoalescer, get_coalescing_key
+from timetable_ga.store import CompactSchedule, ResultStore
+
+
+@pytest.fixture(name="coalescer")
+def fixture_coalescer(tmp_path):
+    """Fixture with a coalescer on a fake Redis and an empty store."""
+    return RequestCoalescer(fakeredis.FakeRedis(), ResultStore(str(tmp_path / "results")), 60)
+
+
+def test_get_coalescing_key():
+    """Test if the key depends on the problem and on the parameters."""
+    key = get_coalescing_key("fingerprint", {"a": 1, "b": 2})
+
+    assert get_coalescing_key("fingerprint", {"b": 2, "a": 1}) == key
+    assert get_coalescing_key("other", {"a": 1, "b": 2}) != key
+    assert get_coalescing_key("fingerprint", {"a": 1, "b": 3}) != key
+
+
+def test_claim_and_release(coalescer):
+    """Test if a claimed run is joined until released by its task."""
+    assert coalescer.claim("key", "task-0") is None
+    assert coalescer.claim("key", "task-1") == "task-0"
+    assert 60 < coalescer.client.ttl("timetable-ga:in-flight:key") <= IN_FLIGHT_TTL
+
+    coalescer.release("key", "task-1")
+    assert coalescer.claim("key", "task-2") == "task-0"
+
+    coalescer.release("key", "task-0")
+    assert coalescer.claim("key", "task-2") is None
+
+
+def test_claim_cancelled(coalescer):
+    """Test if the run of a cancelled task is claimed again."""
+    assert coalescer.claim("key", "task-0") is None
+    request_cancellation(coalescer.client, "task-0")
+
+    assert coalescer.claim("key", "task-1") is None
+    assert coalescer.claim("key", "task-2") == "task-1"
+
+
+def test_find_completed(coalescer):
+    """Test if only runs finished within the TTL with the same parameters are reused."""
+    schedule = CompactSchedule(["class-0"], ["room-0"], [0], [0], [0], [255], 1.0)
+    coalescer.store.save("run-0", "fingerprint", schedule, 3, {"a": 1})
+
+    assert coalescer.find_completed("fingerprint", {"a": 1}) == "run-0"
+    assert coalescer.find_completed("fingerprint", {"a": 2}) is None
+    assert coalescer.find_completed("other", {"a": 1}) is None
+
+    coalescer.store.save("run-1", "fingerprint", schedule, 3, {"a": 1}, status="cancelled")
+    assert coalescer.find_completed("fingerprint", {"a": 1}) == "run-0"
+
+    coalescer.ttl = 0
+    time.sleep(0.01)
+    assert coalescer.find_completed("fingerprint", {"a": 1}) is None
@@ -0,0 +1,102 @@
+"""Unit tests for the soft constraints."""
+
+import random
+
+import numpy as np
+import pytest
+
+from timetable_ga.constraints import SoftConstraints, SoftConstraintWeights
+from timetable_ga.ga_consts import CRITERIA_NUM, DAY_HOURS
+from timetable_ga.models import Configuration, Schedule, TimeGrid
+from timetable_ga.problem import ProblemPayload
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(name="configuration")
+def fixture_configuration():
+    """Fixture with a problem of one room, two teachers, the first needing a lunch break."""
+    yield ProblemPayload(
+        classrooms=[{"id": "room-0", "name": "Room 0"}],
+        teachers=[
+            {
+                "id": "teacher-0",
+                "name": "T0",
+                "lunch_break_needed": True,
+                "preferred_hours": [0, 1],
+            },
+            {"id": "teacher-1", "name": "T1"},
+        ],
+        courses=[{"id": "course-0", "name": "C0"}],
+        student_groups=[{"id": "group-0", "name": "G0", "number_of_students": 10}],
+        course_classes=[
+            {"id": "class-0", "teacher": "teacher-0", "course": "course-0", "groups": ["group-0"]},
+            {
+                "id": "class-1",
+                "teacher": "teacher-0",
+                "course": "course-0",
+                "groups": ["group-0"],
+                "duration": 2,
+            },
+            {"id": "class-2", "teacher": "teacher-1", "course": "course-0", "groups": ["group-0"]},
+        ],
+    ).to_configuration()
+    restart_id_counters()
+
+
+def test_evaluate(configuration):
+    """Test if each term is scored per teacher or group and day."""
+    constraints = SoftConstraints(configuration, SoftConstraintWeights(max_hours_per_day=2))
+
+    # Day 0: class-0 at 1, class-1 at 4-5, class-2 at 7; day 1 empty
+    penalties = constraints.evaluate([1, 4, 7])
+
+    assert penalties.shape == (3, 5)
+    # Lunch break 1, idle hours 2, overload 1, unpreferred hours 0.5 * 2
+    assert penalties[0, 0] == 5
+    assert penalties[1, 0] == 0
+    # Idle hours 3, overload 2
+    assert penalties[2, 0] == 5
+    assert penalties[:, 1:].sum() == 0
+
+    # Moving class-0 and class-2 to day 1, class-1 to the preferred hours
+    assert constraints.evaluate([DAY_HOURS, 0, DAY_HOURS + 1]).sum() == 0
+
+
+def test_update_matches_evaluate():
+    """Test if incrementally updated penalties match penalties evaluated from scratch."""
+    random.seed(0)
+    configuration = generate_institution(60, time_grid=TimeGrid(days=6, day_hours=14))
+    for i, teacher in enumerate(configuration.teachers):
+        teacher.lunch_break_needed = i % 2 == 0
+        teacher.preferred_hours = list(range(i % 4, i % 4 + 6))
+    constraints = SoftConstraints(configuration, SoftConstraintWeights(max_hours_per_day=3))
+    schedule = Schedule(2, 3, 80, 100, mutation_operator="mixed", soft_constraints=constraints)
+    other = schedule.make_new_from_prototype()
+    schedule = schedule.make_new_from_prototype()
+
+    for _ in range(50):
+        schedule.mutation()
+        np.testing.assert_array_equal(
+            schedule.soft_penalties, constraints.evaluate(schedule.classes)
+        )
+        child = schedule.crossover(other)
+        np.testing.assert_array_equal(child.soft_penalties, constraints.evaluate(child.classes))
+    restart_id_counters()
+
+
+def test_fitness_penalty(configuration):
+    """Test if the penalty lowers the fitness by less than one criterion."""
+    constraints = SoftConstraints(configuration, SoftConstraintWeights())
+    schedule = Schedule(2, 2, 80, 3, soft_constraints=constraints)
+    plain = Schedule(2, 2, 80, 3)
+    genome = [1, 4, 7]
+
+    chromosome = schedule.make_new_from_genome(genome)
+    plain_chromosome = plain.make_new_from_genome(genome)
+
+    assert Configuration.instance is configuration
+    assert plain_chromosome.get_fitness() == 1
+    assert chromosome.get_penalty() == 7
+    assert chromosome.get_fitness() == pytest.approx(1 - 7 / 8 / (3 * CRITERIA_NUM))
+    assert schedule.make_new_from_genome([DAY_HOURS, 0, DAY_HOURS + 1]).get_fitness() == 1
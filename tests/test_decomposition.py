@@ -0,0 +1,137 @@
+"""Unit tests for the decomposition of problems into independent subproblems."""
+
+import random
+from unittest.mock import patch
+
+import pytest
+
+from timetable_ga.decomposition import (
+    _solve_subproblem,
+    allocate_rooms,
+    decompose,
+    find_components,
+    group_components,
+    solve_decomposed,
+)
+from timetable_ga.models import Configuration
+from timetable_ga.problem import GAParameters
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(name="configuration")
+def fixture_configuration():
+    """Fixture with a synthetic institution of three departments."""
+    random.seed(0)
+    yield generate_institution(60, departments=3)
+    restart_id_counters()
+
+
+def test_find_components(configuration):
+    """Test if the classes of a teacher or a group all belong to the same component."""
+    components = find_components(configuration)
+
+    assert len(components) == 3
+    assert sorted(i for component in components for i in component) == list(range(60))
+    classes = configuration.get_course_classes()
+    for component in components:
+        others = {i for other in components if other is not component for i in other}
+        for i in component:
+            assert not any(classes[i].is_teacher_overlapped(classes[j]) for j in others)
+            assert not any(classes[i].are_groups_overlapped(classes[j]) for j in others)
+
+
+def test_group_components(configuration):
+    """Test if components are grouped together when there are more than groups."""
+    components = find_components(configuration)
+
+    assert group_components(configuration, components, 5) == [sorted(c) for c in components]
+    groups = group_components(configuration, components, 2)
+    assert sorted(len(group) for group in groups) == [20, 40]
+
+
+def test_allocate_rooms(configuration):
+    """Test if every group gets classrooms of its own, the lab going to a group needing it."""
+    classes = configuration.get_course_classes()
+    groups = group_components(configuration, find_components(configuration), 3)
+
+    rooms = allocate_rooms(configuration, groups)
+
+    allocated = sorted(r for group_rooms in rooms for r in group_rooms)
+    assert allocated == list(range(configuration.get_number_of_classrooms()))
+    for group, group_rooms in zip(groups, rooms):
+        assert group_rooms
+        if any(configuration.classrooms[r].get_is_lab() for r in group_rooms):
+            assert any(classes[i].get_is_lab_required() for i in group)
+
+
+def test_decompose(configuration):
+    """Test if subproblems map their placements back to the classrooms of the whole problem."""
+    subproblems = decompose(configuration)
+
+    assert Configuration.instance is configuration
+    assert len(subproblems) == 3
+    subproblem = subproblems[0]
+    assert subproblem.configuration.classrooms == [
+        configuration.classrooms[r] for r in subproblem.room_indices
+    ]
+    genome = [subproblem.configuration.get_position(2, 1, 3)]
+    assert subproblem.get_positions(genome, configuration) == [
+        configuration.get_position(2, subproblem.room_indices[1], 3)
+    ]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_solve_decomposed(processes):
+    """Test if the schedules of subproblems not competing for labs merge without repair."""
+    random.seed(0)
+    configuration = generate_institution(60, departments=3, lab_ratio=0)
+    parameters = GAParameters(decompose=True)
+    algorithm = parameters.make_algorithm()
+
+    best = solve_decomposed(algorithm, parameters, processes=processes, max_generations=3000)
+
+    assert Configuration.instance is configuration
+    assert len(best.classes) == 60
+    assert best.get_fitness() == 1
+    assert algorithm.current_generation == 0
+    restart_id_counters()
+
+
+def test_solve_decomposed_repair(configuration):
+    """Test if the classes of subproblems left without a lab are repaired in the whole problem."""
+    random.seed(11)
+    parameters = GAParameters(decompose=True)
+    algorithm = parameters.make_algorithm()
+
+    best = solve_decomposed(algorithm, parameters, processes=1, max_generations=5000)
+
+    assert best.get_fitness() == 1
+    assert 0 < algorithm.current_generation <= 1000
+
+
+def test_solve_decomposed_max_generations(configuration):
+    """Test if the generations of a run are split between the subproblems and the repair."""
+    parameters = GAParameters(decompose=True)
+    algorithm = parameters.make_algorithm()
+
+    with patch(
+        "timetable_ga.decomposition._solve_subproblem", wraps=_solve_subproblem
+    ) as mock_solve_subproblem:
+        solve_decomposed(algorithm, parameters, processes=1, max_generations=10)
+
+    assert [call.args[3] for call in mock_solve_subproblem.call_args_list] == [8, 8, 8]
+    assert algorithm.current_generation <= 2
+
+
+def test_solve_decomposed_single_component():
+    """Test if a problem without independent subproblems is evolved as a whole."""
+    random.seed(0)
+    generate_institution(10)
+    parameters = GAParameters(number_of_chromosomes=20, decompose=True)
+    algorithm = parameters.make_algorithm()
+
+    solve_decomposed(algorithm, parameters, max_generations=5)
+
+    assert algorithm.current_generation == 5
+    restart_id_counters()
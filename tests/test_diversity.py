@@ -0,0 +1,73 @@
+"""Unit tests for the diversity of populations."""
+
+import random
+
+import numpy as np
+import pytest
+
+from timetable_ga.diversity import DiversityTracker, position_entropy, sampled_hamming_distance
+from timetable_ga.models import Algorithm, Schedule
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(autouse=True)
+def configuration():
+    """Fixture with a small synthetic configuration."""
+    random.seed(0)
+    yield generate_institution(50)
+    restart_id_counters()
+
+
+def test_position_entropy():
+    """Test if the entropy goes from 0 for equal genomes to 1 for genomes differing everywhere."""
+    assert position_entropy([[1, 2, 3]] * 4) == 0
+    assert position_entropy([[0, 0], [1, 1], [2, 2], [3, 3]]) == pytest.approx(1)
+    assert position_entropy([[0, 5], [0, 5], [1, 5], [1, 5]]) == pytest.approx(0.25)
+    assert position_entropy(np.zeros((1, 3))) == 0
+
+
+def test_sampled_hamming_distance():
+    """Test if the distance is the share of classes placed differently by distinct chromosomes."""
+    rng = np.random.default_rng(0)
+
+    assert sampled_hamming_distance([[1, 2, 3, 4]] * 3, 16, rng) == 0
+    assert sampled_hamming_distance([[1, 2, 3, 4], [1, 2, 5, 6]], 16, rng) == 0.5
+    assert sampled_hamming_distance([[0, 1], [2, 3], [4, 5]], 16, rng) == 1
+
+
+def test_tracker_injects_immigrants():
+    """Test if a converged population receives random chromosomes, its best ones kept."""
+    algorithm = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3))
+    genome = Schedule(2, 2, 80, 3).make_new_from_prototype().classes
+    algorithm.start(max_generations=0, initial_genomes=[genome] * 20)
+    best = {i: algorithm.chromosomes[i] for i in algorithm.best_chromosomes}
+    tracker = DiversityTracker(min_entropy=0.5, immigrants=0.5, seed=0)
+
+    tracker.end_generation(algorithm)
+
+    assert tracker.entropy == 0
+    assert tracker.is_converged()
+    assert tracker.injections == 1
+    immigrants = [c for c in algorithm.chromosomes if list(c.classes) != list(genome)]
+    assert len(immigrants) == 9
+    assert all(algorithm.chromosomes[i] is chromosome for i, chromosome in best.items())
+    assert position_entropy(algorithm.get_population()[0]) > 0
+
+
+def test_tracker_keeps_the_course_of_the_evolution():
+    """Test if measuring the diversity does not change the evolution, nor the RNG state."""
+    random.seed(1)
+    reference = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3))
+    reference.start(max_generations=20)
+
+    random.seed(1)
+    tracked = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3), diversity=DiversityTracker(interval=5))
+    events = []
+    tracked.start(max_generations=20, progress=events.append)
+
+    assert tracked.get_population()[0].tolist() == reference.get_population()[0].tolist()
+    assert "diversity" in events[0]
+    assert events[3]["diversity"]["entropy"] is None
+    assert 0 < events[4]["diversity"]["entropy"] <= 1
+    assert 0 < events[4]["diversity"]["hamming_distance"] <= 1
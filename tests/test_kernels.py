@@ -0,0 +1,238 @@
+"""Parity tests of the fitness and operator kernels."""
+
+import functools
+import random
+
+import pytest
+
+from timetable_ga.ga_consts import CRITERIA_NUM
+from timetable_ga.models import (
+    KERNELS,
+    NUMBA_AVAILABLE,
+    PythonKernel,
+    Schedule,
+    TimeGrid,
+    get_kernel,
+)
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+requires_numba = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="Numba is not installed")
+
+
+def reference_criteria(configuration, genome):
+    """Criteria computed by scanning the slots of every room, as the original algorithm does."""
+    c = configuration.course_classes
+    number_of_rooms = configuration.get_number_of_classrooms()
+    day_hours = configuration.time_grid.day_hours
+    day_size = day_hours * number_of_rooms
+    slots = [[] for _ in range(configuration.time_grid.days * day_size)]
+    for i, course_class in enumerate(c):
+        for k in range(course_class.get_duration()):
+            slots[genome[i] + k].append(course_class)
+
+    criteria = []
+    for i, cc in enumerate(c):
+        p = genome[i]
+        day, room, time = p // day_size, p % day_size // day_hours, p % day_hours
+        dur = cc.get_duration()
+        r = configuration.classrooms[room]
+        others = [
+            other
+            for k in range(number_of_rooms)
+            for h in range(dur)
+            for other in slots[day * day_size + k * day_hours + time + h]
+            if other is not cc
+        ]
+        criteria += [
+            all(len(slots[p + h]) == 1 for h in range(dur)),
+            r.get_number_of_seats() >= cc.get_number_of_seats(),
+            not cc.get_is_lab_required() or r.get_is_lab(),
+            not any(cc.is_teacher_overlapped(other) for other in others),
+            not any(cc.are_groups_overlapped(other) for other in others),
+        ]
+    return criteria
+
+
+def random_genomes(configuration, count, seed):
+    """Random genomes of the configuration."""
+    rng = random.Random(seed)
+    number_of_rooms = configuration.get_number_of_classrooms()
+    grid = configuration.time_grid
+    genomes = []
+    for _ in range(count):
+        genome = []
+        for course_class in configuration.course_classes:
+            day = rng.randrange(grid.days)
+            room = rng.randrange(number_of_rooms)
+            time = rng.randrange(grid.day_hours + 1 - course_class.get_duration())
+            genome.append(configuration.get_position(day, room, time))
+        genomes.append(genome)
+    return genomes
+
+
+@pytest.fixture(autouse=True)
+def reset_id_counter():
+    """Fixture to reset the ID counter before each test."""
+    restart_id_counters()
+
+
+def available_kernels():
+    """Names of the kernels that can run here."""
+    return [name for name in KERNELS if name != "numba" or NUMBA_AVAILABLE]
+
+
+@pytest.mark.parametrize("kernel_name", available_kernels())
+@pytest.mark.parametrize("number_of_classes,seed", [(10, 0), (50, 1), (200, 2)])
+@pytest.mark.parametrize("days,day_hours", [(5, 12), (6, 14), (3, 4)])
+def test_fitness_matches_reference(kernel_name, number_of_classes, seed, days, day_hours):
+    """Test if the kernels compute the criteria of the original algorithm, whatever the week."""
+    configuration = generate_institution(
+        number_of_classes,
+        seed=seed,
+        room_load=0.9,
+        time_grid=TimeGrid(days=days, day_hours=day_hours),
+    )
+    kernel = get_kernel(kernel_name)
+
+    for genome in random_genomes(configuration, 5, seed):
+        criteria = kernel.empty_criteria(len(genome))
+        score = kernel.fitness(kernel.as_genome(genome), configuration.get_arrays(), criteria)
+
+        expected = reference_criteria(configuration, genome)
+        assert [bool(value) for value in criteria] == expected
+        assert score == sum(expected)
+
+
+@requires_numba
+@pytest.mark.parametrize("number_of_classes,seed", [(10, 3), (500, 4)])
+def test_kernels_parity(number_of_classes, seed):
+    """Test if the Python and Numba kernels give identical criteria and scores."""
+    configuration = generate_institution(number_of_classes, seed=seed)
+    python_kernel, numba_kernel = get_kernel("python"), get_kernel("numba")
+    arrays = configuration.get_arrays()
+
+    for genome in random_genomes(configuration, 10, seed):
+        python_criteria = python_kernel.empty_criteria(len(genome))
+        numba_criteria = numba_kernel.empty_criteria(len(genome))
+
+        python_score = python_kernel.fitness(genome, arrays, python_criteria)
+        numba_score = numba_kernel.fitness(numba_kernel.as_genome(genome), arrays, numba_criteria)
+
+        assert python_score == numba_score
+        assert python_criteria == numba_criteria.tolist()
+
+
+@requires_numba
+def test_operators_parity():
+    """Test if the Python and Numba kernels recombine and mutate genomes identically."""
+    configuration = generate_institution(50)
+    parent1, parent2 = random_genomes(configuration, 2, 5)
+    points = [i % 7 == 0 for i in range(len(parent1))]
+    python_kernel, numba_kernel = get_kernel("python"), get_kernel("numba")
+
+    python_child = python_kernel.crossover(parent1, parent2, points, True)
+    numba_child = numba_kernel.crossover(parent1, parent2, points, True)
+    assert python_kernel.select(parent1, parent2, points) == (
+        numba_kernel.select(parent1, parent2, points).tolist()
+    )
+    python_kernel.mutation(python_child, [3, 8, 3], [0, 12, 24])
+    numba_kernel.mutation(numba_child, [3, 8, 3], [0, 12, 24])
+
+    assert python_child == numba_child.tolist()
+    assert python_child[3] == 24
+
+
+def reference_unmatched(configuration, genome):
+    """Classes left unmatched by maximum matchings of the one-hour classes of each slot hour."""
+    starts = {}
+    for i, position in enumerate(genome):
+        day, _room, hour = configuration.get_slot(position)
+        starts.setdefault((day, hour), []).append(i)
+
+    @functools.cache
+    def matched(classes, used):
+        if not classes:
+            return 0
+        course_class, rest = configuration.course_classes[classes[0]], classes[1:]
+        best = matched(rest, used)
+        for r, room in enumerate(configuration.classrooms):
+            if r in used or room.get_number_of_seats() < course_class.get_number_of_seats():
+                continue
+            if course_class.get_is_lab_required() and not room.get_is_lab():
+                continue
+            best = max(best, 1 + matched(rest, used | {r}))
+        return best
+
+    return sum(len(c) - matched(tuple(c), frozenset()) for c in starts.values())
+
+
+@pytest.mark.parametrize("kernel_name", available_kernels())
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_assign_rooms_matches_reference(kernel_name, seed):
+    """Test if one-hour classes are matched to as many suitable classrooms as possible."""
+    configuration = generate_institution(
+        40, seed=seed, max_duration=1, room_load=1, time_grid=TimeGrid(days=2, day_hours=4)
+    )
+    kernel = get_kernel(kernel_name)
+    days = [True, True]
+
+    for genome in random_genomes(configuration, 5, seed):
+        assigned = kernel.as_genome(genome)
+        unmatched = kernel.assign_rooms(assigned, configuration.get_arrays(), days)
+
+        assert unmatched == reference_unmatched(configuration, genome)
+        for position, original in zip(assigned, genome):
+            assert configuration.get_slot(position)[::2] == configuration.get_slot(original)[::2]
+
+
+@requires_numba
+def test_assign_rooms_parity():
+    """Test if the Python and Numba kernels assign the same classrooms."""
+    configuration = generate_institution(200, seed=7, room_load=0.9)
+    python_kernel, numba_kernel = get_kernel("python"), get_kernel("numba")
+    arrays = configuration.get_arrays()
+    days = [True, False, True, True, True]
+
+    for genome in random_genomes(configuration, 5, 7):
+        python_genome = python_kernel.as_genome(genome)
+        numba_genome = numba_kernel.as_genome(genome)
+
+        python_unmatched = python_kernel.assign_rooms(python_genome, arrays, days)
+        numba_unmatched = numba_kernel.assign_rooms(numba_genome, arrays, days)
+
+        assert python_unmatched == numba_unmatched
+        assert python_genome == numba_genome.tolist()
+        assert [p for p in python_genome if p // configuration.get_day_size() == 1] == [
+            p for p in genome if p // configuration.get_day_size() == 1
+        ]
+
+
+@pytest.mark.parametrize("kernel_name", available_kernels())
+def test_schedules_parity(kernel_name):
+    """Test if schedules evolve identically whatever the kernel, for equal random seeds."""
+    configuration = generate_institution(50, kernel=kernel_name)
+    random.seed(6)
+    prototype = Schedule(2, 2, 100, 100)
+    parent1 = prototype.make_new_from_prototype()
+    child = parent1.crossover(prototype.make_new_from_prototype())
+    child.mutation()
+
+    configuration.kernel = PythonKernel()
+    random.seed(6)
+    prototype = Schedule(2, 2, 100, 100)
+    reference_parent1 = prototype.make_new_from_prototype()
+    reference_child = reference_parent1.crossover(prototype.make_new_from_prototype())
+    reference_child.mutation()
+
+    assert list(child.classes) == reference_child.classes
+    assert child.get_fitness() == reference_child.get_fitness()
+    assert len(child.criteria) == len(child.classes) * CRITERIA_NUM
+
+
+def test_get_kernel():
+    """Test the selection of the kernels."""
+    assert get_kernel("python").name == "python"
+    assert get_kernel().name == ("numba" if NUMBA_AVAILABLE else "python")
+    with pytest.raises(ValueError):
+        get_kernel("fortran")
@@ -1,8 +1,33 @@
 """Unit tests for the model classes."""
 
-import pytest
+import asyncio
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from timetable_ga.models import Classroom, Course, InternalModel, StudentsGroup, Teacher
+import pytest
+from pydantic import ValidationError
+
+from timetable_ga.ga_consts import CRITERIA_NUM, DAY_HOURS, DAYS_NUM, MAX_DAY_HOURS, MAX_DAYS
+from timetable_ga.models import (
+    CROSSOVER_OPERATORS,
+    MUTATION_OPERATORS,
+    Algorithm,
+    Classroom,
+    Configuration,
+    Course,
+    CourseClass,
+    InternalModel,
+    Schedule,
+    StudentsGroup,
+    Teacher,
+    TimeGrid,
+    get_entity_registry,
+    start_entity_registry,
+)
+from timetable_ga.synthetic import generate_institution
 
 
 @pytest.fixture(autouse=True)
@@ -58,6 +83,66 @@ def test_internal_model_equality_different_id():
     assert obj1 != obj2
 
 
+def test_internal_model_equality_different_type():
+    """Test if entities of different types with the same ID are not equal."""
+    course = Course(backend_id="backend_x", name="Calculus I.")
+    teacher = Teacher(backend_id="backend_x", name="Kepler")
+    assert course.id == teacher.id == 0
+    assert course != teacher
+
+
+def test_entity_registry():
+    """Test if the entities of a run get dense IDs per type and are found by backend ID."""
+    registry = start_entity_registry()
+    teachers = [Teacher(backend_id=f"teacher-{i}", name=f"Teacher {i}") for i in range(3)]
+    course = Course(backend_id="course-0", name="Course 0")
+
+    assert [teacher.id for teacher in teachers] == [0, 1, 2]
+    assert course.id == 0
+    assert get_entity_registry() is registry
+    assert registry.count(Teacher) == 3
+    assert registry.get(Teacher, 2) is teachers[2]
+    assert registry.get_by_backend_id(Teacher, "teacher-1") is teachers[1]
+    assert registry.get_by_backend_id(Course, "teacher-1") is None
+    with pytest.raises(ValueError):
+        start_entity_registry().add(teachers[1])
+
+
+def test_entity_registry_threads():
+    """Test if runs in parallel threads number their entities independently."""
+    barrier = threading.Barrier(4)
+
+    def create_teachers(thread):
+        start_entity_registry()
+        barrier.wait()
+        teachers = [
+            Teacher(backend_id=f"teacher-{thread}-{i}", name=f"Teacher {i}") for i in range(50)
+        ]
+        return [teacher.id for teacher in teachers], get_entity_registry().count(Teacher)
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(create_teachers, range(4)))
+
+    assert results == [(list(range(50)), 50)] * 4
+
+
+def test_entity_registry_asyncio():
+    """Test if runs in concurrent asyncio tasks number their entities independently."""
+
+    async def create_courses(task):
+        start_entity_registry()
+        courses = []
+        for i in range(10):
+            courses.append(Course(backend_id=f"course-{task}-{i}", name=f"Course {i}"))
+            await asyncio.sleep(0)
+        return [course.id for course in courses]
+
+    async def run():
+        return await asyncio.gather(*(create_courses(task) for task in range(3)))
+
+    assert asyncio.run(run()) == [list(range(10))] * 3
+
+
 def test_course_creation():
     """Test if Course can be created with a backend ID and name."""
     course = Course(backend_id="backend_course_1", name="Calculus I.")
@@ -277,3 +362,415 @@ def test_classroom_inequality_by_id():
     classroom1 = Classroom(backend_id="backend_classroom_11", name="Room I")
     classroom2 = Classroom(backend_id="backend_classroom_12", name="Room J")
     assert classroom1 != classroom2
+
+
+@pytest.fixture(name="configuration")
+def fixture_configuration():
+    """Fixture with a small configuration of two teachers, groups and classrooms."""
+    teachers = [Teacher(backend_id=f"t{i}", name=f"Teacher {i}") for i in range(2)]
+    groups = [
+        StudentsGroup(backend_id=f"g{i}", name=f"Group {i}", number_of_students=20)
+        for i in range(2)
+    ]
+    courses = [Course(backend_id="c0", name="Calculus I.")]
+    classrooms = [
+        Classroom(backend_id="r0", name="Room A", number_of_seats=30),
+        Classroom(backend_id="r1", name="Lab 1", is_lab=True),
+    ]
+    course_classes = [
+        CourseClass(
+            backend_id="cc0", teacher=teachers[0], course=courses[0], groups=[groups[0]], duration=2
+        ),
+        CourseClass(
+            backend_id="cc1",
+            teacher=teachers[1],
+            course=courses[0],
+            groups=groups,
+            is_lab_required=True,
+        ),
+        CourseClass(backend_id="cc2", teacher=teachers[0], course=courses[0], groups=[groups[1]]),
+    ]
+    return Configuration(
+        teachers=teachers,
+        student_groups=groups,
+        courses=courses,
+        classrooms=classrooms,
+        course_classes=course_classes,
+    )
+
+
+def test_course_class_creation(configuration):
+    """Test if CourseClass registers itself at its teacher and groups."""
+    course_class = configuration.course_classes[1]
+    assert course_class.get_number_of_seats() == 40
+    assert course_class.get_is_lab_required() is True
+    assert course_class in course_class.get_teacher().get_course_classes()
+    for group in course_class.get_groups():
+        assert course_class in group.get_course_classes()
+
+
+def test_configuration_lookup_by_id(configuration):
+    """Test if Configuration looks up entities by their IDs."""
+    classroom = configuration.classrooms[1]
+    assert Configuration.get_instance() is configuration
+    assert configuration.get_classroom_by_id(classroom.id) is classroom
+    assert configuration.get_teacher_by_id(-1) is None
+    assert configuration.get_number_of_classrooms() == 2
+    assert configuration.get_number_of_course_classes() == 3
+
+
+def test_time_grid_start_masks(configuration):
+    """Test if classes only start where all their hours are free periods of the same day."""
+    configuration.classrooms[1].unavailable_periods = [(1, 3)]
+    configuration = Configuration(
+        teachers=configuration.teachers,
+        student_groups=configuration.student_groups,
+        courses=configuration.courses,
+        classrooms=configuration.classrooms,
+        course_classes=configuration.course_classes,
+        time_grid=TimeGrid(days=2, day_hours=4, blocked_periods=[(0, 1)]),
+    )
+    two_hours, one_hour = configuration.course_classes[:2]
+
+    assert configuration.get_number_of_slots() == 16
+    assert configuration.get_slot(configuration.get_position(1, 1, 2)) == (1, 1, 2)
+    assert configuration.get_valid_starts(one_hour) == [0, 2, 3, 4, 6, 7, 8, 9, 10, 11, 12, 13, 14]
+    assert configuration.get_valid_starts(two_hours) == [2, 6, 8, 9, 10, 12, 13]
+    assert configuration.get_valid_day_starts(two_hours, 15) == [12, 13]
+    assert list(configuration.get_start_mask(two_hours)[:4]) == [False, False, True, False]
+
+
+def test_time_grid_keeps_classes_at_valid_starts():
+    """Test if random schedules and their offspring only place classes at valid starts."""
+    random.seed(0)
+    configuration = generate_institution(
+        50, time_grid=TimeGrid(days=6, day_hours=14, blocked_periods=[(d, 6) for d in range(6)])
+    )
+    configuration.classrooms[0].unavailable_periods = [(0, 0), (5, 13)]
+    prototype = Schedule(2, 4, 80, 100, mutation_operator="mixed")
+    parent = prototype.make_new_from_prototype()
+
+    for _i in range(20):
+        schedule = prototype.make_new_from_prototype().crossover(parent)
+        schedule.mutation()
+
+        for i, course_class in enumerate(configuration.course_classes):
+            assert configuration.get_start_mask(course_class)[schedule.classes[i]]
+            day, _room, hour = schedule.get_placement(i)
+            assert day < 6 and hour + course_class.get_duration() <= 14
+
+
+def test_time_grid_invalid(configuration):
+    """Test if periods outside the week and classes fitting nowhere are rejected."""
+    with pytest.raises(ValidationError):
+        TimeGrid(days=5, blocked_periods=[(5, 0)])
+    with pytest.raises(ValidationError):
+        TimeGrid(days=MAX_DAYS + 1)
+    with pytest.raises(ValidationError):
+        TimeGrid(day_hours=MAX_DAY_HOURS + 1)
+
+    configuration.classrooms[0].unavailable_periods = [(0, DAY_HOURS)]
+    with pytest.raises(ValueError):
+        configuration.get_valid_starts(configuration.course_classes[0])
+
+    configuration.time_grid = TimeGrid(day_hours=1)
+    configuration.classrooms[0].unavailable_periods = []
+    with pytest.raises(ValueError):
+        configuration.get_valid_starts(configuration.course_classes[0])
+
+
+def test_schedule_make_new_from_prototype(configuration):
+    """Test if a new schedule places every class in consecutive slots."""
+    schedule = Schedule(2, 2, 80, 3).make_new_from_prototype()
+
+    for i, course_class in enumerate(configuration.course_classes):
+        pos = schedule.classes[i]
+        for k in range(course_class.get_duration()):
+            assert course_class in schedule.slots[pos + k]
+    assert sum(len(slot) for slot in schedule.slots) == 4
+    assert 0 < schedule.get_fitness() <= 1
+
+
+def test_schedule_calculate_fitness(configuration):
+    """Test if the fitness counts the satisfied criteria."""
+    schedule = Schedule(2, 2, 80, 3).copy(setup_only=True)
+    lab_room_offset = DAY_HOURS
+    placements = [0, lab_room_offset, 0]
+    for i in range(configuration.get_number_of_course_classes()):
+        schedule.classes[i] = placements[i]
+
+    schedule.calculate_fitness()
+
+    # First and third class share a room and a teacher, the second one has a group in common
+    assert list(schedule.criteria[0:5]) == [False, True, True, False, False]
+    assert list(schedule.criteria[5:10]) == [True, True, True, True, False]
+    assert list(schedule.criteria[10:15]) == [False, True, True, False, False]
+    assert schedule.get_fitness() == 8 / 15
+
+
+def test_schedule_copy(configuration):  # pylint: disable=unused-argument
+    """Test if copies do not share classes with the original schedule."""
+    schedule = Schedule(2, 2, 80, 3).make_new_from_prototype()
+
+    duplicate = schedule.copy()
+    empty = schedule.copy(setup_only=True)
+    duplicate.classes[0] = schedule.classes[0] + 1
+
+    assert list(duplicate.classes[1:]) == list(schedule.classes[1:])
+    assert duplicate.classes[0] != schedule.classes[0]
+    assert duplicate.get_fitness() == schedule.get_fitness()
+    assert empty.get_fitness() == 0
+    assert not any(empty.criteria)
+
+
+def test_schedule_configuration(configuration):
+    """Test if schedules and their copies keep their configuration when another one is made."""
+    prototype = Schedule(2, 2, 100, 100)
+    other = generate_institution(20)
+    schedule = prototype.make_new_from_prototype()
+
+    schedule.mutation()
+    child = schedule.crossover(prototype.make_new_from_prototype())
+
+    assert prototype.configuration is configuration
+    assert child.configuration is configuration
+    assert len(child.classes) == configuration.get_number_of_course_classes()
+    assert Schedule(2, 2, 80, 3).configuration is other
+    assert Schedule(2, 2, 80, 3, configuration=configuration).configuration is configuration
+    assert Algorithm(4, 2, 1, prototype).configuration is configuration
+
+
+def test_schedule_crossover_and_mutation(configuration):
+    """Test if offspring keep every class placed exactly once."""
+    prototype = Schedule(2, 2, 100, 100)
+    parent1 = prototype.make_new_from_prototype()
+    parent2 = prototype.make_new_from_prototype()
+
+    child = parent1.crossover(parent2)
+    child.mutation()
+
+    for i, course_class in enumerate(configuration.course_classes):
+        occupied = [p for p, slot in enumerate(child.slots) if course_class in slot]
+        assert occupied == list(
+            range(child.classes[i], child.classes[i] + course_class.get_duration())
+        )
+
+
+@pytest.mark.parametrize("operator", CROSSOVER_OPERATORS)
+def test_schedule_crossover_operators(configuration, operator):
+    """Test if every crossover operator takes each gene from one of the parents."""
+    random.seed(0)
+    prototype = Schedule(2, 2, 100, 0, crossover_operator=operator)
+    parent1 = prototype.make_new_from_prototype()
+    parent2 = prototype.make_new_from_prototype()
+
+    child = parent1.crossover(parent2)
+
+    assert child.crossover_operator == operator
+    assert len(child.classes) == configuration.get_number_of_course_classes()
+    for gene, gene1, gene2 in zip(child.classes, parent1.classes, parent2.classes):
+        assert gene in (gene1, gene2)
+
+
+def test_schedule_crossover_day_block(configuration):  # pylint: disable=unused-argument
+    """Test if the day-block crossover inherits whole days from the first parent."""
+    day_size = 2 * DAY_HOURS
+    prototype = Schedule(2, 2, 100, 0, crossover_operator="day_block")
+    parent1 = prototype.make_new_from_genome([0, day_size + DAY_HOURS, 2 * day_size])
+    parent2 = prototype.make_new_from_genome([day_size, 2 * day_size + DAY_HOURS, 3 * day_size])
+
+    def inherit(days):
+        """Returns the child inheriting the given days from the first parent."""
+        return [
+            gene1 if gene1 // day_size in days or gene2 // day_size in days else gene2
+            for gene1, gene2 in zip(parent1.classes, parent2.classes)
+        ]
+
+    children = [
+        inherit(days)
+        for r in range(DAYS_NUM + 1)
+        for days in itertools.combinations(range(DAYS_NUM), r)
+    ]
+    for seed in range(10):
+        random.seed(seed)
+        assert list(parent1.crossover(parent2).classes) in children
+
+
+def test_schedule_crossover_conflict_aware(configuration):  # pylint: disable=unused-argument
+    """Test if the conflict-aware crossover prefers placements without violations."""
+    prototype = Schedule(2, 2, 100, 0, crossover_operator="conflict_aware")
+
+    for seed in range(10):
+        random.seed(seed)
+        parent1 = prototype.make_new_from_prototype()
+        parent2 = prototype.make_new_from_prototype()
+
+        child = parent1.crossover(parent2)
+
+        for i in range(len(child.classes)):
+            satisfied1 = all(parent1.criteria[i * CRITERIA_NUM : (i + 1) * CRITERIA_NUM])
+            satisfied2 = all(parent2.criteria[i * CRITERIA_NUM : (i + 1) * CRITERIA_NUM])
+            if satisfied1 != satisfied2:
+                expected = parent1 if satisfied1 else parent2
+                assert child.classes[i] == expected.classes[i]
+
+
+def test_schedule_unknown_crossover_operator():
+    """Test if unknown crossover and mutation operators are rejected."""
+    with pytest.raises(ValueError):
+        Schedule(2, 2, 80, 3, crossover_operator="unknown")
+    with pytest.raises(ValueError):
+        Schedule(2, 2, 80, 3, mutation_operator="unknown")
+
+
+@pytest.mark.parametrize("operator", MUTATION_OPERATORS)
+def test_schedule_mutation_operators(configuration, operator):
+    """Test if every mutation operator keeps each class within the hours of its day."""
+    random.seed(0)
+    prototype = Schedule(2, 4, 0, 100, mutation_operator=operator)
+
+    for _i in range(20):
+        schedule = prototype.make_new_from_prototype()
+        schedule.mutation()
+
+        for i, course_class in enumerate(configuration.course_classes):
+            assert schedule.classes[i] % DAY_HOURS + course_class.get_duration() <= DAY_HOURS
+
+
+def test_schedule_mutation_swap(configuration):  # pylint: disable=unused-argument
+    """Test if the swap move exchanges the slots of two classes."""
+    prototype = Schedule(2, 1, 0, 100, mutation_operator="swap")
+    schedule = prototype.make_new_from_genome([DAY_HOURS - 2, DAY_HOURS, 3 * DAY_HOURS - 1])
+
+    for seed in range(10):
+        random.seed(seed)
+        mutated = schedule.copy()
+        mutated.mutation()
+
+        # The first class lasts two hours, so it starts an hour earlier in the slot of the third
+        assert [int(p) for p in mutated.classes] in (
+            [DAY_HOURS - 2, DAY_HOURS, 3 * DAY_HOURS - 1],
+            [DAY_HOURS, DAY_HOURS - 2, 3 * DAY_HOURS - 1],
+            [3 * DAY_HOURS - 2, DAY_HOURS, DAY_HOURS - 2],
+            [DAY_HOURS - 2, 3 * DAY_HOURS - 1, DAY_HOURS],
+        )
+
+
+def test_schedule_mutation_shift(configuration):  # pylint: disable=unused-argument
+    """Test if the shift move keeps the day and the classroom of the class."""
+    prototype = Schedule(2, 3, 0, 100, mutation_operator="shift")
+    schedule = prototype.make_new_from_prototype()
+
+    mutated = schedule.copy()
+    mutated.mutation()
+
+    for position, mutated_position in zip(schedule.classes, mutated.classes):
+        assert position // DAY_HOURS == mutated_position // DAY_HOURS
+
+
+def test_schedule_mutation_rates(configuration):  # pylint: disable=unused-argument
+    """Test if the given mutation probability and size override those of the schedule."""
+    schedule = Schedule(2, 2, 0, 0).make_new_from_prototype()
+
+    unchanged = schedule.copy()
+    unchanged.mutation()
+    mutated = schedule.copy()
+    mutated.mutation(probability=100, size=3)
+
+    assert list(unchanged.classes) == list(schedule.classes)
+    assert mutated.mutation_probability == 0
+
+
+def test_schedule_assign_rooms(configuration):  # pylint: disable=unused-argument
+    """Test if the classes of a schedule assigning rooms move to the classrooms suiting them."""
+    # The lab class in Room A, the other classes in the lab
+    genome = [DAY_HOURS, 2 * DAY_HOURS, 5 * DAY_HOURS]
+
+    evolved = Schedule(2, 2, 80, 3).make_new_from_genome(genome)
+    assigned = Schedule(2, 2, 80, 3, assign_rooms=True).make_new_from_genome(genome)
+
+    assert evolved.get_fitness() < 1
+    assert assigned.get_fitness() == 1
+    assert [assigned.get_placement(i) for i in range(3)] == [(0, 0, 0), (1, 1, 0), (2, 0, 0)]
+
+
+def test_schedule_assign_rooms_incremental():
+    """Test if rooms assigned on the changed days only equal rooms assigned on all days."""
+    random.seed(0)
+    generate_institution(100, room_load=0.9)
+    prototype = Schedule(2, 4, 100, 100, mutation_operator="mixed", assign_rooms=True)
+
+    for _i in range(10):
+        schedule = prototype.make_new_from_prototype().crossover(
+            prototype.make_new_from_prototype()
+        )
+        schedule.mutation()
+
+        reference = prototype.make_new_from_genome(schedule.classes)
+        assert list(reference.classes) == list(schedule.classes)
+        assert reference.get_fitness() == schedule.get_fitness()
+
+
+def test_algorithm_start(configuration):  # pylint: disable=unused-argument
+    """Test if the algorithm finds a schedule without violated criteria."""
+    random.seed(0)
+    algorithm = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3))
+
+    best = algorithm.start(max_generations=500)
+
+    assert best.get_fitness() == 1
+    assert best is algorithm.get_best_chromosome()
+
+
+def test_algorithm_start_max_generations(configuration):  # pylint: disable=unused-argument
+    """Test if the algorithm stops after the given number of generations."""
+    algorithm = Algorithm(4, 2, 1, Schedule(2, 2, 80, 3))
+
+    algorithm.start(max_generations=0)
+
+    assert algorithm.current_generation == 0
+    assert algorithm.is_in_best(algorithm.best_chromosomes[0])
+
+
+def test_algorithm_start_seed(configuration):
+    """Test if runs of the same seed evolve alike whatever else draws from ``random``."""
+
+    def evolve(should_stop):
+        algorithm = Algorithm(10, 2, 2, Schedule(2, 2, 80, 3, configuration=configuration, seed=1))
+        algorithm.start(max_generations=20, should_stop=should_stop, stop_check_interval=1)
+        return algorithm.get_population()[0].tolist()
+
+    assert evolve(None) == evolve(lambda: random.random() > 1)
+
+
+def test_algorithm_start_max_seconds():
+    """Test if the algorithm stops after the given time with its best chromosome."""
+    random.seed(0)
+    generate_institution(50)
+    algorithm = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3))
+
+    start = time.monotonic()
+    best = algorithm.start(max_seconds=0.2)
+
+    assert time.monotonic() - start < 1
+    assert best.get_fitness() < 1
+    assert algorithm.current_generation > 0
+    assert best is algorithm.get_best_chromosome()
+
+
+def test_algorithm_start_threads():
+    """Test if algorithms of different configurations evolve in parallel threads."""
+    barrier = threading.Barrier(4)
+
+    def evolve(number_of_classes):
+        configuration = generate_institution(number_of_classes)
+        prototype = Schedule(2, 2, 80, 3, mutation_operator="mixed", configuration=configuration)
+        barrier.wait()
+        best = Algorithm(10, 2, 2, prototype).start(max_generations=20)
+        reference = prototype.make_new_from_genome(best.classes)
+        return len(best.classes), best.get_fitness() == reference.get_fitness()
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(evolve, [10, 20, 30, 40]))
+
+    assert results == [(10, True), (20, True), (30, True), (40, True)]
@@ -0,0 +1,81 @@
+"""Unit tests for the shared memory population."""
+
+import random
+
+import pytest
+
+from timetable_ga.diversity import DiversityTracker
+from timetable_ga.models import Schedule
+from timetable_ga.population import ParallelAlgorithm, SharedPopulation
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(autouse=True)
+def configuration():
+    """Fixture with a tiny synthetic configuration."""
+    restart_id_counters()
+    random.seed(0)
+    return generate_institution(10)
+
+
+def test_shared_population_attach():
+    """Test if attached populations see the writes of each other."""
+    with SharedPopulation(4, 3) as population:
+        attached = SharedPopulation(4, 3, name=population.name)
+        attached.genomes[1] = [5, 6, 7]
+        attached.fitness[1] = 0.5
+
+        assert population.genomes[1].tolist() == [5, 6, 7]
+        assert population.fitness[1] == 0.5
+        attached.close()
+
+
+def test_shared_population_unlinked_on_exit():
+    """Test if the owner unlinks the shared memory block."""
+    with SharedPopulation(2, 2) as population:
+        name = population.name
+
+    with pytest.raises(FileNotFoundError):
+        SharedPopulation(2, 2, name=name)
+
+
+def test_make_new_from_genome(configuration):
+    """Test if schedules are rebuilt from their genomes."""
+    prototype = Schedule(2, 2, 80, 3)
+    schedule = prototype.make_new_from_prototype()
+
+    rebuilt = prototype.make_new_from_genome(schedule.classes)
+    known = prototype.make_new_from_genome(schedule.classes, fitness=0.25)
+
+    assert list(rebuilt.classes) == list(schedule.classes)
+    assert rebuilt.slots == schedule.slots
+    assert list(rebuilt.criteria) == list(schedule.criteria)
+    assert rebuilt.get_fitness() == schedule.get_fitness()
+    assert known.get_fitness() == 0.25
+    assert len(known.classes) == configuration.get_number_of_course_classes()
+
+
+@pytest.mark.parametrize("operator", ["n_point", "conflict_aware"])
+def test_parallel_algorithm_start(operator):
+    """Test if the parallel algorithm finds a schedule without violated criteria."""
+    prototype = Schedule(2, 2, 80, 3, crossover_operator=operator)
+    algorithm = ParallelAlgorithm(20, 4, 2, prototype, processes=2)
+
+    best = algorithm.start(max_generations=500)
+
+    assert best.get_fitness() == 1
+    assert algorithm.population is None
+    assert best.get_fitness() == best.make_new_from_genome(best.classes).get_fitness()
+
+
+def test_parallel_algorithm_immigrants():
+    """Test if immigrants are injected into the shared population by the workers."""
+    genome = Schedule(2, 2, 80, 3).make_new_from_prototype().classes
+    tracker = DiversityTracker(min_entropy=0.5, immigrants=1)
+    algorithm = ParallelAlgorithm(10, 2, 2, Schedule(2, 2, 80, 3), processes=2, diversity=tracker)
+
+    algorithm.start(max_generations=1, initial_genomes=[genome] * 10)
+
+    assert tracker.injections == 1
+    assert tracker.entropy < 0.5
@@ -0,0 +1,217 @@
+"""Unit tests for the run parameters and inline problems."""
+
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from timetable_ga.models import Algorithm, Configuration
+from timetable_ga.population import ParallelAlgorithm
+from timetable_ga.problem import GAParameters, ProblemPayload
+from timetable_ga.synthetic import generate_institution
+
+
+@pytest.fixture(name="payload")
+def fixture_payload():
+    """Fixture with an inline problem of three classes."""
+    return {
+        "classrooms": [
+            {"id": "room-0", "name": "Room 0", "number_of_seats": 40},
+            {"id": "lab-0", "name": "Lab 0", "is_lab": True},
+        ],
+        "teachers": [
+            {
+                "id": "teacher-0",
+                "name": "T0",
+                "lunch_break_needed": True,
+                "preferred_hours": [0, 1],
+            },
+            {"id": "teacher-1", "name": "T1"},
+        ],
+        "courses": [{"id": "course-0", "name": "C0"}],
+        "student_groups": [
+            {"id": "group-0", "name": "G0", "number_of_students": 15},
+            {"id": "group-1", "name": "G1", "number_of_students": 20},
+        ],
+        "course_classes": [
+            {
+                "id": "class-0",
+                "teacher": "teacher-0",
+                "course": "course-0",
+                "groups": ["group-0", "group-1"],
+            },
+            {
+                "id": "class-1",
+                "teacher": "teacher-1",
+                "course": "course-0",
+                "groups": ["group-1"],
+                "is_lab_required": True,
+                "duration": 2,
+            },
+            {"id": "class-2", "teacher": "teacher-0", "course": "course-0"},
+        ],
+    }
+
+
+def test_ga_parameters():
+    """Test if the algorithm is set up with the parameters."""
+    generate_institution(10)
+
+    algorithm = GAParameters(
+        number_of_chromosomes=10,
+        replace_by_generation=3,
+        track_best=2,
+        mutation_size=4,
+        crossover_operator="uniform",
+        mutation_operator="swap",
+        adaptive_mutation=True,
+        min_entropy=0.3,
+    ).make_algorithm()
+
+    assert len(algorithm.chromosomes) == 10
+    assert algorithm.replace_by_generation == 3
+    assert len(algorithm.best_chromosomes) == 2
+    assert algorithm.prototype.mutation_size == 4
+    assert algorithm.prototype.crossover_probability == 80
+    assert algorithm.prototype.crossover_operator == "uniform"
+    assert algorithm.prototype.mutation_operator == "swap"
+    assert algorithm.adaptation is not None
+    assert algorithm.diversity.min_entropy == 0.3
+    assert GAParameters(diversity_interval=0).make_algorithm().diversity is None
+    assert algorithm.prototype.soft_constraints is None
+    assert not algorithm.prototype.assign_rooms
+    assert GAParameters(assign_rooms=True).make_algorithm().prototype.assign_rooms
+    assert type(algorithm) is Algorithm
+
+
+def test_ga_parameters_processes():
+    """Test if runs with several processes evolve in a pool, except in daemonic processes."""
+    generate_institution(10)
+
+    algorithm = GAParameters(processes=4).make_algorithm()
+
+    assert isinstance(algorithm, ParallelAlgorithm)
+    assert algorithm.processes == 4
+    with patch("multiprocessing.current_process") as mock_current_process:
+        mock_current_process.return_value.daemon = True
+        assert type(GAParameters(processes=4).make_algorithm()) is Algorithm
+
+
+def test_ga_parameters_seed():
+    """Test if runs with the same seed evolve the same schedules."""
+    generate_institution(10)
+
+    first, second = (GAParameters().make_algorithm(seed=7) for _ in range(2))
+
+    assert first.random is first.prototype.random
+    assert (
+        first.prototype.make_new_from_prototype().classes.tolist()
+        == second.prototype.make_new_from_prototype().classes.tolist()
+    )
+
+
+def test_ga_parameters_soft_constraints():
+    """Test if the prototype of the algorithm scores the weighted soft constraints."""
+    generate_institution(10)
+
+    algorithm = GAParameters(
+        number_of_chromosomes=20, soft_constraints={"idle_hours": 2, "lunch_hours": [5]}
+    ).make_algorithm()
+
+    soft_constraints = algorithm.prototype.soft_constraints
+    assert soft_constraints.weights.idle_hours == 2
+    assert soft_constraints.weights.lunch_hours == [5]
+    assert algorithm.prototype.make_new_from_prototype().soft_penalties is not None
+
+
+@pytest.mark.parametrize(
+    "parameters",
+    [
+        {"number_of_chromosomes": 1},
+        {"crossover_probability": -1},
+        {"crossover_operator": "unknown"},
+        {"immigrants": 2},
+        {"soft_constraints": {"lunch_hours": [-1]}},
+        {"soft_constraints": {"idle_hours": -1}},
+        {"mutation_size": 0},
+        {"mutation_size": 10**9},
+        {"num_of_crossover_points": 10**9},
+        {"processes": 0},
+        {"processes": 10**6},
+        {"max_generations": -1},
+        {"number_of_chromosomes": 10, "track_best": 10},
+        {"number_of_chromosomes": 10, "track_best": 5, "replace_by_generation": 6},
+    ],
+)
+def test_ga_parameters_invalid(parameters):
+    """Test if invalid parameters are rejected."""
+    with pytest.raises(ValidationError):
+        GAParameters(**parameters)
+
+
+def test_problem_payload_to_configuration(payload):
+    """Test if the configuration of an inline problem references its entities."""
+    configuration = ProblemPayload(**payload).to_configuration()
+
+    assert Configuration.instance is configuration
+    assert configuration.get_number_of_course_classes() == 3
+    course_class = configuration.get_course_classes()[0]
+    assert course_class.get_number_of_seats() == 35
+    assert course_class.get_teacher().get_backend_id() == "teacher-0"
+    assert len(course_class.get_teacher().get_course_classes()) == 2
+    assert course_class.get_teacher().lunch_break_needed
+    assert course_class.get_teacher().preferred_hours == [0, 1]
+    assert [g.get_backend_id() for g in course_class.get_groups()] == ["group-0", "group-1"]
+    assert configuration.get_course_classes()[1].get_duration() == 2
+    assert configuration.classrooms[1].get_is_lab()
+    assert configuration.classrooms[1].get_number_of_seats() == 1000
+
+
+@pytest.mark.parametrize(
+    "field, index, value",
+    [
+        ("teacher", 0, "teacher-2"),
+        ("course", 1, "course-1"),
+        ("groups", 2, ["group-2"]),
+        ("duration", 0, 0),
+        ("id", 2, "class-0"),
+    ],
+)
+def test_problem_payload_invalid(payload, field, index, value):
+    """Test if problems with unknown references or invalid classes are rejected."""
+    payload["course_classes"][index][field] = value
+
+    with pytest.raises(ValidationError):
+        ProblemPayload(**payload)
+
+
+def test_problem_payload_time_grid(payload):
+    """Test if the week of an inline problem is passed to its configuration and checked."""
+    payload["time_grid"] = {"days": 6, "day_hours": 14, "blocked_periods": [[0, 6]]}
+    payload["classrooms"][0]["unavailable_periods"] = [[5, 13]]
+    payload["course_classes"][2]["duration"] = 14
+    payload["teachers"][0]["preferred_hours"] = [12, 13]
+
+    configuration = ProblemPayload(**payload).to_configuration()
+
+    assert configuration.time_grid.days == 6
+    assert configuration.time_grid.blocked_periods == [(0, 6)]
+    assert configuration.classrooms[0].unavailable_periods == [(5, 13)]
+    assert configuration.get_number_of_slots() == 6 * 2 * 14
+
+
+@pytest.mark.parametrize(
+    "collection, field, value",
+    [
+        ("course_classes", "duration", 15),
+        ("classrooms", "unavailable_periods", [[6, 0]]),
+        ("teachers", "preferred_hours", [14]),
+    ],
+)
+def test_problem_payload_time_grid_invalid(payload, collection, field, value):
+    """Test if durations, periods and hours outside the week are rejected."""
+    payload["time_grid"] = {"days": 6, "day_hours": 14}
+    payload[collection][0][field] = value
+
+    with pytest.raises(ValidationError):
+        ProblemPayload(**payload)
@@ -0,0 +1,100 @@
+"""Unit tests for the operator profiler."""
+
+import json
+import random
+
+import pytest
+
+from timetable_ga.models import Algorithm, Schedule
+from timetable_ga.profiling import SCHEDULE_OPERATORS, OperatorProfiler
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(autouse=True)
+def configuration():
+    """Fixture with a tiny synthetic configuration."""
+    restart_id_counters()
+    random.seed(0)
+    return generate_institution(10)
+
+
+def test_wrap_records_calls():
+    """Test if wrapped functions record calls and keep their return value."""
+    profiler = OperatorProfiler()
+    double = profiler.wrap("double", lambda x: 2 * x)
+
+    assert double(2) == 4
+    assert double(3) == 6
+    assert profiler.operators["double"]["calls"] == 2
+    assert profiler.operators["double"]["time"] > 0
+
+
+def test_wrap_records_exclusive_time():
+    """Test if the time of nested operators is not accounted to the caller."""
+    profiler = OperatorProfiler()
+    inner = profiler.wrap("inner", lambda: sum(range(100000)))
+    outer = profiler.wrap("outer", inner)
+
+    outer()
+
+    assert profiler.operators["outer"]["time"] < profiler.operators["inner"]["time"]
+
+
+def test_instrument_is_inherited_by_copies():
+    """Test if copies of an instrumented schedule are profiled as well."""
+    profiler = OperatorProfiler()
+    prototype = profiler.instrument(Schedule(2, 2, 100, 100), SCHEDULE_OPERATORS)
+
+    child = prototype.make_new_from_prototype()
+    child.crossover(prototype.make_new_from_prototype())
+
+    assert isinstance(child, Schedule)
+    assert profiler.operators["make_new_from_prototype"]["calls"] == 2
+    assert profiler.operators["crossover"]["calls"] == 1
+    assert profiler.operators["calculate_fitness"]["calls"] == 3
+
+
+def test_uninstrumented_schedule_is_not_profiled():
+    """Test if schedules are left untouched without a profiler."""
+    prototype = Schedule(2, 2, 80, 3)
+    Algorithm(10, 2, 2, prototype)
+
+    assert type(prototype) is Schedule
+
+
+def test_algorithm_records_generations():
+    """Test if the algorithm records operators per generation."""
+    profiler = OperatorProfiler()
+    algorithm = Algorithm(10, 2, 2, Schedule(2, 2, 80, 3), profiler=profiler)
+
+    algorithm.start(max_generations=5)
+
+    result = profiler.to_dict()
+    assert set(result["operators"]) == {
+        "make_new_from_prototype",
+        "crossover",
+        "mutation",
+        "calculate_fitness",
+        "add_to_best",
+    }
+    assert len(result["generations"]) == algorithm.current_generation + 1
+    assert result["generations"][0]["operators"]["make_new_from_prototype"]["calls"] == 10
+    if algorithm.current_generation:
+        assert result["generations"][1]["operators"]["crossover"]["calls"] == 2
+    json.dumps(result)
+
+
+def test_generations_are_bounded():
+    """Test if the records of long runs are merged, keeping the totals of the generations."""
+    profiler = OperatorProfiler(max_records=4)
+    double = profiler.wrap("double", lambda x: 2 * x)
+
+    for generation in range(11):
+        double(generation)
+        profiler.end_generation(generation)
+
+    generations = profiler.to_dict()["generations"]
+    assert [(r["generation"], r["generations"]) for r in generations] == [(0, 4), (4, 4), (8, 3)]
+    assert sum(r["operators"]["double"]["calls"] for r in generations) == 11
+    assert profiler.operators["double"]["calls"] == 11
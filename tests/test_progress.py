@@ -0,0 +1,19 @@
+"""Unit tests for the progress events of tasks."""
+
+from unittest.mock import MagicMock, patch
+
+from timetable_ga.progress import PROGRESS, ProgressReporter
+
+
+@patch("timetable_ga.progress.time.monotonic")
+def test_progress_reporter(mock_monotonic):
+    """Test if at most one event is published per interval."""
+    task = MagicMock()
+    reporter = ProgressReporter(task, interval=1.0)
+
+    for now, generation in ((10.0, 1), (10.5, 2), (11.0, 3)):
+        mock_monotonic.return_value = now
+        reporter({"generation": generation})
+
+    assert task.update_state.call_count == 2
+    task.update_state.assert_called_with(state=PROGRESS, meta={"generation": 3})
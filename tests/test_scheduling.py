@@ -0,0 +1,95 @@
+"""Unit tests for the routing of tasks and the per-tenant limits."""
+
+import time
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from timetable_ga.scheduling import (
+    QUEUE_ROUTES,
+    TenantLimiter,
+    get_evolution_budget,
+    get_problem_size,
+    route_problem,
+    route_size,
+)
+from timetable_ga.synthetic import generate_institution
+
+
+def _configuration(number_of_classes, number_of_classrooms):
+    """Returns a stand-in configuration of the given size."""
+    configuration = MagicMock()
+    configuration.get_number_of_course_classes.return_value = number_of_classes
+    configuration.get_number_of_classrooms.return_value = number_of_classrooms
+    return configuration
+
+
+def test_route_problem():
+    """Test if problems are routed to the smallest queue taking them."""
+    configuration = generate_institution(10)
+
+    assert get_problem_size(configuration) == 10 * configuration.get_number_of_classrooms()
+    assert route_problem(configuration).queue == "timetable-preview"
+    assert route_problem(_configuration(100, 50)).queue == "timetable-preview"
+    assert route_problem(_configuration(101, 50)).queue == "timetable-standard"
+    assert route_problem(_configuration(5000, 400)).queue == "timetable-large"
+    assert route_size(5000) == route_problem(_configuration(100, 50))
+
+
+def test_queue_route_options():
+    """Test if the options of a queue carry its priority and time limits."""
+    route = QUEUE_ROUTES[0]
+
+    assert route.get_options() == {
+        "queue": "timetable-preview",
+        "priority": 0,
+        "soft_time_limit": 60,
+        "time_limit": 90,
+    }
+    assert route.get_options(priority=3)["priority"] == 3
+    assert all(route.soft_time_limit < route.time_limit for route in QUEUE_ROUTES)
+
+
+def test_get_evolution_budget():
+    """Test if the evolution leaves time to store the result before the soft time limit."""
+    assert get_evolution_budget(None) is None
+    assert 0 < get_evolution_budget(60) < 60
+
+
+@pytest.fixture(name="limiter")
+def fixture_limiter():
+    """Fixture with a limiter of two runs per tenant on a fake Redis."""
+    return TenantLimiter(fakeredis.FakeRedis(), 2)
+
+
+def test_tenant_limiter(limiter):
+    """Test if at most the limit of runs of a tenant hold a slot."""
+    assert limiter.acquire("tenant-0", "task-0", 60)
+    assert limiter.acquire("tenant-0", "task-1", 60)
+    assert not limiter.acquire("tenant-0", "task-2", 60)
+    assert limiter.acquire("tenant-0", "task-1", 60)
+    assert limiter.acquire("tenant-1", "task-3", 60)
+
+    limiter.release("tenant-0", "task-0")
+
+    assert limiter.acquire("tenant-0", "task-2", 60)
+
+
+def test_tenant_limiter_key_expiry(limiter):
+    """Test if a short lease does not expire the set before a longer lease of the tenant."""
+    key = "timetable-ga:tenant-runs:tenant-0"
+    assert limiter.acquire("tenant-0", "task-0", 7500)
+    assert limiter.acquire("tenant-0", "task-1", 90)
+
+    assert limiter.client.ttl(key) > 7400
+
+
+def test_tenant_limiter_expired_lease(limiter):
+    """Test if the slots of runs with an expired lease are freed."""
+    assert limiter.acquire("tenant-0", "task-0", 0.01)
+    assert limiter.acquire("tenant-0", "task-1", 60)
+    time.sleep(0.02)
+
+    assert limiter.acquire("tenant-0", "task-2", 60)
+    assert limiter.client.zcard("timetable-ga:tenant-runs:tenant-0") == 2
@@ -0,0 +1,89 @@
+"""Unit tests for the non-blocking reads of the states of tasks."""
+
+import asyncio
+from unittest.mock import patch
+
+import fakeredis
+from celery import Celery
+from prometheus_client import REGISTRY
+
+from timetable_ga.status import StatusCache, TaskStatusReader
+
+backend = Celery(backend="redis://localhost:6379/0").backend
+
+
+def store_state(redis, task_id, state, result=None):
+    """Stores the state of a task as the result backend of Celery does."""
+    meta = {"task_id": task_id, "status": state, "result": result, "traceback": None}
+    redis.set(backend.get_key_for_task(task_id), backend.encode(meta))
+
+
+def test_status_cache_expiry():
+    """Test if states of running tasks expire, and those of finished tasks do not."""
+    cache = StatusCache(ttl=1, max_size=10)
+    cache.put("task-0", {"status": "STARTED", "result": None})
+    cache.put("task-1", {"status": "SUCCESS", "result": 1})
+
+    assert cache.get("task-0")["status"] == "STARTED"
+    with patch("timetable_ga.status.time.monotonic", return_value=float("inf")):
+        assert cache.get("task-0") is None
+        assert cache.get("task-1")["result"] == 1
+
+
+def test_status_cache_eviction():
+    """Test if the least recently read tasks are evicted first, running tasks never cached at 0."""
+    cache = StatusCache(ttl=0, max_size=2)
+    cache.put("task-0", {"status": "SUCCESS", "result": 0})
+    cache.put("task-1", {"status": "FAILURE", "result": None})
+    cache.get("task-0")
+    cache.put("task-2", {"status": "REVOKED", "result": None})
+    cache.put("task-3", {"status": "STARTED", "result": None})
+
+    assert cache.get("task-0") is not None
+    assert cache.get("task-1") is None
+    assert cache.get("task-2") is not None
+    assert cache.get("task-3") is None
+
+
+def test_task_status_reader():
+    """Test if the reader decodes the stored states, reading running tasks again once expired."""
+    server = fakeredis.FakeServer()
+    redis = fakeredis.FakeRedis(server=server)
+    cache = StatusCache(ttl=60, max_size=10)
+    reader = TaskStatusReader(fakeredis.FakeAsyncRedis(server=server), backend, cache)
+    hits = REGISTRY.get_sample_value("timetable_cache_hits_total", {"cache": "status"}) or 0
+
+    async def read():
+        return (await reader.get_meta("task-0"))["status"]
+
+    assert asyncio.run(reader.get_meta("task-1"))["status"] == "PENDING"
+    store_state(redis, "task-0", "STARTED")
+    assert asyncio.run(read()) == "STARTED"
+    store_state(redis, "task-0", "SUCCESS", "result")
+    assert asyncio.run(read()) == "STARTED"
+    cache.ttl = 0
+    cache.put("task-0", {"status": "STARTED", "result": None})
+    assert asyncio.run(read()) == "SUCCESS"
+    assert asyncio.run(reader.get_meta("task-0"))["result"] == "result"
+
+    assert REGISTRY.get_sample_value("timetable_cache_hits_total", {"cache": "status"}) == hits + 2
+
+
+def test_task_status_reader_batch():
+    """Test if the states of the tasks missing from the cache are read together."""
+    server = fakeredis.FakeServer()
+    redis = fakeredis.FakeRedis(server=server)
+    client = fakeredis.FakeAsyncRedis(server=server)
+    reader = TaskStatusReader(client, backend, StatusCache(ttl=60, max_size=10))
+    store_state(redis, "task-0", "SUCCESS", 0)
+    store_state(redis, "task-1", "FAILURE", backend.prepare_exception(ValueError("failed")))
+    asyncio.run(reader.get_meta("task-0"))
+
+    with patch.object(client, "mget", wraps=client.mget) as mock_mget:
+        metas = asyncio.run(reader.get_metas(["task-0", "task-1", "task-2", "task-1"]))
+        asyncio.run(reader.get_metas(["task-0", "task-1"]))
+
+    assert [meta["status"] for meta in metas] == ["SUCCESS", "FAILURE", "PENDING", "FAILURE"]
+    assert str(metas[1]["result"]) == "failed"
+    mock_mget.assert_called_once()
+    assert len(mock_mget.call_args.args[0]) == 3
@@ -0,0 +1,186 @@
+"""Unit tests for the result store."""
+
+import gc
+import json
+import random
+import sqlite3
+import warnings
+import zlib
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from timetable_ga.ga_consts import CRITERIA_NUM, MAX_DAY_HOURS, MAX_DAYS
+from timetable_ga.models import Schedule, TimeGrid
+from timetable_ga.store import (
+    CompactSchedule,
+    ResultStore,
+    fingerprint_configuration,
+    get_result_store,
+)
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+from timetable_ga.warmstart import get_placements
+
+
+@pytest.fixture(name="schedule")
+def fixture_schedule():
+    """Fixture with a random schedule of a small synthetic institution."""
+    restart_id_counters()
+    random.seed(0)
+    generate_institution(50)
+    return Schedule(2, 2, 80, 3).make_new_from_prototype()
+
+
+def test_fingerprint_configuration():
+    """Test if equal problems have equal fingerprints whatever their internal IDs."""
+    fingerprint = fingerprint_configuration(generate_institution(10))
+
+    assert fingerprint_configuration(generate_institution(10)) == fingerprint
+    assert fingerprint_configuration(generate_institution(10, seed=1)) != fingerprint
+    assert fingerprint_configuration(generate_institution(11)) != fingerprint
+    six_days = generate_institution(10, time_grid=TimeGrid(days=6))
+    assert fingerprint_configuration(six_days) != fingerprint
+
+
+def test_compact_schedule_round_trip(schedule):
+    """Test if a schedule is serialized and deserialized without loss."""
+    compact = CompactSchedule.from_bytes(CompactSchedule.from_schedule(schedule).to_bytes())
+
+    assert compact.fitness == schedule.get_fitness()
+    assert compact.get_placements() == get_placements(schedule)
+    assert compact.get_criteria().shape == (50, CRITERIA_NUM)
+    assert list(compact.get_criteria().ravel()) == [bool(c) for c in schedule.criteria]
+
+
+def test_compact_schedule_round_trip_largest_week():
+    """Test if the last hour of the last day of the largest week is serialized without loss."""
+    restart_id_counters()
+    configuration = generate_institution(
+        10, max_duration=1, time_grid=TimeGrid(days=MAX_DAYS, day_hours=MAX_DAY_HOURS)
+    )
+    schedule = Schedule(2, 2, 80, 3).make_new_from_prototype()
+    schedule.classes[0] = configuration.get_position(MAX_DAYS - 1, 0, MAX_DAY_HOURS - 1)
+
+    compact = CompactSchedule.from_bytes(CompactSchedule.from_schedule(schedule).to_bytes())
+
+    assert (compact.day[0], compact.room[0], compact.start[0]) == (
+        MAX_DAYS - 1,
+        0,
+        MAX_DAY_HOURS - 1,
+    )
+    assert compact.get_placements() == get_placements(schedule)
+
+
+def test_compact_schedule_size(schedule):
+    """Test if the binary representation is smaller than the JSON placements."""
+    placements = {
+        backend_id: placement.model_dump()
+        for backend_id, placement in get_placements(schedule).items()
+    }
+
+    data = CompactSchedule.from_schedule(schedule).to_bytes()
+
+    assert len(data) < len(json.dumps(placements)) / 2
+
+
+def test_compact_schedule_diff(schedule):
+    """Test if the classes placed differently are found."""
+    compact = CompactSchedule.from_schedule(schedule)
+    other = CompactSchedule.from_bytes(compact.to_bytes())
+    other.start = other.start.copy()
+    other.start[[3, 7]] ^= 1
+
+    assert compact.diff(compact) == []
+    assert compact.diff(other) == ["class-3", "class-7"]
+
+    del other.class_ids[7]
+    other.day, other.room, other.start = (
+        np.delete(a, 7) for a in (other.day, other.room, other.start)
+    )
+
+    assert compact.diff(other) == ["class-3", "class-7"]
+
+
+def test_compact_schedule_unsupported_version(schedule):
+    """Test if data of an unknown format version is rejected."""
+    data = bytearray(zlib.decompress(CompactSchedule.from_schedule(schedule).to_bytes()))
+    data[0] = 255
+
+    with pytest.raises(ValueError):
+        CompactSchedule.from_bytes(zlib.compress(bytes(data)))
+
+
+def test_result_store(tmp_path, schedule):
+    """Test if runs are stored, found by fingerprint and deleted."""
+    store = ResultStore(str(tmp_path / "results.sqlite3"))
+    compact = CompactSchedule.from_schedule(schedule)
+
+    store.save("run-0", "fingerprint", compact, 10, {"mutation_size": 2})
+    store.save("run-1", "fingerprint", compact, 20, {"mutation_size": 3})
+    store.save("run-2", "other", compact, 30, problem={"classrooms": []})
+    store.save("run-3", "fingerprint", compact, 5, {"mutation_size": 2}, status="cancelled")
+
+    stored = store.get("run-1")
+    assert stored["fingerprint"] == "fingerprint"
+    assert stored["parameters"] == {"mutation_size": 3}
+    assert stored["generations"] == 20
+    assert stored["status"] == "finished"
+    assert store.get("run-3")["status"] == "cancelled"
+    assert stored["problem"] is None
+    assert store.get("run-2")["problem"] == {"classrooms": []}
+    assert stored["schedule"].get_placements() == compact.get_placements()
+
+    assert store.find("fingerprint", status="finished") == ["run-1", "run-0"]
+    assert store.find("fingerprint", {"mutation_size": 2}) == ["run-3", "run-0"]
+    assert store.find("missing") == []
+
+    store.delete("run-1")
+    assert store.get("run-1") is None
+    assert ResultStore(store.path).find("fingerprint") == ["run-3", "run-0"]
+
+
+def test_result_store_closes_connections(tmp_path, schedule):
+    """Test if the connections of the operations of the store are closed."""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        store = ResultStore(str(tmp_path / "results.sqlite3"))
+        store.save("run-0", "fingerprint", CompactSchedule.from_schedule(schedule), 10)
+        store.get("run-0")
+        store.find("fingerprint")
+        store.delete("run-0")
+        gc.collect()
+
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+
+
+def test_result_store_adds_columns(tmp_path, schedule):
+    """Test if stores created without the status and problem columns are migrated."""
+    path = str(tmp_path / "results.sqlite3")
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE results (run_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+            "parameters TEXT NOT NULL, fitness REAL NOT NULL, generations INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, schedule BLOB NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO results VALUES ('run-0', 'fingerprint', '{}', 1, 3, 0, ?)",
+            (CompactSchedule.from_schedule(schedule).to_bytes(),),
+        )
+
+    stored = ResultStore(path).get("run-0")
+    assert stored["status"] == "finished"
+    assert stored["problem"] is None
+
+
+def test_get_result_store(tmp_path, monkeypatch):
+    """Test if the store of each path is opened once."""
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.sqlite3"))
+    store = get_result_store()
+
+    with patch.object(ResultStore, "__init__", return_value=None) as init:
+        assert get_result_store() is store
+        monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "other.sqlite3"))
+        assert get_result_store() is not store
+    init.assert_called_once_with(str(tmp_path / "other.sqlite3"))
@@ -0,0 +1,52 @@
+"""Unit tests for the synthetic institution generator."""
+
+import pytest
+
+from timetable_ga.ga_consts import DAY_HOURS, DAYS_NUM
+from timetable_ga.models import Configuration
+from timetable_ga.synthetic import SIZES, generate_institution
+from timetable_ga.utils import restart_id_counters
+
+
+@pytest.fixture(autouse=True)
+def reset_id_counter():
+    """Fixture to reset the ID counter before each test."""
+    restart_id_counters()
+
+
+def test_generate_institution_number_of_classes():
+    """Test if the generator creates the requested number of classes."""
+    configuration = generate_institution(SIZES["small"])
+    assert configuration.get_number_of_course_classes() == SIZES["small"]
+    assert configuration.get_number_of_classrooms() >= 2
+    assert any(room.get_is_lab() for room in configuration.classrooms)
+
+
+def test_generate_institution_sets_instance():
+    """Test if the generated configuration becomes the active one."""
+    configuration = generate_institution(10)
+    assert Configuration.instance is configuration
+
+
+def test_generate_institution_is_seeded():
+    """Test if equal seeds give equal institutions."""
+    first = generate_institution(100, seed=7)
+    second = generate_institution(100, seed=7)
+
+    for a, b in zip(first.course_classes, second.course_classes):
+        assert a.backend_id == b.backend_id
+        assert a.get_duration() == b.get_duration()
+        assert a.get_teacher().backend_id == b.get_teacher().backend_id
+        assert [g.backend_id for g in a.get_groups()] == [g.backend_id for g in b.get_groups()]
+
+
+def test_generate_institution_room_capacity():
+    """Test if every class fits in the day and in at least one classroom."""
+    configuration = generate_institution(200)
+    max_seats = max(room.get_number_of_seats() for room in configuration.classrooms)
+    total_hours = sum(c.get_duration() for c in configuration.course_classes)
+
+    for course_class in configuration.course_classes:
+        assert 1 <= course_class.get_duration() <= DAY_HOURS
+        assert course_class.get_number_of_seats() <= max_seats
+    assert total_hours <= configuration.get_number_of_classrooms() * DAYS_NUM * DAY_HOURS
@@ -0,0 +1,129 @@
+"""Unit tests for the formats and compression of the timetables served by the API."""
+
+import gzip
+import json
+import random
+
+import msgpack
+import pytest
+
+from timetable_ga import transport
+from timetable_ga.models import Schedule
+from timetable_ga.store import CompactSchedule
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.transport import (
+    ARROW,
+    JSON,
+    MSGPACK,
+    compress,
+    negotiate_encoding,
+    negotiate_media_type,
+    render_timetable,
+)
+from timetable_ga.utils import restart_id_counters
+
+SUMMARY = {"run_id": "run", "fitness": 0.5, "generations": 10, "status": "finished"}
+
+
+@pytest.fixture(name="schedule")
+def fixture_schedule():
+    """Fixture with the columns of a random schedule of a small synthetic institution."""
+    restart_id_counters()
+    random.seed(0)
+    generate_institution(50)
+    yield CompactSchedule.from_schedule(Schedule(2, 2, 80, 3).make_new_from_prototype())
+    restart_id_counters()
+
+
+@pytest.mark.parametrize(
+    "accept, media_type",
+    [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/*", JSON),
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("text/html, application/msgpack", MSGPACK),
+        ("application/json;q=0.5, application/msgpack", MSGPACK),
+        ("application/msgpack;q=0.5, application/json", JSON),
+        ("application/msgpack;q=0, */*", JSON),
+        ("text/html", None),
+    ],
+)
+def test_negotiate_media_type(accept, media_type):
+    """Test if the most preferred supported media type is chosen."""
+    assert negotiate_media_type(accept) == media_type
+
+
+def test_negotiate_media_type_without_pyarrow(monkeypatch):
+    """Test if Arrow is not acceptable without pyarrow."""
+    monkeypatch.setattr(transport, "ARROW_AVAILABLE", False)
+
+    assert negotiate_media_type(ARROW) is None
+    assert negotiate_media_type(f"{ARROW}, application/json;q=0.1") == JSON
+
+
+def test_negotiate_encoding(monkeypatch):
+    """Test if zstd is preferred to gzip when available, and refused codings are not used."""
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("zstd;q=0, *") == "gzip"
+    assert negotiate_encoding("zstd;q=0, gzip;q=0, *") is None
+
+    monkeypatch.setattr(transport, "zstd", None)
+    assert negotiate_encoding("zstd, gzip") == "gzip"
+    assert negotiate_encoding("zstd") is None
+
+
+@pytest.mark.skipif(transport.zstd is None, reason="zstd is not available")
+def test_compress_zstd(schedule):
+    """Test if bodies are compressed with zstd."""
+    body = render_timetable(SUMMARY, schedule, JSON)
+
+    assert negotiate_encoding("gzip, zstd") == "zstd"
+    assert negotiate_encoding("*") == "zstd"
+    assert transport.zstd.decompress(compress(body, "zstd")) == body
+
+
+def test_render_timetable_json(schedule):
+    """Test if JSON holds the placements of the classes by backend ID, gzipped losslessly."""
+    body = render_timetable(SUMMARY, schedule, JSON)
+
+    assert json.loads(body) == {
+        **SUMMARY,
+        "placements": {
+            class_id: placement.model_dump()
+            for class_id, placement in schedule.get_placements().items()
+        },
+    }
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+
+def test_render_timetable_msgpack(schedule):
+    """Test if msgpack holds the columns of the schedule, smaller than JSON."""
+    body = render_timetable(SUMMARY, schedule, MSGPACK)
+    content = msgpack.unpackb(body)
+
+    assert {key: content[key] for key in SUMMARY} == SUMMARY
+    assert content["classes"] == schedule.class_ids
+    assert content["classrooms"] == schedule.room_ids
+    assert content["day"] == schedule.day.tolist()
+    assert content["room"] == schedule.room.tolist()
+    assert content["time"] == schedule.start.tolist()
+    assert len(body) < len(render_timetable(SUMMARY, schedule, JSON)) / 2
+
+
+def test_render_timetable_arrow(schedule):
+    """Test if the Arrow stream holds the columns of the schedule and the summary."""
+    ipc = pytest.importorskip("pyarrow.ipc")
+
+    table = ipc.open_stream(render_timetable(SUMMARY, schedule, ARROW)).read_all()
+
+    assert table.column("class").to_pylist() == schedule.class_ids
+    assert table.column("day").to_pylist() == schedule.day.tolist()
+    assert table.column("room").to_pylist() == [schedule.room_ids[r] for r in schedule.room]
+    assert table.column("time").to_pylist() == schedule.start.tolist()
+    metadata = {key.decode(): json.loads(value) for key, value in table.schema.metadata.items()}
+    assert metadata == SUMMARY
@@ -1,28 +1,17 @@
 """
 Test the utils module."""
 
-from unittest.mock import patch
-
+from timetable_ga.models import Classroom, Teacher, get_entity_registry
 from timetable_ga.utils import restart_id_counters
 
 
-@patch("timetable_ga.models.Classroom.restart_id_counter")
-@patch("timetable_ga.models.Teacher.restart_id_counter")
-@patch("timetable_ga.models.Course.restart_id_counter")
-@patch("timetable_ga.models.StudentsGroup.restart_id_counter")
-@patch("timetable_ga.models.CourseClass.restart_id_counter")
-def test_restart_id_counters(
-    mock_course_class_restart,
-    mock_students_group_restart,
-    mock_course_restart,
-    mock_teacher_restart,
-    mock_classroom_restart,
-):
+def test_restart_id_counters():
     """Test the restart_id_counters function."""
+    Classroom(backend_id="room-0", name="Room 0")
+    registry = get_entity_registry()
+
     restart_id_counters()
 
-    mock_classroom_restart.assert_called_once()
-    mock_teacher_restart.assert_called_once()
-    mock_course_restart.assert_called_once()
-    mock_students_group_restart.assert_called_once()
-    mock_course_class_restart.assert_called_once()
+    assert get_entity_registry() is not registry
+    assert Classroom(backend_id="room-1", name="Room 1").id == 0
+    assert Teacher(backend_id="teacher-0", name="Teacher 0").id == 0
@@ -0,0 +1,112 @@
+"""Unit tests for the warm-start re-optimization."""
+
+import random
+
+import pytest
+
+from timetable_ga.ga_consts import CRITERIA_NUM
+from timetable_ga.models import Algorithm, Schedule
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+from timetable_ga.warmstart import (
+    Placement,
+    ScheduleChanges,
+    get_affected_classes,
+    get_placements,
+    get_previous_genome,
+    reoptimize,
+)
+
+
+@pytest.fixture(name="previous")
+def fixture_previous():
+    """Fixture with the placements of a schedule without violated criteria."""
+    restart_id_counters()
+    random.seed(3)
+    generate_institution(20)
+    best = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3)).start(max_generations=2000)
+    assert best.get_fitness() == 1
+    return get_placements(best)
+
+
+def test_get_placements_round_trip(previous):
+    """Test if placements are turned back into the same genome."""
+    genome = get_previous_genome(previous)
+    schedule = Schedule(2, 2, 80, 3).make_new_from_genome(genome)
+
+    assert get_placements(schedule) == previous
+    assert schedule.get_fitness() == 1
+
+
+def test_get_previous_genome_invalid_placements(previous):
+    """Test if classes without a valid placement are placed randomly."""
+    previous = dict(previous)
+    del previous["class-0"]
+    previous["class-1"] = Placement(day=0, room="removed-room", time=0)
+
+    genome = get_previous_genome(previous)
+
+    assert len(genome) == 20
+    assert get_placements(Schedule(2, 2, 80, 3).make_new_from_genome(genome))["class-2"] == (
+        previous["class-2"]
+    )
+
+
+def test_get_affected_classes(previous):
+    """Test if the classes of changed entities are affected."""
+    configuration = generate_institution(20)
+    teacher = configuration.course_classes[3].get_teacher()
+    group = configuration.course_classes[4].get_groups()[0]
+    room = previous["class-5"].room
+
+    affected = get_affected_classes(
+        previous,
+        ScheduleChanges(
+            teachers=[teacher.backend_id],
+            student_groups=[group.backend_id],
+            classrooms=[room],
+            course_classes=["class-6"],
+        ),
+    )
+
+    for i, course_class in enumerate(configuration.course_classes):
+        expected = (
+            course_class.get_teacher() == teacher
+            or group in course_class.get_groups()
+            or previous[course_class.backend_id].room == room
+            or i == 6
+        )
+        assert (i in affected) == expected
+    assert not get_affected_classes(previous, ScheduleChanges())
+
+
+def test_reoptimize_keeps_unaffected_classes(previous):
+    """Test if only affected and conflicting classes are moved after a teacher changed."""
+    configuration = generate_institution(20)
+    moved = configuration.course_classes[0]
+    moved.teacher = configuration.course_classes[1].get_teacher()
+    changes = ScheduleChanges(course_classes=[moved.backend_id])
+
+    prototype = Schedule(2, 2, 80, 3)
+    criteria = prototype.make_new_from_genome(get_previous_genome(previous)).criteria
+    algorithm = Algorithm(20, 4, 2, prototype)
+
+    best = reoptimize(algorithm, previous, changes, max_generations=2000)
+
+    placements = get_placements(best)
+    assert best.get_fitness() == 1
+    assert prototype.mutable_classes is None
+    for i, course_class in enumerate(configuration.course_classes):
+        if i != 0 and all(criteria[i * CRITERIA_NUM : (i + 1) * CRITERIA_NUM]):
+            assert placements[course_class.backend_id] == previous[course_class.backend_id]
+
+
+def test_reoptimize_without_changes(previous):
+    """Test if an unchanged feasible timetable is returned as is."""
+    generate_institution(20)
+    algorithm = Algorithm(20, 4, 2, Schedule(2, 2, 80, 3))
+
+    best = reoptimize(algorithm, previous, ScheduleChanges())
+
+    assert algorithm.current_generation == 0
+    assert get_placements(best) == previous
@@ -0,0 +1,459 @@
+"""Unit tests for the endpoints of the web service."""
+
+from unittest.mock import patch
+
+import fakeredis
+import msgpack
+import pytest
+from celery.result import AsyncResult
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from timetable_ga.broker import GENERATION_TASK, REOPTIMIZATION_TASK, celery_app
+from timetable_ga.coalescing import RequestCoalescer
+from timetable_ga.problem import GAParameters
+from timetable_ga.status import TaskStatusReader
+from timetable_ga.store import CompactSchedule, get_result_store
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.web import app
+from timetable_ga.worker import timetable_generation
+
+client = TestClient(app)
+
+
+@pytest.fixture(name="status_redis", autouse=True)
+def fixture_status_redis():
+    """Fixture reading the states of the tasks from a fake Redis, returned as a sync client."""
+    server = fakeredis.FakeServer()
+    reader = TaskStatusReader(fakeredis.FakeAsyncRedis(server=server), celery_app.backend)
+    with patch("timetable_ga.web._get_status_reader", return_value=reader):
+        yield fakeredis.FakeRedis(server=server)
+
+
+def store_state(redis, task_id, state, result=None):
+    """Stores the state of a task as the result backend of Celery does."""
+    backend = celery_app.backend
+    meta = {"task_id": task_id, "status": state, "result": result, "traceback": None}
+    redis.set(backend.get_key_for_task(task_id), backend.encode(meta))
+
+
+@pytest.fixture(name="coalescer")
+def fixture_coalescer():
+    """Fixture coalescing requests in a fake Redis."""
+    coalescer = RequestCoalescer(fakeredis.FakeRedis(), get_result_store(), 3600)
+    with (
+        patch("timetable_ga.web._get_coalescer", return_value=coalescer),
+        patch("timetable_ga.worker._get_coalescer", return_value=coalescer),
+    ):
+        yield coalescer
+
+
+@pytest.mark.usefixtures("backend")
+@patch.object(celery_app, "send_task")
+def test_read_root(mock_send_task, monkeypatch):
+    """Test the root endpoint."""
+    monkeypatch.setenv("RESULT_CACHE_TTL", "0")
+    mock_send_task.return_value.id = "mock_task_id"
+    mock_send_task.return_value.state = "PENDING"
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "response": "ok",
+        "task_id": "mock_task_id",
+        "task_status": "PENDING",
+        "queue": "timetable-preview",
+    }
+    mock_send_task.assert_called_once_with(
+        GENERATION_TASK,
+        kwargs={"profile": False, "parameters": GAParameters().model_dump(), "tenant": "default"},
+        queue="timetable-preview",
+        priority=0,
+        soft_time_limit=60,
+        time_limit=90,
+    )
+
+
+@pytest.mark.usefixtures("backend")
+@patch.object(celery_app, "send_task")
+def test_read_root_profile(mock_send_task):
+    """Test the root endpoint requesting a profiled run."""
+    mock_send_task.return_value.id = "mock_task_id"
+    mock_send_task.return_value.state = "PENDING"
+
+    response = client.get("/?profile=true", headers={"X-Tenant-ID": "tenant-0"})
+
+    assert response.status_code == 200
+    kwargs = mock_send_task.call_args.kwargs["kwargs"]
+    assert kwargs["profile"] is True
+    assert kwargs["tenant"] == "tenant-0"
+
+
+@pytest.mark.usefixtures("backend", "coalescer")
+@patch.object(celery_app, "send_task")
+def test_read_root_in_flight(mock_send_task, status_redis):
+    """Test if identical requests get the task ID and the state of the in-flight run."""
+    mock_send_task.side_effect = lambda _name, kwargs, task_id, **_options: AsyncResult(task_id)
+    hits = REGISTRY.get_sample_value("timetable_cache_hits_total", {"cache": "in_flight"}) or 0
+
+    first = client.get("/").json()
+    store_state(status_redis, first["task_id"], "STARTED")
+    second = client.get("/").json()
+
+    mock_send_task.assert_called_once()
+    assert first["task_id"] == mock_send_task.call_args.kwargs["task_id"]
+    assert "coalescing_key" in mock_send_task.call_args.kwargs["kwargs"]
+    assert second == {
+        "response": "ok",
+        "task_id": first["task_id"],
+        "task_status": "STARTED",
+        "cached": True,
+    }
+    assert REGISTRY.get_sample_value("timetable_cache_hits_total", {"cache": "in_flight"}) == (
+        hits + 1
+    )
+
+
+@pytest.mark.usefixtures("backend", "coalescer")
+@patch.object(celery_app, "send_task")
+def test_read_root_completed(mock_send_task):
+    """Test if a recently finished run of the same problem is reused."""
+    run_id = timetable_generation.run()["run_id"]
+
+    response = client.get("/")
+
+    assert response.json() == {
+        "response": "ok",
+        "task_id": run_id,
+        "task_status": "SUCCESS",
+        "cached": True,
+    }
+    mock_send_task.assert_not_called()
+
+
+@pytest.mark.usefixtures("coalescer")
+@patch.object(celery_app, "send_task")
+def test_create_timetable(mock_send_task, problem):
+    """Test the generation endpoint with parameters and an inline problem."""
+    mock_send_task.side_effect = lambda _name, kwargs, task_id, **_options: AsyncResult(task_id)
+    parameters = {"number_of_chromosomes": 20, "track_best": 2, "max_generations": 50}
+
+    response = client.post("/timetables", json={"parameters": parameters, "problem": problem})
+
+    assert response.status_code == 200
+    kwargs = mock_send_task.call_args.kwargs["kwargs"]
+    assert kwargs["parameters"] == GAParameters(**parameters).model_dump()
+    assert kwargs["problem"]["course_classes"][1]["duration"] == 3
+
+    result = timetable_generation.run(parameters=kwargs["parameters"], problem=kwargs["problem"])
+
+    assert result["fitness"] == 1
+    assert set(client.get(f"/results/{result['run_id']}").json()["placements"]) == {
+        "class-0",
+        "class-1",
+    }
+    response = client.post("/timetables", json={"parameters": parameters, "problem": problem})
+    assert response.json()["task_id"] == result["run_id"]
+
+
+@pytest.mark.usefixtures("coalescer")
+@patch("timetable_ga.web.load_configuration", side_effect=lambda: generate_institution(10))
+@patch.object(celery_app, "send_task")
+def test_create_timetables(mock_send_task, mock_load_configuration, problem, status_redis):
+    """Test the batch generation endpoint, loading the backend problem once for the batch."""
+    mock_send_task.side_effect = lambda _name, kwargs, task_id, **_options: AsyncResult(task_id)
+    other_problem = {**problem, "course_classes": problem["course_classes"][:1]}
+    requests = [
+        {"problem": problem},
+        {"problem": other_problem, "priority": 5},
+        {},
+        {"parameters": {"max_generations": 10}},
+    ]
+
+    response = client.post("/timetables/batch", json={"requests": requests})
+
+    assert response.status_code == 200
+    tasks = response.json()["tasks"]
+    assert [task["response"] for task in tasks] == ["ok"] * 4
+    assert [task["task_status"] for task in tasks] == ["PENDING"] * 4
+    assert len({task["task_id"] for task in tasks}) == 4
+    mock_load_configuration.assert_called_once()
+    calls = mock_send_task.call_args_list
+    assert [call.kwargs["priority"] for call in calls] == [0, 5, 0, 0]
+    assert len({id(call.kwargs["producer"]) for call in calls}) == 1
+
+    # Identical requests join the in-flight runs, failed submissions are reported per request
+    store_state(status_redis, tasks[0]["task_id"], "STARTED")
+    mock_send_task.side_effect = RuntimeError("No broker")
+    requests = [{"problem": problem}, {"parameters": {"max_generations": 20}}]
+    tasks = client.post("/timetables/batch", json={"requests": requests}).json()["tasks"]
+    assert tasks == [
+        {
+            "response": "ok",
+            "task_id": tasks[0]["task_id"],
+            "task_status": "STARTED",
+            "cached": True,
+        },
+        {"response": "error", "error": "No broker"},
+    ]
+
+
+def test_create_timetables_invalid_request():
+    """Test if empty and too large batches are rejected."""
+    assert client.post("/timetables/batch", json={"requests": []}).status_code == 422
+    response = client.post("/timetables/batch", json={"requests": [{}] * 101})
+    assert response.status_code == 422
+
+
+def test_create_timetable_invalid_request(problem):
+    """Test the generation endpoint with invalid parameters and problems."""
+    response = client.post("/timetables", json={"parameters": {"mutation_probability": 101}})
+    assert response.status_code == 422
+
+    response = client.post("/timetables", json={"parameters": {"track_best": 100}})
+    assert response.status_code == 422
+
+    problem["course_classes"][0]["teacher"] = "teacher-1"
+    response = client.post("/timetables", json={"problem": problem})
+    assert response.status_code == 422
+
+
+@pytest.mark.usefixtures("backend")
+@patch.object(celery_app, "send_task", side_effect=OSError("No broker"))
+def test_read_root_broker_unavailable(_mock_send_task, coalescer):
+    """Test if the claim of a run that could not be submitted is released."""
+    assert client.get("/").json() == {"response": "error", "error": "No broker"}
+    assert not coalescer.client.keys()
+
+
+def test_task_status(status_redis):
+    """Test the task status endpoint."""
+    response = client.get("/task-status/mock_task_id")
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "pending",
+        "message": "Task is still waiting to be executed.",
+    }
+
+    store_state(status_redis, "mock_task_id", "SUCCESS", "Success result")
+    response = client.get("/task-status/mock_task_id")
+    assert response.status_code == 200
+    assert response.json() == {"status": "success", "result": "Success result"}
+
+    failure = celery_app.backend.prepare_exception(ValueError("Task failed"))
+    store_state(status_redis, "mock_task_id", "FAILURE", failure)
+    response = client.get("/task-status/mock_task_id")
+    assert response.status_code == 200
+    assert response.json() == {"status": "failed", "error": "Task failed"}
+
+    store_state(status_redis, "mock_task_id", "REVOKED")
+    response = client.get("/task-status/mock_task_id")
+    assert response.status_code == 200
+    assert response.json() == {"status": "revoked", "message": "Task was revoked."}
+
+    store_state(status_redis, "mock_task_id", "PROGRESS", {"generation": 3, "best_fitness": 0.5})
+    response = client.get("/task-status/mock_task_id")
+    assert response.json() == {
+        "status": "progress",
+        "progress": {"generation": 3, "best_fitness": 0.5},
+    }
+
+    store_state(status_redis, "mock_task_id", "STARTED")
+    response = client.get("/task-status/mock_task_id")
+    assert response.status_code == 200
+    assert response.json() == {"status": "STARTED"}
+
+
+def test_task_statuses(status_redis):
+    """Test the batch task status endpoint, reading all states in a single round trip."""
+    store_state(status_redis, "task-0", "SUCCESS", {"fitness": 1})
+    store_state(status_redis, "task-1", "PROGRESS", {"generation": 3})
+    task_ids = ["task-0", "task-1", "task-2"]
+
+    with patch.object(fakeredis.FakeAsyncRedis, "get") as mock_get:
+        response = client.post("/task-status", json={"task_ids": task_ids})
+
+    mock_get.assert_not_called()
+    assert response.status_code == 200
+    assert response.json() == {
+        "statuses": {
+            "task-0": {"status": "success", "result": {"fitness": 1}},
+            "task-1": {"status": "progress", "progress": {"generation": 3}},
+            "task-2": {"status": "pending", "message": "Task is still waiting to be executed."},
+        }
+    }
+    assert client.post("/task-status", json={"task_ids": []}).status_code == 422
+
+
+@patch.object(celery_app, "connection_or_acquire")
+def test_metrics(mock_connection):
+    """Test the metrics endpoint."""
+    channel = mock_connection.return_value.__enter__.return_value.default_channel
+    channel.queue_declare.return_value.message_count = 7
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'timetable_queue_depth{queue="timetable-preview"} 7.0' in response.text
+    assert 'timetable_queue_depth{queue="timetable-large"} 7.0' in response.text
+    assert "timetable_task_duration_seconds_bucket" in response.text
+    assert "timetable_active_runs" in response.text
+
+
+@patch.object(celery_app, "connection_or_acquire", side_effect=OSError("Connection refused"))
+def test_metrics_broker_unavailable(_mock_connection):
+    """Test the metrics endpoint when the broker is unavailable."""
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "timetable_evaluations_total" in response.text
+
+
+@pytest.mark.usefixtures("backend")
+@patch.object(celery_app, "send_task")
+def test_reoptimize_timetable(mock_send_task):
+    """Test the re-optimization endpoint."""
+    mock_send_task.return_value.id = "mock_task_id"
+    previous = {"class-0": {"day": 1, "room": "room-0", "time": 3}}
+
+    response = client.post(
+        "/reoptimize", json={"previous": previous, "changes": {"teachers": ["teacher-0"]}}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "response": "ok",
+        "task_id": "mock_task_id",
+        "task_status": "PENDING",
+        "queue": "timetable-preview",
+    }
+    mock_send_task.assert_called_once_with(
+        REOPTIMIZATION_TASK,
+        kwargs={
+            "previous": previous,
+            "previous_run_id": None,
+            "changes": {
+                "teachers": ["teacher-0"],
+                "student_groups": [],
+                "classrooms": [],
+                "course_classes": [],
+            },
+            "profile": False,
+            "tenant": "default",
+        },
+        queue="timetable-preview",
+        priority=0,
+        soft_time_limit=60,
+        time_limit=90,
+    )
+
+
+@patch.object(celery_app, "send_task")
+def test_reoptimize_timetable_from_run(mock_send_task):
+    """Test the re-optimization endpoint with a stored previous run, routed by its size."""
+    mock_send_task.return_value.id = "mock_task_id"
+    # 200 classes x 50 classrooms, too large for the preview queue
+    zeros = [0] * 200
+    schedule = CompactSchedule(
+        [f"class-{i}" for i in range(200)],
+        [f"room-{r}" for r in range(50)],
+        zeros,
+        zeros,
+        zeros,
+        zeros,
+        1.0,
+    )
+    get_result_store().save("run-0", "fingerprint", schedule, 10)
+
+    response = client.post("/reoptimize", json={"previous_run_id": "run-0"})
+
+    assert response.status_code == 200
+    assert response.json()["queue"] == "timetable-standard"
+    kwargs = mock_send_task.call_args.kwargs["kwargs"]
+    assert kwargs["previous"] is None
+    assert kwargs["previous_run_id"] == "run-0"
+    assert mock_send_task.call_args.kwargs["time_limit"] == 960
+
+    response = client.post("/reoptimize", json={"previous_run_id": "missing"})
+
+    assert response.status_code == 404
+
+
+@patch.object(celery_app, "send_task")
+def test_reoptimize_timetable_inline(mock_send_task, problem):
+    """Test if the parameters and the inline problem of a re-optimization are sent."""
+    mock_send_task.return_value.id = "mock_task_id"
+
+    response = client.post(
+        "/reoptimize",
+        json={
+            "previous_run_id": "run-0",
+            "parameters": {"mutation_size": 3},
+            "problem": problem,
+        },
+    )
+
+    assert response.status_code == 200
+    kwargs = mock_send_task.call_args.kwargs["kwargs"]
+    assert kwargs["parameters"]["mutation_size"] == 3
+    assert [c["id"] for c in kwargs["problem"]["course_classes"]] == ["class-0", "class-1"]
+
+
+def test_reoptimize_timetable_invalid_request():
+    """Test the re-optimization endpoint with an invalid placement."""
+    response = client.post("/reoptimize", json={"previous": {"class-0": {"day": 1}}})
+
+    assert response.status_code == 422
+
+    response = client.post("/reoptimize", json={"changes": {}})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.usefixtures("backend")
+def test_get_result_negotiation():
+    """Test if timetables are served in the negotiated format and compression."""
+    run_id = timetable_generation.run()["run_id"]
+    placements = client.get(f"/results/{run_id}").json()["placements"]
+
+    response = client.get(
+        f"/results/{run_id}", headers={"Accept": "application/msgpack", "Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+    content = msgpack.unpackb(response.content)
+    assert content["run_id"] == run_id
+    assert {
+        class_id: {"day": day, "room": content["classrooms"][room], "time": time}
+        for class_id, day, room, time in zip(
+            content["classes"], content["day"], content["room"], content["time"]
+        )
+    } == placements
+
+    response = client.get(f"/results/{run_id}", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["placements"] == placements
+    assert client.get(f"/results/{run_id}", headers={"Accept": "text/html"}).status_code == 406
+
+
+def test_get_result_not_found():
+    """Test the result endpoints with an unknown run."""
+    assert client.get("/results/unknown").status_code == 404
+    assert client.get("/results/unknown/diff/other").status_code == 404
+
+
+@patch.object(celery_app.control, "revoke")
+@patch("timetable_ga.web.request_cancellation")
+def test_cancel_task(mock_request_cancellation, mock_revoke):
+    """Test the cancellation endpoint."""
+    response = client.delete("/tasks/mock_task_id")
+
+    assert response.status_code == 200
+    assert response.json() == {"response": "ok", "task_id": "mock_task_id"}
+    assert mock_request_cancellation.call_args.args[1] == "mock_task_id"
+    mock_revoke.assert_called_once_with("mock_task_id")
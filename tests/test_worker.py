@@ -0,0 +1,306 @@
+"""Unit tests for the Celery tasks of the workers."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+from prometheus_client import REGISTRY
+
+from timetable_ga.broker import GENERATION_TASK, REOPTIMIZATION_TASK, celery_app
+from timetable_ga.cancellation import CancellationFlag, request_cancellation
+from timetable_ga.decomposition import solve_decomposed
+from timetable_ga.ga_consts import DAY_HOURS, DAYS_NUM
+from timetable_ga.models import Configuration
+from timetable_ga.scheduling import TenantLimiter
+from timetable_ga.store import get_result_store
+from timetable_ga.worker import (
+    _generate,
+    _get_evolve,
+    _run_in_tenant_slot,
+    _wait_for_preload,
+    preload_worker,
+    timetable_generation,
+    timetable_reoptimization,
+)
+
+
+@pytest.mark.usefixtures("backend")
+def test_timetable_generation_profile():
+    """Test if the task returns the profile of the run."""
+
+    result = timetable_generation.run(profile=True)
+
+    assert result["fitness"] == 1
+    assert result["generations"] >= 0
+    assert result["profile"]["operators"]["make_new_from_prototype"]["calls"] == 100
+    assert "profile" not in timetable_generation.run()
+
+
+@pytest.mark.usefixtures("backend")
+def test_timetable_generation_metrics():
+    """Test if the task records worker metrics."""
+    runs = REGISTRY.get_sample_value("timetable_task_duration_seconds_count") or 0
+    evaluations = REGISTRY.get_sample_value("timetable_evaluations_total") or 0
+
+    timetable_generation.run()
+
+    assert REGISTRY.get_sample_value("timetable_task_duration_seconds_count") == runs + 1
+    assert REGISTRY.get_sample_value("timetable_data_loading_seconds_count") >= 1
+    assert REGISTRY.get_sample_value("timetable_evaluations_total") >= evaluations + 100
+    assert REGISTRY.get_sample_value("timetable_active_runs") == 0
+
+
+@pytest.mark.usefixtures("backend")
+def test_timetable_reoptimization():
+    """Test if the re-optimization task keeps a feasible previous timetable."""
+    run_id = timetable_generation.run()["run_id"]
+    schedule = get_result_store().get(run_id)["schedule"]
+    previous = {
+        backend_id: placement.model_dump()
+        for backend_id, placement in schedule.get_placements().items()
+    }
+
+    result = timetable_reoptimization.run(previous=previous, changes={})
+
+    assert result["fitness"] == 1
+    assert result["generations"] == 0
+    assert not schedule.diff(get_result_store().get(result["run_id"])["schedule"])
+
+    result = timetable_reoptimization.run(previous_run_id=run_id)
+
+    assert not schedule.diff(get_result_store().get(result["run_id"])["schedule"])
+
+
+def test_timetable_reoptimization_inline(problem):
+    """Test if a run of an inline problem is re-optimized with its problem and parameters."""
+    parameters = {"number_of_chromosomes": 20, "max_generations": 50}
+    _generate("run-0", False, _get_evolve(parameters), parameters, problem)
+
+    with patch("timetable_ga.worker.load_configuration") as load:
+        result = timetable_reoptimization.run(previous_run_id="run-0")
+
+    load.assert_not_called()
+    stored = get_result_store().get(result["run_id"])
+    assert stored["problem"] == get_result_store().get("run-0")["problem"]
+    assert stored["parameters"]["number_of_chromosomes"] == 20
+    assert stored["schedule"].class_ids == ["class-0", "class-1"]
+
+
+@pytest.mark.usefixtures("backend")
+def test_timetable_generation_stores_result():
+    """Test if the task stores the timetable instead of returning it."""
+    result = timetable_generation.run()
+
+    assert set(result) == {"run_id", "fitness", "generations", "status"}
+    assert result["status"] == "finished"
+    stored = get_result_store().get(result["run_id"])
+    assert stored["schedule"].fitness == result["fitness"]
+    assert stored["generations"] == result["generations"]
+    assert len(stored["schedule"].get_placements()) == 10
+
+
+@pytest.mark.usefixtures("backend")
+def test_generate_soft_time_limit():
+    """Test if the best schedule so far is stored when the soft time limit is exceeded."""
+
+    def evolve(instance, _stop):
+        instance.start(max_generations=2)
+        raise SoftTimeLimitExceeded()
+
+    result = _generate(None, False, evolve)
+
+    assert result["generations"] <= 2
+    assert get_result_store().get(result["run_id"])["schedule"].fitness == result["fitness"]
+
+    def evolve_interrupted(_instance, _stop):
+        raise SoftTimeLimitExceeded()
+
+    with pytest.raises(SoftTimeLimitExceeded):
+        _generate(None, False, evolve_interrupted)
+
+
+def test_run_in_tenant_slot():
+    """Test if tasks of a tenant without a free slot are retried later."""
+    limiter = TenantLimiter(fakeredis.FakeRedis(), 1)
+    task = MagicMock()
+    task.request.id = "task-0"
+    task.request.timelimit = (90, 60)
+    task.retry.side_effect = Retry()
+
+    with patch("timetable_ga.worker._get_tenant_limiter", return_value=limiter):
+        assert _run_in_tenant_slot(task, "tenant-0", lambda: "result") == "result"
+
+        limiter.acquire("tenant-0", "task-1", 90)
+        with pytest.raises(Retry):
+            _run_in_tenant_slot(task, "tenant-0", lambda: "result")
+
+        assert _run_in_tenant_slot(task, None, lambda: "result") == "result"
+
+
+def test_generate_cancelled(problem):
+    """Test if a cancelled run stops and stores its best schedule as cancelled."""
+    redis = fakeredis.FakeRedis()
+    request_cancellation(redis, "task-0")
+    cancellation = CancellationFlag(redis, "task-0")
+    # More full-day classes than days, so no schedule satisfies all criteria
+    problem["course_classes"] = [
+        {"id": f"class-{i}", "teacher": "teacher-0", "course": "course-0", "duration": DAY_HOURS}
+        for i in range(DAYS_NUM + 1)
+    ]
+
+    result = _generate(
+        "task-0",
+        False,
+        lambda instance, stop: instance.start(**stop),
+        problem=problem,
+        cancellation=cancellation,
+    )
+
+    assert result["status"] == "cancelled"
+    assert result["generations"] == 0
+    assert get_result_store().get("task-0")["status"] == "cancelled"
+
+
+def test_generate_soft_constraints(problem):
+    """Test if a run with soft constraints reports the penalty of its best schedule."""
+    problem["teachers"][0]["preferred_hours"] = [0]
+    parameters = {"max_generations": 20, "soft_constraints": {"unpreferred_hours": 1}}
+
+    result = _generate(
+        "task-0",
+        False,
+        lambda instance, stop: instance.start(**stop),
+        parameters=parameters,
+        problem=problem,
+    )
+
+    # The three hours class has at least two hours outside the preferred hour
+    assert result["penalty"] >= 2
+    assert result["fitness"] < 1
+
+
+def test_generate_decomposed(problem):
+    """Test if a decomposed run places the classes of independent teachers and groups."""
+    problem["classrooms"].append({"id": "room-1", "name": "Room 1", "number_of_seats": 30})
+    problem["teachers"].append({"id": "teacher-1", "name": "Teacher 1"})
+    problem["student_groups"].append({"id": "group-1", "name": "Group 1", "number_of_students": 20})
+    problem["course_classes"].append(
+        {"id": "class-2", "teacher": "teacher-1", "course": "course-0", "groups": ["group-1"]}
+    )
+    parameters = {"number_of_chromosomes": 20, "max_generations": 100, "decompose": True}
+
+    with patch("timetable_ga.worker.solve_decomposed", wraps=solve_decomposed) as mock_solve:
+        result = _generate("task-0", False, _get_evolve(parameters), parameters, problem)
+
+    assert mock_solve.call_args.kwargs["processes"] == 1
+
+    assert result["fitness"] == 1
+    assert set(get_result_store().get("task-0")["schedule"].class_ids) == {
+        "class-0",
+        "class-1",
+        "class-2",
+    }
+
+
+def test_generate_threads(problem):
+    """Test if runs of different problems in parallel threads store their own schedules."""
+
+    def generate(number_of_classes):
+        classes = [
+            {"id": f"class-{i}", "teacher": "teacher-0", "course": "course-0"}
+            for i in range(number_of_classes)
+        ]
+        return _generate(
+            f"task-{number_of_classes}",
+            False,
+            lambda instance, stop: instance.start(**stop),
+            parameters={"max_generations": 10},
+            problem={**problem, "course_classes": classes},
+        )
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(generate, [1, 2, 3, 4]))
+
+    for number_of_classes, result in zip([1, 2, 3, 4], results):
+        stored = get_result_store().get(result["run_id"])
+        assert len(stored["schedule"].class_ids) == number_of_classes
+        assert stored["schedule"].fitness == result["fitness"]
+
+
+def test_generate_resumes_from_checkpoint(problem, tmp_path, monkeypatch):
+    """Test if a run resumes from its checkpoint, which is removed once the result is stored."""
+    monkeypatch.setenv("CHECKPOINT_INTERVAL", "0")
+    problem["course_classes"] = [
+        {"id": f"class-{i}", "teacher": "teacher-0", "course": "course-0", "duration": DAY_HOURS}
+        for i in range(DAYS_NUM + 1)
+    ]
+    parameters = {"max_generations": 3}
+    generations = []
+
+    def evolve_lost(instance, stop):
+        instance.start(**stop)
+        generations.append(instance.current_generation)
+        raise RuntimeError("Worker lost")
+
+    def resume(instance, stop):
+        stop["max_generations"] = 6
+        return instance.start(**stop)
+
+    with pytest.raises(RuntimeError):
+        _generate("task-0", False, evolve_lost, parameters, problem)
+    assert (tmp_path / "checkpoints" / "task-0.npz").exists()
+
+    result = _generate("task-0", True, resume, parameters, problem)
+
+    assert generations == [3]
+    assert result["generations"] == 6
+    assert result["profile"]["checkpoints"]["saves"] > 0
+    assert not (tmp_path / "checkpoints" / "task-0.npz").exists()
+
+
+def test_task_names():
+    """Test if the tasks are registered under the names the web service sends them by."""
+    assert timetable_generation.name == GENERATION_TASK
+    assert timetable_reoptimization.name == REOPTIMIZATION_TASK
+    assert {GENERATION_TASK, REOPTIMIZATION_TASK} <= set(celery_app.tasks)
+
+
+def test_preload_worker_background(monkeypatch):
+    """Test if the worker process is ready before the end of its preparation."""
+    monkeypatch.setenv("PRELOAD_STATIC_DATA", "0")
+    compiling = threading.Event()
+    with patch("timetable_ga.worker._compile_kernel", side_effect=compiling.wait) as mock_compile:
+        preload_worker()
+
+        assert not compiling.is_set()
+        compiling.set()
+        _wait_for_preload()
+
+    mock_compile.assert_called_once_with()
+
+
+def test_preload_worker(backend, monkeypatch):
+    """Test if the tasks of a worker process use the classrooms and time grid it preloaded."""
+    with (
+        patch("timetable_ga.worker._preloaded", {}) as preloaded,
+        patch("timetable_ga.worker.get_classrooms", return_value=backend.classrooms),
+    ):
+        preload_worker()
+        _wait_for_preload()
+
+        assert preloaded["classrooms"] is backend.classrooms
+        with patch("timetable_ga.api.get_classrooms") as mock_get_classrooms:
+            result = timetable_generation.run()
+
+        mock_get_classrooms.assert_not_called()
+        assert result["fitness"] == 1
+        assert Configuration.instance.classrooms is backend.classrooms
+
+        monkeypatch.setenv("PRELOAD_STATIC_DATA", "0")
+        preload_worker()
+        _wait_for_preload()
+
+        assert not preloaded
@@ -0,0 +1,114 @@
+"""Adaptive control of the mutation of a run from its progress."""
+
+import numpy as np
+
+
+class AdaptiveMutation:
+    """
+    Raises the mutation of a stagnating run and lowers it while the run improves.
+
+    Every ``window`` generations the mutation probability of the prototype of the algorithm is
+    multiplied by ``factor`` when the best fitness did not improve over the window or the
+    population lost its diversity (the standard deviation of its fitness fell under
+    ``min_spread``, or its diversity tracker reports convergence), and divided by it otherwise,
+    within ``[min_probability, max_probability]``. Past the maximum probability the mutation
+    size grows by one class at a time up to ``max_size``, and shrinks back first when the run
+    improves again.
+    """
+
+    def __init__(
+        self,
+        min_probability=1.0,
+        max_probability=50.0,
+        max_size=8,
+        window=20,
+        factor=1.5,
+        min_spread=0.005,
+    ):
+        """Initialize the controller with the bounds of the mutation probability and size."""
+        self.min_probability = min_probability
+        self.max_probability = max_probability
+        self.max_size = max_size
+        self.window = window
+        self.factor = factor
+        self.min_spread = min_spread
+        self.min_size = None
+        self.stagnant_generations = 0
+        self.fitness_spread = None
+        self._best_fitness = None
+
+    def end_generation(self, algorithm):
+        """Tracks the best fitness and adapts the mutation at the end of each window."""
+        prototype = algorithm.prototype
+        if self.min_size is None:
+            self.min_size = min(prototype.mutation_size, self.max_size)
+
+        best_fitness = algorithm.get_chromosome_fitness(algorithm.best_chromosomes[0])
+        if self._best_fitness is None or best_fitness > self._best_fitness:
+            self._best_fitness = best_fitness
+            self.stagnant_generations = 0
+        else:
+            self.stagnant_generations += 1
+
+        if algorithm.current_generation % self.window != 0:
+            return
+
+        self.fitness_spread = float(
+            np.std([algorithm.get_chromosome_fitness(i) for i in range(len(algorithm.chromosomes))])
+        )
+        converged = algorithm.diversity is not None and algorithm.diversity.is_converged()
+        if (
+            self.stagnant_generations >= self.window
+            or self.fitness_spread < self.min_spread
+            or converged
+        ):
+            self._raise(prototype)
+        else:
+            self._lower(prototype)
+
+    def _raise(self, prototype):
+        """Mutates more: a higher probability first, then more classes."""
+        if prototype.mutation_probability < self.max_probability:
+            prototype.mutation_probability = min(
+                prototype.mutation_probability * self.factor, self.max_probability
+            )
+        elif prototype.mutation_size < self.max_size:
+            prototype.mutation_size += 1
+
+    def _lower(self, prototype):
+        """Mutates less: fewer classes first, then a lower probability."""
+        if prototype.mutation_size > self.min_size:
+            prototype.mutation_size -= 1
+        else:
+            prototype.mutation_probability = max(
+                prototype.mutation_probability / self.factor, self.min_probability
+            )
+
+    def get_state(self, prototype) -> dict:
+        """Returns the state of the controller and the mutation of the prototype, to resume."""
+        return {
+            "mutation_probability": prototype.mutation_probability,
+            "mutation_size": prototype.mutation_size,
+            "min_size": self.min_size,
+            "stagnant_generations": self.stagnant_generations,
+            "fitness_spread": self.fitness_spread,
+            "best_fitness": None if self._best_fitness is None else float(self._best_fitness),
+        }
+
+    def set_state(self, prototype, state: dict):
+        """Restores the state of the controller and the mutation of the prototype."""
+        prototype.mutation_probability = state["mutation_probability"]
+        prototype.mutation_size = state["mutation_size"]
+        self.min_size = state["min_size"]
+        self.stagnant_generations = state["stagnant_generations"]
+        self.fitness_spread = state["fitness_spread"]
+        self._best_fitness = state["best_fitness"]
+
+    def to_dict(self, prototype):
+        """Returns the state of the controller and the mutation of the prototype."""
+        return {
+            "mutation_probability": prototype.mutation_probability,
+            "mutation_size": prototype.mutation_size,
+            "stagnant_generations": self.stagnant_generations,
+            "fitness_spread": self.fitness_spread,
+        }
@@ -2,12 +2,23 @@
 
 import json
 import os
-from typing import List
+from typing import List, Optional
 
 import requests
 from pydantic import ValidationError
 
-from timetable_ga.models import Classroom, Course, CourseClass, StudentsGroup, Teacher
+from timetable_ga.ga_consts import DAY_HOURS, DAYS_NUM
+from timetable_ga.models import (
+    Classroom,
+    Configuration,
+    Course,
+    CourseClass,
+    StudentsGroup,
+    Teacher,
+    TimeGrid,
+    start_entity_registry,
+)
+from timetable_ga.monitoring import DATA_LOADING_TIME
 
 
 def get_classrooms() -> List[Classroom]:
@@ -47,7 +58,14 @@ def get_teachers() -> List[Teacher]:
             if "name" not in item:
                 raise ValueError(f"Missing 'name' for teacher with id {item['id']}")
 
-            teachers.append(Teacher(backend_id=item["id"], name=item["name"]))
+            teachers.append(
+                Teacher(
+                    backend_id=item["id"],
+                    name=item["name"],
+                    lunch_break_needed=item.get("lunch_break_needed", False),
+                    preferred_hours=item.get("preferred_hours", []),
+                )
+            )
 
         return teachers
 
@@ -211,3 +229,51 @@ def get_course_classes(
     except requests.exceptions.RequestException as e:
         print(f"Request error occurred: {e}")
         return []
+
+
+def get_time_grid() -> TimeGrid:
+    """
+    Returns the week of the problems loaded from the backend.
+
+    ``TIME_GRID_DAYS`` and ``TIME_GRID_DAY_HOURS`` default to 5 days of 12 hours,
+    ``TIME_GRID_BLOCKED_PERIODS`` lists the blocked ``day:hour`` periods separated by commas.
+    """
+    blocked = os.getenv("TIME_GRID_BLOCKED_PERIODS", "")
+    return TimeGrid(
+        days=int(os.getenv("TIME_GRID_DAYS", str(DAYS_NUM))),
+        day_hours=int(os.getenv("TIME_GRID_DAY_HOURS", str(DAY_HOURS))),
+        blocked_periods=[period.split(":") for period in blocked.split(",") if period],
+    )
+
+
+def load_configuration(
+    classrooms: Optional[List[Classroom]] = None, time_grid: Optional[TimeGrid] = None
+) -> Configuration:
+    """
+    Loads the problem from the backend.
+
+    The entities of the problem are created in a new entity registry. ``classrooms`` and
+    ``time_grid`` are used instead of fetching them if given, e.g. when preloaded by the worker
+    process; the classrooms are registered again, with the IDs they already have.
+    """
+    registry = start_entity_registry()
+
+    with DATA_LOADING_TIME.time():
+        if classrooms is None:
+            classrooms = get_classrooms()
+        else:
+            for classroom in classrooms:
+                registry.add(classroom)
+        teachers = get_teachers()
+        courses = get_courses()
+        student_groups = get_students_groups(from_dummy=True)
+        course_classes = get_course_classes(courses, teachers, student_groups, from_dummy=True)
+
+    return Configuration(
+        classrooms=classrooms,
+        teachers=teachers,
+        courses=courses,
+        student_groups=student_groups,
+        course_classes=course_classes,
+        time_grid=time_grid if time_grid is not None else get_time_grid(),
+    )
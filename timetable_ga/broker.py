@@ -0,0 +1,35 @@
+"""
+The Celery application shared by the web service and the workers.
+
+The web service only sends tasks by name, so that it never imports the modules of the workers;
+the workers import ``timetable_ga.worker``, which defines the tasks, when they start.
+"""
+
+from celery import Celery
+from dotenv import load_dotenv
+
+from timetable_ga.scheduling import DEFAULT_ROUTE
+
+load_dotenv()
+
+# Redis instance of the broker and the result backend
+REDIS_URL = "redis://localhost:6379/0"
+
+# Names of the tasks, those they had when defined in ``timetable_ga.main``, so that tasks
+# queued before an upgrade still find their worker
+GENERATION_TASK = "timetable_ga.main.timetable_generation"
+REOPTIMIZATION_TASK = "timetable_ga.main.timetable_reoptimization"
+
+celery_app = Celery(
+    "timetable-ga", broker=REDIS_URL, backend=REDIS_URL, include=["timetable_ga.worker"]
+)
+celery_app.conf.update(
+    task_default_queue=DEFAULT_ROUTE.queue,
+    worker_prefetch_multiplier=1,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+        # Unacknowledged tasks are redelivered after the hard time limit of the largest tasks
+        "visibility_timeout": 8 * 3600,
+    },
+)
@@ -0,0 +1,45 @@
+"""Cooperative cancellation of running timetable tasks."""
+
+import os
+
+# Prefix of the Redis keys flagging the tasks to cancel
+CANCEL_PREFIX = "timetable-ga:cancel:"
+
+# Seconds a cancellation flag is kept, longer than the hard time limit of any task
+CANCEL_FLAG_TTL = 8 * 3600
+
+
+def request_cancellation(client, task_id: str):
+    """Flags the task for cancellation."""
+    client.set(CANCEL_PREFIX + task_id, 1, ex=CANCEL_FLAG_TTL)
+
+
+class CancellationFlag:
+    """
+    Callable telling whether the cancellation of a task was requested, to be passed as the
+    ``should_stop`` criterion of ``Algorithm.start``.
+    """
+
+    def __init__(self, client, task_id: str):
+        """Initialize the flag of the task."""
+        self.client = client
+        self.task_id = task_id
+        self.cancelled = False
+
+    def __call__(self) -> bool:
+        """Returns whether the cancellation was requested, reading the flag once set."""
+        if not self.cancelled:
+            self.cancelled = bool(self.client.exists(CANCEL_PREFIX + self.task_id))
+        return self.cancelled
+
+
+def get_stop_check_interval() -> int:
+    """
+    Returns ``CANCELLATION_CHECK_INTERVAL``, the generations between checks, 10 by default.
+
+    Raises ``ValueError`` if it is less than 1.
+    """
+    interval = int(os.getenv("CANCELLATION_CHECK_INTERVAL", "10"))
+    if interval < 1:
+        raise ValueError(f"CANCELLATION_CHECK_INTERVAL must be at least 1, not {interval}")
+    return interval
@@ -0,0 +1,184 @@
+"""Checkpoints of long-running evolutions, to resume them after a worker restart."""
+
+import json
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+# Format version of the checkpoint files, version 1 without the states of the observers
+CHECKPOINT_VERSION = 2
+
+
+class Checkpoint:
+    """
+    State of an evolution at the end of a generation.
+
+    ``genomes[i]`` and ``fitness[i]`` are the genome and fitness of the i-th chromosome,
+    ``best_chromosomes`` the indices of the best chromosomes, best first, and ``rng_state`` the
+    state of the random generator of the run driving selection, crossover and mutation.
+    ``adaptation`` and ``diversity`` hold the states of the mutation control and the diversity
+    tracker of the algorithm, if any.
+    """
+
+    def __init__(
+        self,
+        genomes,
+        fitness,
+        best_chromosomes,
+        generation,
+        rng_state,
+        fingerprint="",
+        adaptation=None,
+        diversity=None,
+    ):
+        """Initialize the checkpoint from the state of an evolution."""
+        self.genomes = genomes
+        self.fitness = fitness
+        self.best_chromosomes = best_chromosomes
+        self.generation = generation
+        self.rng_state = rng_state
+        self.fingerprint = fingerprint
+        self.adaptation = adaptation
+        self.diversity = diversity
+
+    @classmethod
+    def capture(cls, algorithm, fingerprint=""):
+        """Returns the checkpoint of the current generation of an algorithm."""
+        genomes, fitness = algorithm.get_population()
+        return cls(
+            genomes=genomes,
+            fitness=fitness,
+            best_chromosomes=list(algorithm.best_chromosomes[: algorithm.current_best_size]),
+            generation=algorithm.current_generation,
+            rng_state=algorithm.random.getstate(),
+            fingerprint=fingerprint,
+            adaptation=(
+                None
+                if algorithm.adaptation is None
+                else algorithm.adaptation.get_state(algorithm.prototype)
+            ),
+            diversity=None if algorithm.diversity is None else algorithm.diversity.get_state(),
+        )
+
+    def save(self, path: str):
+        """
+        Writes the checkpoint to ``path`` atomically, compressed.
+
+        Genomes are stored in the smallest unsigned integer type holding their slot positions;
+        the genomes of a converging population are mostly alike and compress well.
+        """
+        genomes = np.asarray(self.genomes)
+        version, internal_state, gauss_next = self.rng_state
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                version=CHECKPOINT_VERSION,
+                genomes=genomes.astype(np.min_scalar_type(int(genomes.max(initial=0)))),
+                fitness=np.asarray(self.fitness, dtype=np.float64),
+                best_chromosomes=np.asarray(self.best_chromosomes, dtype=np.int32),
+                generation=self.generation,
+                rng_version=version,
+                rng_internal_state=np.asarray(internal_state, dtype=np.uint32),
+                rng_gauss_next=np.nan if gauss_next is None else gauss_next,
+                fingerprint=self.fingerprint,
+                adaptation=json.dumps(self.adaptation),
+                diversity=json.dumps(self.diversity),
+            )
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Returns the checkpoint written to ``path``."""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version not in (1, CHECKPOINT_VERSION):
+                raise ValueError(f"Unsupported checkpoint version: {version}")
+
+            gauss_next = float(data["rng_gauss_next"])
+            return cls(
+                genomes=data["genomes"].astype(np.int32),
+                fitness=data["fitness"],
+                best_chromosomes=[int(i) for i in data["best_chromosomes"]],
+                generation=int(data["generation"]),
+                rng_state=(
+                    int(data["rng_version"]),
+                    tuple(int(x) for x in data["rng_internal_state"]),
+                    None if np.isnan(gauss_next) else gauss_next,
+                ),
+                fingerprint=str(data["fingerprint"]),
+                adaptation=json.loads(str(data["adaptation"])) if version > 1 else None,
+                diversity=json.loads(str(data["diversity"])) if version > 1 else None,
+            )
+
+
+class Checkpointer:
+    """
+    Saves checkpoints of an evolution to a file.
+
+    A checkpoint is saved at the end of a generation once ``interval`` seconds passed since the
+    previous one, and not before its cost is at most ``max_overhead`` of the time spent
+    evolving, so slow saves of large populations are spaced out further.
+    """
+
+    def __init__(self, path: str, fingerprint="", interval=60.0, max_overhead=0.02):
+        """Initialize the checkpointer of the evolution of the problem ``fingerprint``."""
+        self.path = path
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.saves = 0
+        self.save_time = 0.0
+        self._start = time.perf_counter()
+        self._last_save = self._start
+        self._last_save_time = 0.0
+
+    def load(self) -> Optional[Checkpoint]:
+        """Returns the saved checkpoint of the problem, or ``None``."""
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            checkpoint = Checkpoint.load(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load checkpoint {self.path}: {e}")
+            return None
+
+        if checkpoint.fingerprint != self.fingerprint:
+            print(f"Checkpoint {self.path} is of another problem, ignoring it")
+            return None
+        return checkpoint
+
+    def end_generation(self, algorithm):
+        """Saves a checkpoint of the algorithm if one is due."""
+        now = time.perf_counter()
+        elapsed = now - self._last_save
+        if elapsed < self.interval or elapsed * self.max_overhead < self._last_save_time:
+            return
+
+        Checkpoint.capture(algorithm, self.fingerprint).save(self.path)
+        self._last_save = time.perf_counter()
+        self._last_save_time = self._last_save - now
+        self.save_time += self._last_save_time
+        self.saves += 1
+
+    def get_overhead(self) -> float:
+        """Returns the share of the runtime spent saving checkpoints."""
+        return self.save_time / max(time.perf_counter() - self._start, 1e-9)
+
+    def remove(self):
+        """Removes the saved checkpoint."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def get_checkpoint_dir() -> Optional[str]:
+    """Returns ``CHECKPOINT_DIR``, ``checkpoints`` by default; empty disables checkpoints."""
+    return os.getenv("CHECKPOINT_DIR", "checkpoints") or None
+
+
+def get_checkpoint_interval() -> float:
+    """Returns ``CHECKPOINT_INTERVAL``, the seconds between checkpoints, 60 by default."""
+    return float(os.getenv("CHECKPOINT_INTERVAL", "60"))
@@ -0,0 +1,87 @@
+"""Coalescing of identical timetable generation requests."""
+
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from timetable_ga.cancellation import CANCEL_PREFIX
+from timetable_ga.monitoring import CACHE_HITS
+from timetable_ga.scheduling import QUEUE_ROUTES
+from timetable_ga.store import FINISHED, ResultStore
+
+# Prefix of the Redis keys holding the task IDs of in-flight runs
+IN_FLIGHT_PREFIX = "timetable-ga:in-flight:"
+
+# Seconds before the claim of an in-flight run expires: the hard time limit of the longest
+# tasks, so that no identical run starts while the claimed one may still be running
+IN_FLIGHT_TTL = max(route.time_limit for route in QUEUE_ROUTES)
+
+
+def _decode(value):
+    """Returns a Redis value as a string."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def get_coalescing_key(fingerprint: str, parameters: dict) -> str:
+    """Returns the key of the runs of a problem with the given parameters."""
+    canonical = json.dumps([fingerprint, parameters], separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class RequestCoalescer:
+    """
+    Joins requests to runs of the same problem with the same parameters.
+
+    A run finished, not cancelled, less than ``ttl`` seconds ago is reused from the result
+    store. Otherwise the first request claims the run in Redis (``SET NX`` expiring after
+    ``in_flight_ttl`` seconds), and identical requests get its task ID until the run is
+    released or cancelled.
+    """
+
+    def __init__(self, client, store: ResultStore, ttl: int, in_flight_ttl: int = IN_FLIGHT_TTL):
+        """Initialize the coalescer with a Redis client and the result store."""
+        self.client = client
+        self.store = store
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+
+    def find_completed(self, fingerprint: str, parameters: dict) -> Optional[str]:
+        """Returns the ID of the latest run finished within the TTL, or ``None``."""
+        run_ids = self.store.find(
+            fingerprint, parameters, since=time.time() - self.ttl, status=FINISHED
+        )
+        if not run_ids:
+            return None
+        CACHE_HITS.labels(cache="result").inc()
+        return run_ids[0]
+
+    def claim(self, key: str, task_id: str) -> Optional[str]:
+        """
+        Claims the run of ``key`` for the task ``task_id``.
+
+        Returns ``None`` if claimed, or the ID of the task that already runs it.
+        """
+        if self.client.set(IN_FLIGHT_PREFIX + key, task_id, nx=True, ex=self.in_flight_ttl):
+            return None
+
+        existing = _decode(self.client.get(IN_FLIGHT_PREFIX + key))
+        if existing is None:
+            # The run was released in the meantime
+            return self.claim(key, task_id)
+        if self.client.exists(CANCEL_PREFIX + existing):
+            self.client.delete(IN_FLIGHT_PREFIX + key)
+            return self.claim(key, task_id)
+        CACHE_HITS.labels(cache="in_flight").inc()
+        return existing
+
+    def release(self, key: str, task_id: str):
+        """Releases the run of ``key`` if it is still claimed by the task ``task_id``."""
+        if _decode(self.client.get(IN_FLIGHT_PREFIX + key)) == task_id:
+            self.client.delete(IN_FLIGHT_PREFIX + key)
+
+
+def get_coalescing_ttl() -> int:
+    """Returns ``RESULT_CACHE_TTL`` in seconds, 3600 by default; 0 disables coalescing."""
+    return int(os.getenv("RESULT_CACHE_TTL", "3600"))
@@ -0,0 +1,156 @@
+"""Soft constraints on the days of the teachers and student groups, scored as penalties."""
+
+from typing import Annotated, List
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+
+class SoftConstraintWeights(BaseModel):
+    """
+    Model representing the weights of the soft constraints of a run.
+
+    Per teacher or student group and per day, the penalty sums:
+
+    - ``lunch_break`` if a teacher needing a lunch break teaches at all ``lunch_hours`` (the
+      hours past the end of the day ignored);
+    - ``idle_hours`` per free hour between the first and the last class of the day;
+    - ``overload_hours`` per hour of classes beyond ``max_hours_per_day``;
+    - ``unpreferred_hours`` per hour of classes outside the preferred hours of a teacher.
+    """
+
+    lunch_break: float = Field(1.0, ge=0)
+    idle_hours: float = Field(1.0, ge=0)
+    overload_hours: float = Field(1.0, ge=0)
+    unpreferred_hours: float = Field(0.5, ge=0)
+    lunch_hours: List[Annotated[int, Field(ge=0)]] = Field([4, 5], min_length=1)
+    max_hours_per_day: int = Field(8, ge=1)
+
+
+class SoftConstraints:
+    """
+    Penalties of the soft constraints of the schedules of a configuration.
+
+    Penalties are kept per (teacher or group, day) in a (teachers + groups) x days matrix, the
+    teachers first. A schedule derived from another one only needs the penalties of the pairs
+    of the classes placed differently recalculated, see ``update``.
+    """
+
+    # Share of the classes placed differently above which all penalties are recalculated
+    INCREMENTAL_LIMIT = 0.25
+
+    def __init__(self, configuration, weights: SoftConstraintWeights):
+        """Initialize the penalties of the teachers and groups of the configuration."""
+        self.weights = weights
+        self.day_hours = configuration.time_grid.day_hours
+        self.day_size = configuration.get_day_size()
+        self.lunch_hours = [hour for hour in weights.lunch_hours if hour < self.day_hours]
+        course_classes = configuration.get_course_classes()
+
+        # Dense indices of the teachers, then of the groups
+        indices = {("teacher", teacher.id): i for i, teacher in enumerate(configuration.teachers)}
+        teachers = list(configuration.teachers)
+        for c in course_classes:
+            teacher = c.get_teacher()
+            if ("teacher", teacher.id) not in indices:
+                indices[("teacher", teacher.id)] = len(indices)
+                teachers.append(teacher)
+        for group in configuration.student_groups:
+            indices.setdefault(("group", group.id), len(indices))
+
+        self.durations = [c.get_duration() for c in course_classes]
+        self.class_entities = []
+        for c in course_classes:
+            groups = {indices.setdefault(("group", g.id), len(indices)) for g in c.get_groups()}
+            self.class_entities.append([indices[("teacher", c.get_teacher().id)], *sorted(groups)])
+        self.shape = (len(indices), configuration.time_grid.days)
+
+        self.entity_classes = [[] for _ in range(len(indices))]
+        self.lunch_needed = np.zeros(len(indices), dtype=np.bool_)
+        self.preferred = np.ones((len(indices), self.day_hours), dtype=np.bool_)
+        for i, entities in enumerate(self.class_entities):
+            for entity in entities:
+                self.entity_classes[entity].append(i)
+        for i, teacher in enumerate(teachers):
+            self.lunch_needed[i] = teacher.lunch_break_needed and bool(self.lunch_hours)
+            if teacher.preferred_hours:
+                self.preferred[i] = False
+                self.preferred[i, [h for h in teacher.preferred_hours if h < self.day_hours]] = True
+
+        # One row per hour of each class and each of its teacher and groups
+        rows = [
+            (i, entity, k)
+            for i, entities in enumerate(self.class_entities)
+            for entity in entities
+            for k in range(self.durations[i])
+        ]
+        self.hour_classes, self.hour_entities, self.hour_offsets = (
+            np.array(rows, dtype=np.int64).reshape(-1, 3).T
+        )
+
+    def evaluate(self, genome):
+        """Returns the penalties of all (teacher or group, day) pairs of a genome."""
+        genome = np.asarray(genome, dtype=np.int64)
+        positions = genome[self.hour_classes]
+        occupied = np.zeros((*self.shape, self.day_hours), dtype=np.bool_)
+        occupied[
+            self.hour_entities,
+            positions // self.day_size,
+            positions % self.day_hours + self.hour_offsets,
+        ] = True
+        entities = np.broadcast_to(np.arange(self.shape[0])[:, None], self.shape)
+        return self._get_penalties(occupied, entities)
+
+    def update(self, penalties, previous_genome, genome):
+        """
+        Returns the penalties of ``genome`` from the ``penalties`` of the ``previous_genome``.
+
+        Only the pairs of the teachers and groups of the classes placed differently, on their
+        previous and their new day, are recalculated. Without previous penalties, or when too
+        many classes moved, all of them are.
+        """
+        if penalties is None:
+            return self.evaluate(genome)
+
+        changed = np.flatnonzero(np.asarray(genome) != np.asarray(previous_genome))
+        if len(changed) > self.INCREMENTAL_LIMIT * len(self.durations):
+            return self.evaluate(genome)
+        if len(changed) == 0:
+            return penalties
+
+        pairs = set()
+        for i in changed:
+            for day in (previous_genome[i] // self.day_size, genome[i] // self.day_size):
+                for entity in self.class_entities[i]:
+                    pairs.add((entity, int(day)))
+
+        entities = np.array([entity for entity, _ in pairs])
+        days = np.array([day for _, day in pairs])
+        occupied = np.zeros((len(pairs), self.day_hours), dtype=np.bool_)
+        for row, (entity, day) in enumerate(pairs):
+            for i in self.entity_classes[entity]:
+                position = genome[i]
+                if position // self.day_size == day:
+                    hour = position % self.day_hours
+                    occupied[row, hour : hour + self.durations[i]] = True
+
+        penalties = penalties.copy()
+        penalties[entities, days] = self._get_penalties(occupied, entities)
+        return penalties
+
+    def _get_penalties(self, occupied, entities):
+        """Returns the penalties of days given the hours occupied by their classes."""
+        weights = self.weights
+        hours = occupied.sum(-1)
+        first = occupied.argmax(-1)
+        last = self.day_hours - 1 - occupied[..., ::-1].argmax(-1)
+        idle = np.where(hours > 0, last - first + 1 - hours, 0)
+        lunch = self.lunch_needed[entities] & occupied[..., self.lunch_hours].all(-1)
+        overload = np.maximum(hours - weights.max_hours_per_day, 0)
+        unpreferred = (occupied & ~self.preferred[entities]).sum(-1)
+        return (
+            weights.lunch_break * lunch
+            + weights.idle_hours * idle
+            + weights.overload_hours * overload
+            + weights.unpreferred_hours * unpreferred
+        )
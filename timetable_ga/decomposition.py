@@ -0,0 +1,317 @@
+"""Decomposition of large problems into independent subproblems solved separately."""
+
+import multiprocessing
+import time
+from typing import List
+
+from timetable_ga.ga_consts import RAND16_MAX
+from timetable_ga.models import Configuration
+from timetable_ga.warmstart import ScheduleChanges, get_placements, reoptimize
+
+# Share of the time and generation budgets of a run given to the subproblems, the rest is left
+# to the repair
+SUBPROBLEM_BUDGET_SHARE = 0.8
+
+
+def _find(parents, i):
+    """Returns the root of the set of ``i``, halving the path to it."""
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def find_components(configuration) -> List[List[int]]:
+    """
+    Returns the indices of the classes of each connected component of the conflict graph of
+    the configuration, the largest components first.
+
+    Classes conflict when they share their teacher or a group, so classes of different
+    components can only compete for classrooms.
+    """
+    classes = configuration.get_course_classes()
+    parents = list(range(len(classes)))
+    first_classes = {}
+    for i, course_class in enumerate(classes):
+        entities = [("teacher", course_class.get_teacher().id)]
+        entities += [("group", group.id) for group in course_class.get_groups()]
+        for entity in entities:
+            root = _find(parents, first_classes.setdefault(entity, i))
+            parents[_find(parents, i)] = root
+
+    components = {}
+    for i in range(len(classes)):
+        components.setdefault(_find(parents, i), []).append(i)
+    return sorted(components.values(), key=len, reverse=True)
+
+
+def group_components(configuration, components, number_of_groups) -> List[List[int]]:
+    """
+    Returns the indices of the classes of ``number_of_groups`` groups of components, the
+    largest components first each added to the group with the fewest hours of classes.
+    """
+    classes = configuration.get_course_classes()
+    groups = [[] for _ in range(min(number_of_groups, len(components)))]
+    hours = [0] * len(groups)
+    for component in components:
+        g = hours.index(min(hours))
+        groups[g] += component
+        hours[g] += sum(classes[i].get_duration() for i in component)
+    return [sorted(group) for group in groups]
+
+
+def _apportion(total, weights):
+    """Splits ``total`` items proportionally to ``weights`` by the largest remainder method."""
+    weight_sum = sum(weights)
+    if weight_sum == 0:
+        return [0] * len(weights)
+
+    quotas = [total * weight / weight_sum for weight in weights]
+    counts = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(weights)), key=lambda i: counts[i] - quotas[i])
+    for i in by_remainder[: total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def _deal(rooms, counts):
+    """Deals the rooms in order, each to the group still owed the most of its ``counts``."""
+    dealt = [[] for _ in counts]
+    for room in rooms:
+        g = max(range(len(counts)), key=lambda g: counts[g] - len(dealt[g]))
+        dealt[g].append(room)
+    return dealt
+
+
+def allocate_rooms(configuration, groups) -> List[List[int]]:
+    """
+    Returns the indices of the classrooms allocated to each group of classes.
+
+    Labs are shared out by the hours of classes requiring a lab, the other classrooms by the
+    other hours, and groups left without a classroom take the smallest one of the group with
+    the most. Classrooms are dealt out from the largest, so that every group gets classrooms
+    of all sizes.
+    """
+    classes = configuration.get_course_classes()
+    rooms = sorted(
+        range(configuration.get_number_of_classrooms()),
+        key=lambda r: -configuration.classrooms[r].get_number_of_seats(),
+    )
+    lab_hours = [
+        sum(classes[i].get_duration() for i in group if classes[i].get_is_lab_required())
+        for group in groups
+    ]
+    labs = [r for r in rooms if configuration.classrooms[r].get_is_lab()] if any(lab_hours) else []
+    others = [r for r in rooms if r not in labs]
+    other_hours = [
+        sum(classes[i].get_duration() for i in group) - hours
+        for group, hours in zip(groups, lab_hours)
+    ]
+
+    allocated = [
+        group_labs + group_others
+        for group_labs, group_others in zip(
+            _deal(labs, _apportion(len(labs), lab_hours)),
+            _deal(others, _apportion(len(others), other_hours)),
+        )
+    ]
+    for group_rooms in allocated:
+        if not group_rooms:
+            group_rooms.append(max(allocated, key=len).pop())
+    return [sorted(group_rooms) for group_rooms in allocated]
+
+
+class Subproblem:
+    """
+    Classes of independent components and the classrooms allocated to them, as a problem of
+    their own.
+
+    The configuration of the subproblem shares the entities of the whole configuration, the
+    i-th class of the subproblem is the ``class_indices[i]``-th class of the whole problem and
+    its r-th classroom the ``room_indices[r]``-th one.
+    """
+
+    def __init__(self, configuration, class_indices, room_indices):
+        """Initialize the configuration of the classes and classrooms of the whole problem."""
+        self.class_indices = class_indices
+        self.room_indices = room_indices
+
+        classes = [configuration.get_course_classes()[i] for i in class_indices]
+        teachers = {c.get_teacher().id for c in classes}
+        groups = {group.id for c in classes for group in c.get_groups()}
+        courses = {c.get_course().id for c in classes}
+        self.configuration = Configuration(
+            teachers=[t for t in configuration.teachers if t.id in teachers],
+            student_groups=[g for g in configuration.student_groups if g.id in groups],
+            courses=[c for c in configuration.courses if c.id in courses],
+            classrooms=[configuration.classrooms[r] for r in room_indices],
+            course_classes=classes,
+            kernel=configuration.kernel.name,
+            time_grid=configuration.time_grid,
+        )
+
+    def get_positions(self, genome, configuration) -> List[int]:
+        """Returns the positions in the whole ``configuration`` of a genome of the subproblem."""
+        positions = []
+        for position in genome:
+            day, room, hour = self.configuration.get_slot(int(position))
+            positions.append(configuration.get_position(day, self.room_indices[room], hour))
+        return positions
+
+
+def decompose(configuration) -> List[Subproblem]:
+    """
+    Returns the independent subproblems of the configuration, or a single one if its classes
+    all depend on each other.
+
+    Components of classes are grouped into at most one subproblem per classroom, and each
+    subproblem gets classrooms of its own, see ``allocate_rooms``.
+    """
+    components = find_components(configuration)
+    groups = group_components(configuration, components, configuration.get_number_of_classrooms())
+    rooms = allocate_rooms(configuration, groups)
+    try:
+        return [
+            Subproblem(configuration, class_indices, room_indices)
+            for class_indices, room_indices in zip(groups, rooms)
+        ]
+    finally:
+        Configuration.instance = configuration
+
+
+def _solve_subproblem(
+    configuration,
+    parameters,
+    seed,
+    max_generations=None,
+    max_seconds=None,
+    should_stop=None,
+    stop_check_interval=10,
+):
+    """
+    Returns the genome of the best schedule of a subproblem, in the calling process or not,
+    evolved by an algorithm drawing from a generator seeded with ``seed``.
+    """
+    algorithm = parameters.make_algorithm(configuration, seed=seed)
+    best = algorithm.start(
+        max_generations=max_generations,
+        max_seconds=max_seconds,
+        should_stop=should_stop,
+        stop_check_interval=stop_check_interval,
+    )
+    return [int(position) for position in best.classes]
+
+
+def _solve_subproblems(
+    subproblems,
+    parameters,
+    rng,
+    processes,
+    max_generations,
+    max_seconds,
+    should_stop,
+    stop_check_interval,
+):
+    """
+    Returns the genomes of the best schedules of the subproblems, solved by a pool of
+    ``processes`` worker processes (by default one per CPU) unless running in a daemonic
+    process, like a prefork Celery worker, which cannot start any. The seeds of the
+    subproblems are drawn from the random generator ``rng``.
+    """
+    seeds = [rng.randint(0, RAND16_MAX) for _ in subproblems]
+    budget = None if max_seconds is None else max_seconds * SUBPROBLEM_BUDGET_SHARE
+    processes = min(processes or multiprocessing.cpu_count(), len(subproblems))
+
+    if processes > 1 and not multiprocessing.current_process().daemon:
+        rounds = -(-len(subproblems) // processes)
+        arguments = [
+            (
+                s.configuration,
+                parameters,
+                seed,
+                max_generations,
+                None if budget is None else budget / rounds,
+            )
+            for s, seed in zip(subproblems, seeds)
+        ]
+        with multiprocessing.get_context().Pool(processes) as pool:
+            return pool.starmap(_solve_subproblem, arguments)
+
+    number_of_classes = sum(len(s.class_indices) for s in subproblems)
+    return [
+        _solve_subproblem(
+            s.configuration,
+            parameters,
+            seed,
+            max_generations,
+            None if budget is None else budget * len(s.class_indices) / number_of_classes,
+            should_stop,
+            stop_check_interval,
+        )
+        for s, seed in zip(subproblems, seeds)
+    ]
+
+
+def solve_decomposed(
+    algorithm,
+    parameters,
+    processes=None,
+    max_generations=None,
+    max_seconds=None,
+    should_stop=None,
+    stop_check_interval=10,
+    checkpointer=None,
+    progress=None,
+):
+    """
+    Solves the independent subproblems of the configuration of ``algorithm`` separately, then
+    repairs their merged schedule with ``algorithm``.
+
+    Each subproblem is evolved by an algorithm set up with the ``GAParameters`` of the run,
+    within a share of ``max_generations`` and of ``max_seconds``; they can only be stopped by
+    ``should_stop`` when solved in this process. The merged schedule then seeds ``algorithm``
+    for the rest of the generations and time, only the classes violating a criterion being
+    mutated, see
+    ``reoptimize``, which stops, is checkpointed and reports its progress as in
+    ``Algorithm.start``. Problems without independent subproblems, and runs resuming from a
+    checkpoint, are evolved by ``algorithm`` as a whole. Returns the best chromosome.
+    """
+    stop = {
+        "max_generations": max_generations,
+        "max_seconds": max_seconds,
+        "should_stop": should_stop,
+        "stop_check_interval": stop_check_interval,
+        "checkpointer": checkpointer,
+        "progress": progress,
+    }
+    configuration = algorithm.configuration
+    subproblems = decompose(configuration)
+    if len(subproblems) < 2 or (checkpointer is not None and checkpointer.load() is not None):
+        return algorithm.start(**stop)
+
+    start = time.monotonic()
+    subproblem_generations = None
+    if max_generations is not None:
+        subproblem_generations = int(max_generations * SUBPROBLEM_BUDGET_SHARE)
+        stop["max_generations"] = max_generations - subproblem_generations
+    genomes = _solve_subproblems(
+        subproblems,
+        parameters,
+        algorithm.random,
+        processes,
+        subproblem_generations,
+        max_seconds,
+        should_stop,
+        stop_check_interval,
+    )
+
+    genome = [0] * configuration.get_number_of_course_classes()
+    for subproblem, subproblem_genome in zip(subproblems, genomes):
+        positions = subproblem.get_positions(subproblem_genome, configuration)
+        for class_index, position in zip(subproblem.class_indices, positions):
+            genome[class_index] = position
+
+    if max_seconds is not None:
+        stop["max_seconds"] = max(max_seconds - (time.monotonic() - start), 0)
+    previous = get_placements(algorithm.prototype.make_new_from_genome(genome))
+    return reoptimize(algorithm, previous, ScheduleChanges(), **stop)
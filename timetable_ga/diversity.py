@@ -0,0 +1,108 @@
+"""Diversity of the genomes of a population, to detect and counter premature convergence."""
+
+import numpy as np
+
+
+def position_entropy(genomes) -> float:
+    """
+    Returns the mean entropy of the slot positions of each class over the population.
+
+    ``genomes`` is the (chromosomes x classes) matrix of slot positions. The entropy of each
+    class is normalized by its maximum, the logarithm of the number of chromosomes: 0 when all
+    chromosomes place the class at the same slot, 1 when they all place it differently.
+    """
+    genomes = np.asarray(genomes)
+    number_of_chromosomes, number_of_classes = genomes.shape
+    if number_of_chromosomes < 2 or number_of_classes == 0:
+        return 0.0
+
+    # Runs of equal positions in the sorted positions of each class
+    positions = np.sort(np.ascontiguousarray(genomes.T), axis=1)
+    starts = np.empty(positions.shape, dtype=np.bool_)
+    starts[:, 0] = True
+    np.not_equal(positions[:, 1:], positions[:, :-1], out=starts[:, 1:])
+    run_lengths = np.diff(np.flatnonzero(starts), append=starts.size)
+
+    p = run_lengths / number_of_chromosomes
+    entropy = -np.dot(p, np.log(p)) / number_of_classes
+    return max(float(entropy / np.log(number_of_chromosomes)), 0.0)
+
+
+def sampled_hamming_distance(genomes, samples: int, rng) -> float:
+    """
+    Returns the mean share of classes placed differently by ``samples`` random pairs of
+    distinct chromosomes, drawn with the NumPy generator ``rng``.
+    """
+    genomes = np.asarray(genomes)
+    number_of_chromosomes = len(genomes)
+    if number_of_chromosomes < 2 or genomes.shape[1] == 0:
+        return 0.0
+
+    first = rng.integers(0, number_of_chromosomes, samples)
+    # Shifted by 1 to n-1 rows, so the pairs never compare a chromosome to itself
+    second = (first + rng.integers(1, number_of_chromosomes, samples)) % number_of_chromosomes
+    return float(np.mean(genomes[first] != genomes[second]))
+
+
+class DiversityTracker:
+    """
+    Measures the diversity of the population every ``interval`` generations.
+
+    When the position entropy falls under ``min_entropy``, the ``immigrants`` share of the
+    chromosomes, the best ones excepted, is replaced by random chromosomes; a share of 1
+    restarts the evolution from the best chromosomes. Pairs of chromosomes are sampled with a
+    generator of its own, so measuring does not change the course of the evolution.
+    """
+
+    def __init__(self, interval=1, samples=32, min_entropy=0.0, immigrants=0.1, seed=None):
+        """Initialize the tracker with its sampling and immigration parameters."""
+        self.interval = interval
+        self.samples = samples
+        self.min_entropy = min_entropy
+        self.immigrants = immigrants
+        self.rng = np.random.default_rng(seed)
+        self.entropy = None
+        self.hamming_distance = None
+        self.injections = 0
+
+    def end_generation(self, algorithm):
+        """Measures the diversity of the population and injects immigrants if it is too low."""
+        if algorithm.current_generation % self.interval != 0:
+            return
+
+        genomes, _fitness = algorithm.get_population()
+        self.entropy = position_entropy(genomes)
+        self.hamming_distance = sampled_hamming_distance(genomes, self.samples, self.rng)
+
+        if self.entropy < self.min_entropy and self.immigrants > 0:
+            replaceable = len(algorithm.chromosomes) - algorithm.current_best_size
+            algorithm.inject_immigrants(max(1, round(self.immigrants * replaceable)))
+            self.injections += 1
+
+    def is_converged(self) -> bool:
+        """Returns whether the last measured entropy is under the minimum."""
+        return self.entropy is not None and self.entropy < self.min_entropy
+
+    def get_state(self) -> dict:
+        """Returns the measurements and the state of the generator of the tracker, to resume."""
+        return {
+            "entropy": self.entropy,
+            "hamming_distance": self.hamming_distance,
+            "injections": self.injections,
+            "rng": self.rng.bit_generator.state,
+        }
+
+    def set_state(self, state: dict):
+        """Restores the measurements and the state of the generator of the tracker."""
+        self.entropy = state["entropy"]
+        self.hamming_distance = state["hamming_distance"]
+        self.injections = state["injections"]
+        self.rng.bit_generator.state = state["rng"]
+
+    def to_dict(self):
+        """Returns the last measured diversity."""
+        return {
+            "entropy": self.entropy,
+            "hamming_distance": self.hamming_distance,
+            "injections": self.injections,
+        }
@@ -1,10 +1,17 @@
 """Constants for the genetic algorithm"""
 
-# Number of working hours per day
+# Default number of working hours per day, see models.TimeGrid
 DAY_HOURS = 12
 
-# Number of days in week
+# Default number of days in week
 DAYS_NUM = 5
 
+# Maximum number of days in week and of hours per day, both stored in one byte by the store
+MAX_DAYS = 7
+MAX_DAY_HOURS = 24
+
 # Maximum value of signed int16
 RAND16_MAX = 32767
+
+# Number of criteria evaluated for each class
+CRITERIA_NUM = 5
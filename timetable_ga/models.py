@@ -1,13 +1,89 @@
 """Contains the models for the application."""
 
 import copy
+import importlib.util
 import random
-from random import randint
-from typing import ClassVar, List
+import time
+from contextvars import ContextVar
+from typing import List, Literal, Optional, Tuple, get_args
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
 
-from timetable_ga.ga_consts import DAY_HOURS, DAYS_NUM, RAND16_MAX
+from timetable_ga.ga_consts import (
+    CRITERIA_NUM,
+    DAY_HOURS,
+    DAYS_NUM,
+    MAX_DAY_HOURS,
+    MAX_DAYS,
+    RAND16_MAX,
+)
+from timetable_ga.profiling import ALGORITHM_OPERATORS, SCHEDULE_OPERATORS
+
+# Numba is imported by the first Numba kernel only, the web service never evaluates schedules
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+
+class EntityRegistry:
+    """
+    Registry of the entities of a run, by type of entity.
+
+    Entities get dense IDs, from 0 to n - 1 per type, in the order they are created, and are
+    found by ID or by backend ID in constant time. Each run creates its entities in the registry
+    of its own context, see ``get_entity_registry``, so that runs in parallel threads or asyncio
+    tasks of a process never share IDs.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._entities = {}
+        self._by_backend_id = {}
+
+    def next_id(self, model) -> int:
+        """Returns the ID of the next entity of type ``model``."""
+        return len(self._entities.get(model, ()))
+
+    def add(self, entity):
+        """Registers an entity, which must have the next ID of its type."""
+        model = type(entity)
+        entities = self._entities.setdefault(model, [])
+        if entity.id != len(entities):
+            raise ValueError(
+                f"{model.__name__} {entity.backend_id} has ID {entity.id}, expected {len(entities)}"
+            )
+        entities.append(entity)
+        self._by_backend_id.setdefault(model, {})[entity.backend_id] = entity
+
+    def get(self, model, id):
+        """Returns the entity of type ``model`` with the ID."""
+        return self._entities[model][id]
+
+    def get_by_backend_id(self, model, backend_id):
+        """Returns the entity of type ``model`` with the backend ID, or ``None``."""
+        return self._by_backend_id.get(model, {}).get(backend_id)
+
+    def count(self, model) -> int:
+        """Returns the number of entities of type ``model``."""
+        return len(self._entities.get(model, ()))
+
+
+# Registry of the entities of the run of the current context
+_entity_registry = ContextVar("entity_registry")
+
+
+def get_entity_registry() -> EntityRegistry:
+    """Returns the entity registry of the current context, a new one if it has none yet."""
+    try:
+        return _entity_registry.get()
+    except LookupError:
+        return start_entity_registry()
+
+
+def start_entity_registry() -> EntityRegistry:
+    """Starts a new entity registry in the current context, where IDs restart at 0."""
+    registry = EntityRegistry()
+    _entity_registry.set(registry)
+    return registry
 
 
 class InternalModel(BaseModel):
@@ -18,14 +94,18 @@ class InternalModel(BaseModel):
     id: int
     backend_id: str
 
-    _next_id: ClassVar[int] = 0
-
     def __init__(self, **data):
-        """Initialize the model with a unique ID and backend ID."""
+        """
+        Initialize the model with the next ID of its type in the entity registry of the current
+        context, unless an ID is given.
+        """
+        registry = None
         if "id" not in data:
-            data["id"] = InternalModel._next_id
-            InternalModel._next_id += 1
+            registry = get_entity_registry()
+            data["id"] = registry.next_id(type(self))
         super().__init__(**data)
+        if registry is not None:
+            registry.add(self)
 
     def get_id(self):
         """
@@ -42,14 +122,14 @@ class InternalModel(BaseModel):
     @classmethod
     def restart_id_counter(cls):
         """
-        Restart the ID counter for the model."""
-        InternalModel._next_id = 0
+        Restart the ID counters of the models, starting a new entity registry."""
+        start_entity_registry()
 
     def __eq__(self, rhs):
         """
-        Check if two objects are equal based on their IDs.
+        Check if two objects are the same entity based on their types and IDs.
         """
-        return self.id == rhs.id
+        return type(self) is type(rhs) and self.id == rhs.id
 
 
 class Course(InternalModel):
@@ -68,10 +148,14 @@ class Course(InternalModel):
 class Teacher(InternalModel):
     """
     Model representing a teacher.
+
+    ``preferred_hours`` are the hours of the day the teacher prefers to teach at, any hour if
+    empty; like ``lunch_break_needed`` they are soft constraints, see ``timetable_ga.constraints``.
     """
 
     name: str
     lunch_break_needed: bool = False
+    preferred_hours: List[int] = []
     course_classes: List = []
 
     def get_name(self) -> str:
@@ -153,22 +237,26 @@ class CourseClass(InternalModel):
         """
         Initialize the course class with a teacher, course, groups, lab requirement, and duration.
         """
-        super().__init__(backend_id=backend_id, name=name, number_of_students=number_of_students)
-        self.teacher = teacher
-        self.course = course
-        self.number_of_seats = 0
-        self.is_lab_required = is_lab_required
-        self.duration = duration
-        self.groups = groups
+        groups = groups if groups is not None else []
+        number_of_seats = 0
+        for group in groups:
+            number_of_seats = number_of_seats + StudentsGroup.get_number_of_students(group)
+
+        super().__init__(
+            backend_id=backend_id,
+            teacher=teacher,
+            course=course,
+            number_of_seats=number_of_seats,
+            is_lab_required=is_lab_required,
+            duration=duration,
+            groups=groups,
+        )
 
         self.teacher.add_course_class(self)
 
         group_count = len(self.groups)
         for i in range(group_count):
             self.groups[i].add_class(self)
-            self.number_of_seats = self.number_of_seats + StudentsGroup.get_number_of_students(
-                self.groups[i]
-            )
 
     def are_groups_overlapped(self, _class) -> bool:
         """
@@ -226,11 +314,14 @@ class CourseClass(InternalModel):
 class Classroom(InternalModel):
     """
     Model representing a classroom.
+
+    No class may take place at the ``unavailable_periods`` (day, hour) of the classroom.
     """
 
     name: str
     is_lab: bool = False
     number_of_seats: int = 1000
+    unavailable_periods: List[Tuple[int, int]] = []
 
     def get_name(self) -> str:
         """
@@ -251,10 +342,594 @@ class Classroom(InternalModel):
         return self.number_of_seats
 
 
+class TimeGrid(BaseModel):
+    """
+    Model representing the week of a configuration: ``days`` days of ``day_hours`` periods.
+
+    No class may take place at the ``blocked_periods`` (day, hour) of any classroom.
+    """
+
+    days: int = Field(DAYS_NUM, ge=1, le=MAX_DAYS)
+    day_hours: int = Field(DAY_HOURS, ge=1, le=MAX_DAY_HOURS)
+    blocked_periods: List[Tuple[int, int]] = []
+
+    @model_validator(mode="after")
+    def check_periods(self):
+        """Checks that the blocked periods are periods of the week."""
+        for period in self.blocked_periods:
+            self.check_period(period)
+        return self
+
+    def check_period(self, period):
+        """Raises ``ValueError`` if the (day, hour) period is outside the week."""
+        day, hour = period
+        if not (0 <= day < self.days and 0 <= hour < self.day_hours):
+            raise ValueError(f"Period {tuple(period)} is outside the week")
+
+
+class ConfigurationArrays:
+    """
+    Compact integer arrays describing a configuration, used by the fitness kernels.
+
+    Teachers and groups are referenced by their dense index in the configuration, the groups
+    of the i-th class are ``group_indices[group_offsets[i]:group_offsets[i + 1]]``. Classrooms
+    are listed by number of seats in ``room_order``, and whether a class of duration ``d`` may
+    start at the slot at ``position`` is ``start_masks[d * number_of_slots + position]``.
+    """
+
+    FIELDS = (
+        "durations",
+        "class_seats",
+        "class_lab",
+        "class_teacher",
+        "group_offsets",
+        "group_indices",
+        "room_seats",
+        "room_lab",
+        "room_order",
+        "start_masks",
+    )
+
+    def __init__(self, configuration):
+        """Build the arrays of the given configuration."""
+        teacher_indices = {teacher.id: i for i, teacher in enumerate(configuration.teachers)}
+        group_indices = {group.id: i for i, group in enumerate(configuration.student_groups)}
+
+        self.durations = []
+        self.class_seats = []
+        self.class_lab = []
+        self.class_teacher = []
+        self.group_offsets = [0]
+        self.group_indices = []
+        for course_class in configuration.course_classes:
+            teacher = course_class.get_teacher()
+            teacher_index = teacher_indices.setdefault(teacher.id, len(teacher_indices))
+
+            self.durations.append(course_class.get_duration())
+            self.class_seats.append(course_class.get_number_of_seats())
+            self.class_lab.append(int(course_class.get_is_lab_required()))
+            self.class_teacher.append(teacher_index)
+            for group in course_class.get_groups():
+                group_index = group_indices.setdefault(group.id, len(group_indices))
+                if group_index not in self.group_indices[self.group_offsets[-1] :]:
+                    self.group_indices.append(group_index)
+            self.group_offsets.append(len(self.group_indices))
+
+        self.room_seats = [room.get_number_of_seats() for room in configuration.classrooms]
+        self.room_lab = [int(room.get_is_lab()) for room in configuration.classrooms]
+        self.room_order = sorted(range(len(self.room_seats)), key=lambda r: (self.room_seats[r], r))
+        start_masks = np.zeros(
+            (max(self.durations, default=0) + 1, configuration.get_number_of_slots()),
+            dtype=np.bool_,
+        )
+        for course_class in configuration.course_classes:
+            start_masks[course_class.get_duration()] = configuration.get_start_mask(course_class)
+        self.start_masks = start_masks.reshape(-1).tolist()
+        self.days = configuration.time_grid.days
+        self.day_hours = configuration.time_grid.day_hours
+        self.number_of_teachers = len(teacher_indices)
+        self.number_of_groups = len(group_indices)
+        self._numpy = None
+
+    def as_numpy(self):
+        """Returns a copy of the arrays as ``int32`` NumPy arrays."""
+        if self._numpy is None:
+            arrays = copy.copy(self)
+            for field in self.FIELDS:
+                setattr(arrays, field, np.asarray(getattr(self, field), dtype=np.int32))
+            arrays._numpy = arrays
+            self._numpy = arrays
+        return self._numpy
+
+
+def _fitness(  # noqa: C901
+    genome,
+    durations,
+    class_seats,
+    class_lab,
+    class_teacher,
+    group_offsets,
+    group_indices,
+    room_seats,
+    room_lab,
+    day_hours,
+    week_hours,
+    room_usage,
+    teacher_usage,
+    group_usage,
+    criteria,
+):
+    """
+    Fills the criteria of the classes placed by ``genome`` and returns the number of satisfied
+    criteria.
+
+    The usage buffers must be zeroed, of size slots, teachers x week hours and
+    groups x week hours. Shared by the kernels: run as is on lists and compiled by Numba.
+    """
+    number_of_rooms = len(room_seats)
+    day_size = day_hours * number_of_rooms
+
+    for i in range(len(genome)):
+        p = genome[i]
+        dur = durations[i]
+        hour = p // day_size * day_hours + p % day_hours
+        t = class_teacher[i] * week_hours + hour
+        for k in range(dur):
+            room_usage[p + k] += 1
+            teacher_usage[t + k] += 1
+        for g in range(group_offsets[i], group_offsets[i + 1]):
+            t = group_indices[g] * week_hours + hour
+            for k in range(dur):
+                group_usage[t + k] += 1
+
+    score = 0
+    ci = 0
+    for i in range(len(genome)):
+        p = genome[i]
+        dur = durations[i]
+        room = p % day_size // day_hours
+        hour = p // day_size * day_hours + p % day_hours
+
+        ro = False
+        for k in range(dur):
+            if room_usage[p + k] > 1:
+                ro = True
+                break
+        criteria[ci + 0] = not ro
+
+        criteria[ci + 1] = room_seats[room] >= class_seats[i]
+        criteria[ci + 2] = not class_lab[i] or room_lab[room] != 0
+
+        po = False
+        t = class_teacher[i] * week_hours + hour
+        for k in range(dur):
+            if teacher_usage[t + k] > 1:
+                po = True
+                break
+        criteria[ci + 3] = not po
+
+        go = False
+        for g in range(group_offsets[i], group_offsets[i + 1]):
+            t = group_indices[g] * week_hours + hour
+            for k in range(dur):
+                if group_usage[t + k] > 1:
+                    go = True
+                    break
+            if go:
+                break
+        criteria[ci + 4] = not go
+
+        for k in range(CRITERIA_NUM):
+            if criteria[ci + k]:
+                score += 1
+        ci += CRITERIA_NUM
+
+    return score
+
+
+def _assign_rooms(  # noqa: C901
+    genome,
+    days,
+    durations,
+    class_seats,
+    class_lab,
+    room_seats,
+    room_lab,
+    room_order,
+    start_masks,
+    day_hours,
+    offsets,
+    order,
+    busy,
+    room_class,
+    class_room,
+    reached,
+    queue,
+):
+    """
+    Moves the classes of ``genome`` placed on the flagged ``days`` to the classrooms matched to
+    them in place, and returns the number of classes left without a suitable free classroom.
+
+    Hour by hour, the classes starting at the hour are matched to the classrooms free for all
+    their hours, with enough seats and a lab if required, by augmenting paths (Kuhn's
+    algorithm), trying the smallest and non-lab classrooms first. The matching is maximal per
+    hour, not over whole days, as longer classes keep the classrooms of earlier hours. Classes
+    left unmatched take the classroom they overlap the fewest hours in. The buffers, of size
+    week hours + 1 (``offsets``), classes (``order``, ``class_room``, ``queue``), classrooms
+    x day hours (``busy``) and classrooms (``room_class``, ``reached``) need not be zeroed.
+    Shared by the kernels like ``_fitness``.
+    """
+    number_of_rooms = len(room_seats)
+    day_size = day_hours * number_of_rooms
+    number_of_slots = day_size * len(days)
+    week_hours = day_hours * len(days)
+
+    # Classes by start hour of the week, bucket k ending at offsets[k]
+    for k in range(week_hours + 1):
+        offsets[k] = 0
+    for i in range(len(genome)):
+        p = genome[i]
+        offsets[p // day_size * day_hours + p % day_hours + 1] += 1
+    for k in range(week_hours):
+        offsets[k + 1] += offsets[k]
+    for i in range(len(genome)):
+        p = genome[i]
+        k = p // day_size * day_hours + p % day_hours
+        order[offsets[k]] = i
+        offsets[k] += 1
+
+    unmatched = 0
+    for d in range(len(days)):
+        if not days[d]:
+            continue
+        for k in range(number_of_rooms * day_hours):
+            busy[k] = 0
+
+        for h in range(day_hours):
+            k = d * day_hours + h
+            first = offsets[k - 1] if k > 0 else 0
+            size = offsets[k] - first
+            for r in range(number_of_rooms):
+                room_class[r] = -1
+            for a in range(size):
+                class_room[a] = -1
+
+            for a in range(size):
+                for r in range(number_of_rooms):
+                    reached[r] = -1
+                queue[0] = a
+                head = 0
+                tail = 1
+                found = -1
+                while head < tail and found < 0:
+                    u = queue[head]
+                    head += 1
+                    i = order[first + u]
+                    mask = durations[i] * number_of_slots + d * day_size + h
+                    for q in range(number_of_rooms if class_lab[i] else 2 * number_of_rooms):
+                        r = room_order[q % number_of_rooms]
+                        lab = class_lab[i] != 0 or q >= number_of_rooms
+                        if reached[r] >= 0 or (room_lab[r] != 0) != lab:
+                            continue
+                        if room_seats[r] < class_seats[i] or not start_masks[mask + r * day_hours]:
+                            continue
+                        free = True
+                        for t in range(r * day_hours + h, r * day_hours + h + durations[i]):
+                            if busy[t] > 0:
+                                free = False
+                                break
+                        if not free:
+                            continue
+                        reached[r] = u
+                        if room_class[r] < 0:
+                            found = r
+                            break
+                        queue[tail] = room_class[r]
+                        tail += 1
+
+                # Augments the matching along the path back from the free classroom found
+                r = found
+                while r >= 0:
+                    u = reached[r]
+                    previous = class_room[u]
+                    class_room[u] = r
+                    room_class[r] = u
+                    r = previous
+
+            for matched in range(2):
+                for a in range(size):
+                    if (class_room[a] >= 0) != (matched == 0):
+                        continue
+                    i = order[first + a]
+                    r = class_room[a]
+                    if r < 0:
+                        unmatched += 1
+                        r = genome[i] % day_size // day_hours
+                        mask = durations[i] * number_of_slots + d * day_size + h
+                        best = -1
+                        for c in room_order:
+                            if not start_masks[mask + c * day_hours]:
+                                continue
+                            score = int(
+                                room_seats[c] < class_seats[i] or class_lab[i] > room_lab[c]
+                            )
+                            for t in range(c * day_hours + h, c * day_hours + h + durations[i]):
+                                score += 2 * busy[t]
+                            if best < 0 or score < best:
+                                best = score
+                                r = c
+                    for t in range(r * day_hours + h, r * day_hours + h + durations[i]):
+                        busy[t] += 1
+                    genome[i] = d * day_size + r * day_hours + h
+
+    return unmatched
+
+
+def _crossover(parent1, parent2, crossover_points, first, child):
+    """Fills ``child`` from the parents, switching parent after each crossover point."""
+    for i in range(len(parent1)):
+        child[i] = parent1[i] if first else parent2[i]
+        if crossover_points[i]:
+            first = not first
+
+
+def _select(parent1, parent2, from_first, child):
+    """Fills ``child`` with the genes of ``parent1`` where ``from_first`` is set, else parent2."""
+    for i in range(len(parent1)):
+        child[i] = parent1[i] if from_first[i] else parent2[i]
+
+
+def _mutation(genome, class_indices, positions):
+    """Moves the classes ``class_indices`` of ``genome`` to the given slot positions."""
+    for j in range(len(class_indices)):
+        genome[class_indices[j]] = positions[j]
+
+
+class PythonKernel:
+    """
+    Reference implementation of the fitness and the genetic operators in pure Python.
+
+    Genomes and criteria are lists.
+    """
+
+    name = "python"
+
+    def empty_genome(self, size):
+        """Returns a genome of ``size`` classes placed at the first slot."""
+        return size * [0]
+
+    def as_genome(self, values):
+        """Returns a genome with the given slot positions."""
+        return [int(value) for value in values]
+
+    def empty_criteria(self, size):
+        """Returns unsatisfied criteria for ``size`` classes."""
+        return size * CRITERIA_NUM * [False]
+
+    def fitness(self, genome, arrays, criteria):
+        """Fills ``criteria`` and returns the number of satisfied criteria of ``genome``."""
+        week_hours = arrays.days * arrays.day_hours
+        return _fitness(
+            genome,
+            arrays.durations,
+            arrays.class_seats,
+            arrays.class_lab,
+            arrays.class_teacher,
+            arrays.group_offsets,
+            arrays.group_indices,
+            arrays.room_seats,
+            arrays.room_lab,
+            arrays.day_hours,
+            week_hours,
+            week_hours * len(arrays.room_seats) * [0],
+            week_hours * arrays.number_of_teachers * [0],
+            week_hours * arrays.number_of_groups * [0],
+            criteria,
+        )
+
+    def assign_rooms(self, genome, arrays, days):
+        """
+        Moves the classes of ``genome`` placed on the flagged ``days`` to the classrooms
+        matched to them in place, see ``_assign_rooms``. Returns the number of unmatched classes.
+        """
+        number_of_rooms = len(arrays.room_seats)
+        return _assign_rooms(
+            genome,
+            days,
+            arrays.durations,
+            arrays.class_seats,
+            arrays.class_lab,
+            arrays.room_seats,
+            arrays.room_lab,
+            arrays.room_order,
+            arrays.start_masks,
+            arrays.day_hours,
+            (arrays.days * arrays.day_hours + 1) * [0],
+            len(genome) * [0],
+            number_of_rooms * arrays.day_hours * [0],
+            number_of_rooms * [0],
+            len(genome) * [0],
+            number_of_rooms * [0],
+            len(genome) * [0],
+        )
+
+    def crossover(self, parent1, parent2, crossover_points, first):
+        """Returns the child of two genomes for the given crossover points."""
+        child = self.empty_genome(len(parent1))
+        _crossover(parent1, parent2, crossover_points, first, child)
+        return child
+
+    def select(self, parent1, parent2, from_first):
+        """Returns the child taking each gene from ``parent1`` if set in ``from_first``."""
+        child = self.empty_genome(len(parent1))
+        _select(parent1, parent2, from_first, child)
+        return child
+
+    def mutation(self, genome, class_indices, positions):
+        """Moves classes of ``genome`` in place."""
+        _mutation(genome, class_indices, positions)
+
+
+class NumbaKernel(PythonKernel):
+    """
+    The kernel functions compiled by Numba.
+
+    Genomes are ``int32`` and criteria ``bool`` NumPy arrays. Available when Numba is installed.
+    """
+
+    name = "numba"
+
+    def __init__(self):
+        """Compile the kernel functions lazily, on their first call."""
+        if not NUMBA_AVAILABLE:
+            raise ImportError("The numba kernel requires Numba to be installed")
+
+        functions = _get_numba_functions()
+        self._fitness = functions["fitness"]
+        self._assign_rooms = functions["assign_rooms"]
+        self._crossover = functions["crossover"]
+        self._select = functions["select"]
+        self._mutation = functions["mutation"]
+
+    def empty_genome(self, size):
+        """Returns a genome of ``size`` classes placed at the first slot."""
+        return np.zeros(size, dtype=np.int32)
+
+    def as_genome(self, values):
+        """Returns a genome with the given slot positions."""
+        return np.array(values, dtype=np.int32)
+
+    def empty_criteria(self, size):
+        """Returns unsatisfied criteria for ``size`` classes."""
+        return np.zeros(size * CRITERIA_NUM, dtype=np.bool_)
+
+    def fitness(self, genome, arrays, criteria):
+        """Fills ``criteria`` and returns the number of satisfied criteria of ``genome``."""
+        arrays = arrays.as_numpy()
+        week_hours = arrays.days * arrays.day_hours
+        return int(
+            self._fitness(
+                np.asarray(genome, dtype=np.int32),
+                arrays.durations,
+                arrays.class_seats,
+                arrays.class_lab,
+                arrays.class_teacher,
+                arrays.group_offsets,
+                arrays.group_indices,
+                arrays.room_seats,
+                arrays.room_lab,
+                arrays.day_hours,
+                week_hours,
+                np.zeros(week_hours * len(arrays.room_seats), dtype=np.int32),
+                np.zeros(week_hours * arrays.number_of_teachers, dtype=np.int32),
+                np.zeros(week_hours * arrays.number_of_groups, dtype=np.int32),
+                criteria,
+            )
+        )
+
+    def assign_rooms(self, genome, arrays, days):
+        """
+        Moves the classes of ``genome`` placed on the flagged ``days`` to the classrooms
+        matched to them in place, see ``_assign_rooms``. Returns the number of unmatched classes.
+        """
+        arrays = arrays.as_numpy()
+        number_of_rooms = len(arrays.room_seats)
+        return int(
+            self._assign_rooms(
+                genome,
+                np.asarray(days, dtype=np.bool_),
+                arrays.durations,
+                arrays.class_seats,
+                arrays.class_lab,
+                arrays.room_seats,
+                arrays.room_lab,
+                arrays.room_order,
+                arrays.start_masks,
+                arrays.day_hours,
+                np.zeros(arrays.days * arrays.day_hours + 1, dtype=np.int32),
+                np.zeros(len(genome), dtype=np.int32),
+                np.zeros(number_of_rooms * arrays.day_hours, dtype=np.int32),
+                np.zeros(number_of_rooms, dtype=np.int32),
+                np.zeros(len(genome), dtype=np.int32),
+                np.zeros(number_of_rooms, dtype=np.int32),
+                np.zeros(len(genome), dtype=np.int32),
+            )
+        )
+
+    def crossover(self, parent1, parent2, crossover_points, first):
+        """Returns the child of two genomes for the given crossover points."""
+        child = self.empty_genome(len(parent1))
+        self._crossover(
+            np.asarray(parent1, dtype=np.int32),
+            np.asarray(parent2, dtype=np.int32),
+            np.asarray(crossover_points, dtype=np.bool_),
+            first,
+            child,
+        )
+        return child
+
+    def select(self, parent1, parent2, from_first):
+        """Returns the child taking each gene from ``parent1`` if set in ``from_first``."""
+        child = self.empty_genome(len(parent1))
+        self._select(
+            np.asarray(parent1, dtype=np.int32),
+            np.asarray(parent2, dtype=np.int32),
+            np.asarray(from_first, dtype=np.bool_),
+            child,
+        )
+        return child
+
+    def mutation(self, genome, class_indices, positions):
+        """Moves classes of ``genome`` in place."""
+        self._mutation(
+            genome,
+            np.asarray(class_indices, dtype=np.int64),
+            np.asarray(positions, dtype=np.int32),
+        )
+
+
+# Kernel functions wrapped by Numba, by name, see ``_get_numba_functions``
+_numba_functions = {}
+
+
+def _get_numba_functions():
+    """Returns the kernel functions wrapped by Numba, importing it on the first call."""
+    if not _numba_functions:
+        import numba  # pylint: disable=import-outside-toplevel
+
+        _numba_functions.update(
+            {
+                "fitness": numba.njit(cache=True)(_fitness),
+                "assign_rooms": numba.njit(cache=True)(_assign_rooms),
+                "crossover": numba.njit(cache=True)(_crossover),
+                "select": numba.njit(cache=True)(_select),
+                "mutation": numba.njit(cache=True)(_mutation),
+            }
+        )
+    return _numba_functions
+
+
+# Available kernels by name
+KERNELS = {PythonKernel.name: PythonKernel, NumbaKernel.name: NumbaKernel}
+
+
+def get_kernel(name="auto"):
+    """
+    Returns the kernel with the given name.
+
+    ``auto`` selects the Numba kernel when Numba is installed and the Python kernel otherwise.
+    """
+    if name == "auto":
+        name = NumbaKernel.name if NUMBA_AVAILABLE else PythonKernel.name
+    if name not in KERNELS:
+        raise ValueError(f"Unknown kernel: {name}")
+    return KERNELS[name]()
+
+
 class Configuration:
     """Configuration class to hold the timetable generation configuration."""
 
-    global instance
+    instance = None
 
     def __init__(
         self,
@@ -263,34 +938,50 @@ class Configuration:
         courses: List[Course],
         classrooms: List[Classroom],
         course_classes: List[CourseClass],
+        kernel: str = "auto",
+        time_grid: Optional[TimeGrid] = None,
     ):
-        """Configuration class to hold the timetable generation configuration."""
+        """
+        Configuration class to hold the timetable generation configuration.
+
+        ``kernel`` names the backend evaluating and recombining schedules, see ``get_kernel``.
+        ``time_grid`` is the week of the timetable, 5 days of 12 hours by default.
+        """
+        self.time_grid = time_grid if time_grid is not None else TimeGrid()
         self.teachers = teachers
         self.student_groups = student_groups
         self.courses = courses
         self.classrooms = classrooms
         self.course_classes = course_classes
 
+        self._teachers_by_id = {teacher.id: teacher for teacher in teachers}
+        self._student_groups_by_id = {group.id: group for group in student_groups}
+        self._courses_by_id = {course.id: course for course in courses}
+        self._classrooms_by_id = {classroom.id: classroom for classroom in classrooms}
+
+        self.kernel = get_kernel(kernel)
+        self._arrays = None
+        self._start_masks = {}
+        self._valid_starts = {}
+
+        Configuration.instance = self
+
+    @staticmethod
     def get_instance():
         """Singleton method to get the instance of Configuration class."""
-        instance = Configuration()
-        return instance
+        return Configuration.instance
 
     def get_teacher_by_id(self, id):
         """Returns pointer to teacher with specified ID."""
-        if id in self.teachers.keys():
-            return self.teachers[id]
-        return None
+        return self._teachers_by_id.get(id)
 
     def get_number_of_teachers(self):
         """Returns number of teachers."""
-        return len(self.teachers.keys())
+        return len(self.teachers)
 
     def get_students_group_by_id(self, id):
         """Returns pointer to student group with specified ID."""
-        if id in self.student_groups.keys():
-            return self.student_groups[id]
-        return None
+        return self._student_groups_by_id.get(id)
 
     def get_number_of_student_groups(self):
         """Returns number of student groups."""
@@ -298,9 +989,7 @@ class Configuration:
 
     def get_course_by_id(self, id):
         """Returns pointer to course with specified ID."""
-        if id in self.courses.keys():
-            return self.courses[id]
-        return None
+        return self._courses_by_id.get(id)
 
     def get_number_of_courses(self):
         """Returns number of courses."""
@@ -308,9 +997,7 @@ class Configuration:
 
     def get_classroom_by_id(self, id):
         """Returns pointer to classroom with specified ID."""
-        if id in self.classrooms.keys():
-            return self.classrooms[id]
-        return None
+        return self._classrooms_by_id.get(id)
 
     def get_number_of_classrooms(self):
         """Returns number of classrooms."""
@@ -324,10 +1011,112 @@ class Configuration:
         """Returns number of course classes."""
         return len(self.course_classes)
 
+    def get_arrays(self):
+        """Returns the configuration as compact integer arrays."""
+        if self._arrays is None:
+            self._arrays = ConfigurationArrays(self)
+        return self._arrays
+
+    def get_day_size(self):
+        """Returns the number of slots of a day, one per classroom and hour."""
+        return self.get_number_of_classrooms() * self.time_grid.day_hours
+
+    def get_number_of_slots(self):
+        """Returns the number of (day, room, hour) slots of the week."""
+        return self.time_grid.days * self.get_day_size()
+
+    def get_position(self, day, room, hour):
+        """Returns the position of the slot at the given day, room index and hour."""
+        return day * self.get_day_size() + room * self.time_grid.day_hours + hour
+
+    def get_slot(self, position):
+        """Returns the day, room index and hour of the slot at the given position."""
+        day_hours = self.time_grid.day_hours
+        day_size = self.get_day_size()
+        return position // day_size, position % day_size // day_hours, position % day_hours
+
+    def get_start_mask(self, course_class):
+        """
+        Returns which slots the class may start at, as a boolean array indexed by position.
+
+        All hours of the class must fall in the same day, outside the blocked periods of the
+        week and the unavailable periods of the classroom. Masks are computed once per duration.
+        """
+        duration = course_class.get_duration()
+        if duration not in self._start_masks:
+            free = self._get_free_slots()
+            mask = np.zeros(free.shape, dtype=np.bool_)
+            if duration <= self.time_grid.day_hours:
+                windows = np.lib.stride_tricks.sliding_window_view(free, duration, axis=2)
+                mask[:, :, : windows.shape[2]] = windows.all(-1)
+            self._start_masks[duration] = mask.reshape(-1)
+        return self._start_masks[duration]
+
+    def get_valid_starts(self, course_class):
+        """Returns the positions of the slots the class may start at."""
+        duration = course_class.get_duration()
+        if duration not in self._valid_starts:
+            starts = np.flatnonzero(self.get_start_mask(course_class)).tolist()
+            if not starts:
+                raise ValueError(
+                    f"Course class {course_class.get_backend_id()} fits in no period of the week"
+                )
+            self._valid_starts[duration] = starts
+        return self._valid_starts[duration]
+
+    def get_valid_day_starts(self, course_class, position):
+        """Returns the positions the class may start at in the day and room of ``position``."""
+        day_hours = self.time_grid.day_hours
+        day_start = position - position % day_hours
+        hours = np.flatnonzero(self.get_start_mask(course_class)[day_start : day_start + day_hours])
+        return (day_start + hours).tolist()
+
+    def _get_free_slots(self):
+        """Returns which (day, room, hour) slots are neither blocked nor unavailable."""
+        grid = self.time_grid
+        free = np.ones((grid.days, len(self.classrooms), grid.day_hours), dtype=np.bool_)
+        for day, hour in grid.blocked_periods:
+            free[day, :, hour] = False
+        for room, classroom in enumerate(self.classrooms):
+            for period in classroom.unavailable_periods:
+                grid.check_period(period)
+                free[period[0], room, period[1]] = False
+        return free
+
+
+# Crossover operators of the schedules, see Schedule.crossover
+CrossoverOperator = Literal["n_point", "uniform", "day_block", "conflict_aware"]
+CROSSOVER_OPERATORS = get_args(CrossoverOperator)
+
+# Mutation operators of the schedules and the moves they pick from, see Schedule.mutation
+MutationOperator = Literal["relocate", "swap", "shift", "mixed"]
+MUTATION_OPERATORS = get_args(MutationOperator)
+MUTATION_MOVES = ("relocate", "swap", "shift")
+
+
+def _fit_position(configuration, course_class, position):
+    """
+    Returns the slot position moved to the closest earlier hour of its day and classroom the
+    class may start at, or to the first later one, ``None`` if the class fits nowhere that day.
+    """
+    starts = configuration.get_valid_day_starts(course_class, position)
+    if not starts:
+        return None
+    earlier = [start for start in starts if start <= position]
+    return earlier[-1] if earlier else starts[0]
+
 
 class Schedule:
     """
-    Represents a schedule for classes."""
+    Represents a schedule for classes.
+
+    ``classes`` is the genome of the schedule: ``classes[i]`` holds the index of the first
+    (day, room, hour) slot occupied by the i-th course class of the configuration. Fitness and
+    operators are computed by the kernel of the configuration.
+
+    Each schedule belongs to the configuration of its run, shared by its copies, so that runs
+    of different configurations can evolve in the same process.
+    """
 
     def __init__(
         self,
@@ -335,197 +1124,351 @@ class Schedule:
         mutation_size: int,
         crossover_probability: float,
         mutation_probability: float,
+        crossover_operator: CrossoverOperator = "n_point",
+        mutation_operator: MutationOperator = "relocate",
+        soft_constraints=None,
+        assign_rooms: bool = False,
+        configuration: Optional[Configuration] = None,
+        seed: Optional[int] = None,
     ):
         """
         Initialize the schedule with the given parameters.
+
+        ``crossover_operator`` is one of ``CROSSOVER_OPERATORS``, see ``crossover``, and
+        ``mutation_operator`` one of ``MUTATION_OPERATORS``, see ``mutation``. With
+        ``soft_constraints`` (see ``timetable_ga.constraints.SoftConstraints``) the penalty of
+        the schedule lowers its fitness, and with ``assign_rooms`` the classrooms of the classes
+        are matched to them instead of evolved, see ``calculate_fitness``. ``configuration`` is
+        the problem of the run, the last configuration created by default.
+
+        The operators draw from the ``random.Random`` generator of the run, shared by the copies
+        of the schedule and seeded with ``seed``, by default drawn from the ``random`` module.
         """
+        if crossover_operator not in CROSSOVER_OPERATORS:
+            raise ValueError(f"Unknown crossover operator: {crossover_operator}")
+        if mutation_operator not in MUTATION_OPERATORS:
+            raise ValueError(f"Unknown mutation operator: {mutation_operator}")
+
         self.num_of_crossover_points = num_of_crossover_points
         self.mutation_size = mutation_size
         self.crossover_probability = crossover_probability
         self.mutation_probability = mutation_probability
+        self.crossover_operator = crossover_operator
+        self.mutation_operator = mutation_operator
+        self.soft_constraints = soft_constraints
+        self.assign_rooms = assign_rooms
+        self.configuration = Configuration.instance if configuration is None else configuration
+        self.random = random.Random(random.getrandbits(64) if seed is None else seed)
         self.fitness = 0
-        self.slots = []
+        self.penalty = 0.0
+        self.soft_penalties = None
+        self.classes = []
         self.criteria = []
+        self.mutable_classes = None
+
+        self._reset()
+
+    def _reset(self):
+        """Clears classes and criteria, sized to the configuration."""
+        kernel = self.configuration.kernel
+        number_of_classes = self.configuration.get_number_of_course_classes()
+
+        self.fitness = 0
+        self.penalty = 0.0
+        self.soft_penalties = None
+        self.classes = kernel.empty_genome(number_of_classes)
+        self.criteria = kernel.empty_criteria(number_of_classes)
+
+    @property
+    def slots(self):
+        """Returns the classes occupying each (day, room, hour) slot."""
+        c = self.configuration.get_course_classes()
+        slots = [[] for _ in range(self.configuration.get_number_of_slots())]
+        for i, course_class in enumerate(c):
+            for k in range(course_class.get_duration()):
+                slots[self.classes[i] + k].append(course_class)
+        return slots
+
+    def copy(self, setup_only=False):
+        """
+        Create a copy of the schedule.
+
+        With ``setup_only`` only the parameters are copied and the copy starts out empty,
+        otherwise classes and criteria are copied as well.
+        """
+        new_schedule = copy.copy(self)
+        if setup_only:
+            new_schedule._reset()
+            return new_schedule
+
+        new_schedule.classes = self.classes.copy()
+        new_schedule.criteria = self.criteria.copy()
+        return new_schedule
+
+    def get_fitness(self):
+        """Returns the fitness of the schedule."""
+        return self.fitness
 
-        self.slots = DAYS_NUM * DAY_HOURS * Algorithm.instance.get_number_of_rooms() * [None]
-        self.criteria = Configuration.instance.get_number_of_course_classes() * 5
+    def get_penalty(self):
+        """Returns the penalty of the soft constraints of the schedule."""
+        return self.penalty
 
-    def copy(self):
-        """Create a deep copy of the schedule."""
-        return copy.deepcopy(self)
+    def get_placement(self, class_index):
+        """Returns the day, room index and start hour of the class at the given index."""
+        return self.configuration.get_slot(int(self.classes[class_index]))
+
+    def set_mutable_classes(self, class_indices):
+        """
+        Restricts mutations to the classes at the given indices, ``None`` allows all classes.
+
+        Copies of the schedule share the restriction.
+        """
+        self.mutable_classes = None if class_indices is None else list(class_indices)
 
     def make_new_from_prototype(self):
-        """Create a new schedule from the prototype."""
-        new_chromosome = self.copy()
-        new_chromosome.classes = {}
-        c = Configuration.instance.get_course_classes()
-        for it in c:
-            nr = Configuration.instance.get_number_of_rooms()
-            dur = c[it].get_duration()
-            day = randint(0, RAND16_MAX) % DAYS_NUM
-            room = randint(0, RAND16_MAX) % nr
-            time = randint(0, RAND16_MAX) % (DAY_HOURS + 1 - dur)
-            pos = day * nr * DAY_HOURS + room * DAY_HOURS + time
-
-            for i in range(dur - 1, -1, -1):
-                new_chromosome.slots[pos + i].push(c[it])
-
-            new_chromosome.classes[pos] = c[it]
-
-        new_chromosome._calculate_fitness()
+        """Create a new schedule placing each class at a random slot it may start at."""
+        configuration = self.configuration
+        c = configuration.get_course_classes()
+        genome = len(c) * [0]
+        for it, course_class in enumerate(c):
+            starts = configuration.get_valid_starts(course_class)
+            genome[it] = starts[self.random.randint(0, RAND16_MAX) % len(starts)]
+
+        return self.make_new_from_genome(genome)
+
+    def make_new_from_genome(self, genome, fitness=None):
+        """
+        Create a new schedule placing the i-th class at the slot position ``genome[i]``.
+
+        When the ``fitness`` of the genome is already known it is not calculated again, the
+        criteria and the soft penalties of the new schedule are left unset in that case.
+        """
+        new_chromosome = self.copy(setup_only=True)
+        new_chromosome.classes = self.configuration.kernel.as_genome(genome)
+
+        if fitness is None:
+            new_chromosome.calculate_fitness()
+        else:
+            new_chromosome.fitness = float(fitness)
         return new_chromosome
 
     def crossover(self, parent2):
-        """Crossover between two parents to create a new schedule."""
-        if randint(0, RAND16_MAX) % 100 > self.crossover_probability:
-            return Schedule.Schedule(self, False)
+        """
+        Crossover between two parents to create a new schedule.
 
-        n = Schedule.Schedule(self, True)
+        The genes of the child are taken from the parents according to the crossover operator:
+
+        - ``n_point`` switches parent after ``num_of_crossover_points`` random classes;
+        - ``uniform`` picks the parent of each class at random;
+        - ``day_block`` inherits the classes of random days from the first parent and of the
+          other days from the second, keeping the placements of whole days together;
+        - ``conflict_aware`` prefers the placement satisfying all criteria of a class, and
+          picks at random when both or none do. It needs the criteria of the parents.
+        """
+        if self.random.randint(0, RAND16_MAX) % 100 > self.crossover_probability:
+            return self.copy(setup_only=False)
+
+        n = self.copy(setup_only=True)
+        kernel = self.configuration.kernel
+        if self.crossover_operator == "n_point":
+            cp = self._get_crossover_points()
+            first = self.random.randint(0, 1) == 0
+            n.classes = kernel.crossover(self.classes, parent2.classes, cp, first)
+        else:
+            from_first = getattr(self, f"_{self.crossover_operator}_genes")(parent2)
+            n.classes = kernel.select(self.classes, parent2.classes, from_first)
+
+        n.calculate_fitness(self.classes, self.soft_penalties)
+        return n
+
+    def _get_crossover_points(self):
+        """Returns the flags of ``num_of_crossover_points`` random classes."""
         size = len(self.classes)
-        cp = size * [None]
+        cp = size * [False]
 
-        for _i in range(self.num_of_crossover_points, 0, -1):
+        for _i in range(min(self.num_of_crossover_points, size), 0, -1):
             while 1:
-                p = randint(0, RAND16_MAX) % size
+                p = self.random.randint(0, RAND16_MAX) % size
                 if not cp[p]:
                     cp[p] = True
                     break
+        return cp
 
-        j = 0
-        it1 = self.classes[j]
-        it2 = parent2.classes[j]
-        first = randint(0, 1) == 0
-        for i in range(0, size):
-            if first:
-                n.classes[j] = it1
-                for k in range(it1.get_duration() - 1, -1, -1):
-                    n.slots[j + k].push(it1)
-            else:
-                n.classes[j] = it2
-                for k in range(it2.get_duration() - 1, -1, -1):
-                    n.slots[j + k].push(it2)
-            if cp[i]:
-                first = not first
+    def _uniform_genes(self, _parent2):
+        """Returns which classes the child of a uniform crossover takes from this parent."""
+        return [self.random.randint(0, 1) == 0 for _i in range(len(self.classes))]
 
-            j = j + 1
+    def _day_block_genes(self, parent2):
+        """
+        Returns which classes the child of a day-block crossover takes from this parent.
 
-        n.calculate_fitness()
-        return n
+        These are the classes placed on the inherited days by either parent, so that no class
+        of the second parent lands on an inherited day.
+        """
+        day_size = self.configuration.get_day_size()
+        days = self.configuration.time_grid.days
+        inherited = np.array([self.random.randint(0, 1) == 0 for _i in range(days)])
+        days1 = np.asarray(self.classes) // day_size
+        days2 = np.asarray(parent2.classes) // day_size
+        return inherited[days1] | inherited[days2]
+
+    def _conflict_aware_genes(self, parent2):
+        """Returns which classes the child of a conflict-aware crossover takes from this parent."""
+        satisfied1 = np.asarray(self.criteria, dtype=np.bool_).reshape(-1, CRITERIA_NUM).all(1)
+        satisfied2 = np.asarray(parent2.criteria, dtype=np.bool_).reshape(-1, CRITERIA_NUM).all(1)
+        return [
+            bool(s1) if s1 != s2 else self.random.randint(0, 1) == 0
+            for s1, s2 in zip(satisfied1, satisfied2)
+        ]
+
+    def mutation(self, probability=None, size=None):
+        """
+        Mutate the schedule.
 
-    def mutation(self):
-        """Mutate the schedule."""
-        if randint(0, RAND16_MAX) % 100 > self.mutation_probability:
+        With the given mutation ``probability``, by default the one of the schedule, ``size``
+        classes (by default ``mutation_size``) are moved by the mutation operator to slots they
+        may start at, see ``Configuration.get_start_mask``:
+
+        - ``relocate`` places a class at a random slot;
+        - ``swap`` exchanges the slots of two classes, moving a class that may not start at its
+          new slot to the closest hour it may start at, unless it fits nowhere in that day;
+        - ``shift`` moves a class to a random hour of the same day and classroom;
+        - ``mixed`` picks one of these moves at random for each class.
+        """
+        probability = self.mutation_probability if probability is None else probability
+        size = self.mutation_size if size is None else size
+        if self.random.randint(0, RAND16_MAX) % 100 > probability:
             return None
 
-        number_of_classes = len(self.classes)
-
-        for i in range(self.mutation_size, 0, -1):
-            mpos = randint(0, RAND16_MAX) % number_of_classes
-            pos1 = _j = mpos
-
-            cc1 = self.classes[pos1]
-            nr = Schedule.instance.get_number_of_rooms()
-            dur = cc1.get_duration()
-            day = randint(0, RAND16_MAX) % DAYS_NUM
-            room = randint(0, RAND16_MAX) % nr
-            time = randint(0, RAND16_MAX) % (DAY_HOURS + 1 - dur)
-            pos2 = day * nr * DAY_HOURS + room * DAY_HOURS + time
-
-            for _j in range(dur - 1, -1, -1):
-                c1 = self.slots[pos1 + i]
-                for k in range(0, len(self.slots)):
-                    if c1[k] == cc1:
-                        del c1[k]
-                        break
-
-                self.slots[pos2 + i].push(cc1)
-
-            self.classes[cc1] = pos2
-
-        self.CalculateFitness()
-
-    def calculate_fitness(self):  # noqa: C901
-        """Calculate the fitness of the schedule."""
-        score = 0
-        number_of_rooms = Configuration.instance.get_number_of_rooms()
-        day_size = DAY_HOURS * number_of_rooms
-
-        ci = 0
-
-        for i in range(0, len(self.classes)):
-            p = i
-            day = p / day_size
-            time = p % day_size
-            room = time / DAY_HOURS
-            time = time % DAY_HOURS
-            dur = self.classes[i].get_duration()
-            ro = False
-
-            for j in range(dur - 1, -1, -1):
-                if self.slots[p + j].size() > 1:
-                    ro = True
-                    break
+        mutable = self.mutable_classes
+        if mutable is not None and not mutable:
+            return None
 
-            if not ro:
-                score = score + 1
+        candidates = range(len(self.classes)) if mutable is None else mutable
+        moved = {}
+        for _i in range(size, 0, -1):
+            move = self.mutation_operator
+            if move == "mixed":
+                move = MUTATION_MOVES[self.random.randint(0, RAND16_MAX) % len(MUTATION_MOVES)]
+            getattr(self, f"_{move}")(candidates, moved)
 
-            self.criteria[ci + 0] = not ro
+        incremental = self.soft_constraints is not None or self.assign_rooms
+        previous_classes = self.classes.copy() if incremental else None
+        self.configuration.kernel.mutation(self.classes, list(moved.keys()), list(moved.values()))
 
-            cc = self.classes[i]
-            r = Configuration.instance.get_room_by_id(room)
-            self.criteria[ci + 1] = r.get_number_of_seats() >= cc.get_number_of_seats()
-            if self.criteria[ci + 1]:
-                score = score + 1
+        self.calculate_fitness(previous_classes, self.soft_penalties)
+        return None
 
-            self.criteria[ci + 2] = (not cc.is_lab_required()) or (
-                cc.is_lab_required() and r.is_lab()
-            )
-            if self.criteria[ci + 2]:
-                score = score + 1
-
-            po = False
-            go = False
-            t = day * day_size + time
-            break_point = False
-            for k in range(number_of_rooms, 0, -1):
-                if break_point:
-                    break
-                for _l in range(dur - 1, -1, -1):
-                    if break_point:
-                        break
-                    cl = self.slots[t + k]
-                    for it in range(0, len(cl)):
-                        if cc != cl[it]:
-                            if not po and cc.is_teacher_overlapped(cl[it]):
-                                po = True
-                            if not go and cc.are_groups_overlapped(cl[it]):
-                                go = True
-                            if po and go:
-                                break_point = True
+    def _relocate(self, candidates, moved):
+        """Moves a random class to a random slot it may start at."""
+        configuration = self.configuration
+        c = configuration.get_course_classes()
+        mpos = candidates[self.random.randint(0, RAND16_MAX) % len(candidates)]
+
+        starts = configuration.get_valid_starts(c[mpos])
+        moved[mpos] = starts[self.random.randint(0, RAND16_MAX) % len(starts)]
+
+    def _swap(self, candidates, moved):
+        """Exchanges the slots of two random classes."""
+        configuration = self.configuration
+        c = configuration.get_course_classes()
+        first = candidates[self.random.randint(0, RAND16_MAX) % len(candidates)]
+        second = candidates[self.random.randint(0, RAND16_MAX) % len(candidates)]
+
+        p1 = _fit_position(configuration, c[second], int(moved.get(first, self.classes[first])))
+        p2 = _fit_position(configuration, c[first], int(moved.get(second, self.classes[second])))
+        if p1 is not None and p2 is not None:
+            moved[first] = p2
+            moved[second] = p1
+
+    def _shift(self, candidates, moved):
+        """Moves a random class to a random hour of its day and classroom it may start at."""
+        configuration = self.configuration
+        c = configuration.get_course_classes()
+        mpos = candidates[self.random.randint(0, RAND16_MAX) % len(candidates)]
+
+        p = int(moved.get(mpos, self.classes[mpos]))
+        starts = configuration.get_valid_day_starts(c[mpos], p)
+        if starts:
+            moved[mpos] = starts[self.random.randint(0, RAND16_MAX) % len(starts)]
+
+    def calculate_fitness(self, previous_classes=None, previous_penalties=None):
+        """
+        Calculate the fitness of the schedule.
 
-                t = t + DAY_HOURS
+        The fitness is the share of satisfied criteria. With soft constraints, the penalty of
+        the schedule lowers it by less than one criterion, ``penalty / (penalty + 1)``, so any
+        schedule satisfying more criteria stays fitter. The soft penalties are updated
+        incrementally from the ``previous_penalties`` of ``previous_classes`` if given.
 
-            if not po:
-                score = score + 1
-            self.criteria[ci + 3] = not po
+        With ``assign_rooms`` only the day and hour of the classes are kept, their classrooms
+        are matched to them first, see ``PythonKernel.assign_rooms``, on the days holding a
+        class placed differently than in ``previous_classes`` if given.
+        """
+        configuration = self.configuration
+        if self.assign_rooms:
+            configuration.kernel.assign_rooms(
+                self.classes, configuration.get_arrays(), self._get_changed_days(previous_classes)
+            )
+        score = configuration.kernel.fitness(
+            self.classes, configuration.get_arrays(), self.criteria
+        )
 
-            if not go:
-                score = score + 1
-            self.criteria[ci + 4] = not go
+        if self.soft_constraints is not None:
+            self.soft_penalties = self.soft_constraints.update(
+                previous_penalties, previous_classes, self.classes
+            )
+            self.penalty = float(self.soft_penalties.sum())
+            score -= self.penalty / (self.penalty + 1)
 
-            ci += 5
+        self.fitness = score / (len(self.classes) * CRITERIA_NUM)
 
-        self.fitness = score / (Configuration.instance.get_number_of_course_classes() * DAYS_NUM)
+    def _get_changed_days(self, previous_classes):
+        """Returns which days hold a class placed differently than in ``previous_classes``."""
+        configuration = self.configuration
+        if previous_classes is None:
+            return np.ones(configuration.time_grid.days, dtype=np.bool_)
+
+        genome = np.asarray(self.classes)
+        previous = np.asarray(previous_classes)
+        changed = genome != previous
+        days = np.zeros(configuration.time_grid.days, dtype=np.bool_)
+        days[genome[changed] // configuration.get_day_size()] = True
+        days[previous[changed] // configuration.get_day_size()] = True
+        return days
 
 
 class Algorithm:
     """
     Genetic Algorithm class to manage the evolution of schedules."""
 
-    def __init__(self, number_of_chromosomes, replace_by_generation, track_best, prototype):
-        """Initialize the genetic algorithm with the given parameters."""
+    def __init__(
+        self,
+        number_of_chromosomes,
+        replace_by_generation,
+        track_best,
+        prototype,
+        profiler=None,
+        adaptation=None,
+        diversity=None,
+    ):
+        """
+        Initialize the genetic algorithm with the given parameters.
+
+        When a ``profiler`` (see ``timetable_ga.profiling.OperatorProfiler``) is given, the
+        operators of the algorithm and of the schedules are recorded by it. An ``adaptation``
+        (see ``timetable_ga.adaptation.AdaptiveMutation``) adapts the mutation probability and
+        size of the prototype, used for all offspring, at the end of each generation. A
+        ``diversity`` tracker (see ``timetable_ga.diversity.DiversityTracker``) measures the
+        diversity of the population at the end of the generations. Selection and replacement
+        draw from the random generator of the prototype, see ``Schedule``.
+        """
         self.replace_by_generation = replace_by_generation
         self.prototype = prototype
+        self.random = prototype.random
+        self.profiler = profiler
+        self.adaptation = adaptation
+        self.diversity = diversity
         self.current_best_size = 0
         self.current_generation = 0
 
@@ -544,6 +1487,15 @@ class Algorithm:
         self.best_flags = number_of_chromosomes * [False]
         self.best_chromosomes = track_best * [None]
 
+        if self.profiler is not None:
+            self.profiler.instrument(self.prototype, SCHEDULE_OPERATORS)
+            self.profiler.instrument(self, ALGORITHM_OPERATORS)
+
+    @property
+    def configuration(self):
+        """Returns the configuration of the run, the one of the prototype."""
+        return self.prototype.configuration
+
     def get_instance():
         """Singleton method to get the instance of Algorithm class."""
         prototype = Schedule(2, 2, 80, 3)
@@ -551,54 +1503,180 @@ class Algorithm:
 
         return instance
 
-    def start(self):
-        """Starts the genetic algorithm."""
-        for it in range(len(self.chromosomes)):
-            if self.chromosomes[it]:
-                del self.chromosomes[it]
+    def start(
+        self,
+        max_generations=None,
+        initial_genomes=None,
+        max_seconds=None,
+        should_stop=None,
+        stop_check_interval=10,
+        checkpointer=None,
+        progress=None,
+    ):
+        """
+        Starts the genetic algorithm.
+
+        The population is seeded with ``initial_genomes`` if given, and filled up with random
+        chromosomes. Evolution stops when a schedule with fitness 1 is found or, if given,
+        after ``max_generations`` generations or ``max_seconds`` seconds, or when the
+        ``should_stop()`` callback, polled every ``stop_check_interval`` generations, returns
+        true. With a ``checkpointer`` (see ``timetable_ga.checkpoint.Checkpointer``) the
+        evolution resumes from its saved checkpoint, if any, and is checkpointed periodically.
+        ``progress(event)`` is called with the ``get_progress`` event of each generation.
+        Returns the best chromosome.
+        """
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        checkpoint = checkpointer.load() if checkpointer is not None else None
+        if checkpoint is not None:
+            self.restore(checkpoint)
+        else:
+            self._initialize(initial_genomes or [])
 
-            self.chromosomes[it] = self.prototype.make_new_from_prototype()
-            self.add_to_best(it)
+        if self.profiler is not None:
+            self.profiler.end_generation(self.current_generation)
 
-        self.current_generation = 0
-        random.seed()
         length_of_chromosomes = len(self.chromosomes)
 
         while 1:
             best = self.get_best_chromosome()
             if best.get_fitness() >= 1:
-                print("best", best.get_fitness(), best.score)
+                break
+
+            if self._is_stopped(max_generations, deadline, should_stop, stop_check_interval):
                 break
 
             offspring = self.replace_by_generation * [None]
             for j in range(0, self.replace_by_generation):
-                a = randint(0, RAND16_MAX) % length_of_chromosomes
-                b = randint(0, RAND16_MAX) % length_of_chromosomes
+                a = self.random.randint(0, RAND16_MAX) % length_of_chromosomes
+                b = self.random.randint(0, RAND16_MAX) % length_of_chromosomes
                 p1 = self.chromosomes[a]
                 p2 = self.chromosomes[b]
                 offspring[j] = p1.crossover(p2)
-                offspring[j].mutation()
+                offspring[j].mutation(
+                    self.prototype.mutation_probability, self.prototype.mutation_size
+                )
 
             for j in range(0, self.replace_by_generation):
-                ci = randint(0, RAND16_MAX) % len(self.chromosomes)
+                ci = self.random.randint(0, RAND16_MAX) % len(self.chromosomes)
                 while self.is_in_best(ci):
-                    ci = randint(0, RAND16_MAX) % len(self.chromosomes)
+                    ci = self.random.randint(0, RAND16_MAX) % len(self.chromosomes)
 
                 self.chromosomes[ci] = offspring[j]
                 self.add_to_best(ci)
 
-            self.current_generation = self.current_generation + 1
+            self._end_generation(checkpointer, progress)
+
+        return self.get_best_chromosome()
+
+    def _end_generation(self, checkpointer, progress):
+        """Counts a new generation and notifies the observers of the evolution."""
+        self.current_generation = self.current_generation + 1
+        if self.profiler is not None:
+            self.profiler.end_generation(self.current_generation)
+        if self.diversity is not None:
+            self.diversity.end_generation(self)
+        if self.adaptation is not None:
+            self.adaptation.end_generation(self)
+        if checkpointer is not None:
+            checkpointer.end_generation(self)
+        if progress is not None:
+            progress(self.get_progress())
+
+    def get_progress(self):
+        """
+        Returns the generation, the best fitness, the diversity of the population and the state
+        of the mutation control.
+        """
+        event = {
+            "generation": self.current_generation,
+            "best_fitness": float(self.get_chromosome_fitness(self.best_chromosomes[0])),
+        }
+        if self.diversity is not None:
+            event["diversity"] = self.diversity.to_dict()
+        if self.adaptation is not None:
+            event["mutation"] = self.adaptation.to_dict(self.prototype)
+        return event
+
+    def inject_immigrants(self, count):
+        """Replaces ``count`` random chromosomes, the best ones excepted, by random ones."""
+        for ci in self._get_immigrant_indices(count):
+            self.chromosomes[ci] = self.prototype.make_new_from_prototype()
+            self.add_to_best(ci)
+
+    def _get_immigrant_indices(self, count):
+        """Returns the indices of ``count`` random chromosomes, the best ones excepted."""
+        candidates = [i for i in range(len(self.chromosomes)) if not self.is_in_best(i)]
+        return self.random.sample(candidates, min(count, len(candidates)))
+
+    def _initialize(self, initial_genomes):
+        """Fills the population with ``initial_genomes`` and random chromosomes."""
+        self.clear_best()
+        for it in range(len(self.chromosomes)):
+            if it < len(initial_genomes):
+                self.chromosomes[it] = self.prototype.make_new_from_genome(initial_genomes[it])
+            else:
+                self.chromosomes[it] = self.prototype.make_new_from_prototype()
+            self.add_to_best(it)
+
+        self.current_generation = 0
+
+    def get_population(self):
+        """Returns the genomes and the fitness of the chromosomes as arrays."""
+        genomes = np.array([chromosome.classes for chromosome in self.chromosomes], dtype=np.int32)
+        fitness = np.array([chromosome.get_fitness() for chromosome in self.chromosomes])
+        return genomes, fitness
+
+    def restore(self, checkpoint):
+        """Restores the population, the best chromosomes, the generation and the RNG state."""
+        for it, genome in enumerate(checkpoint.genomes):
+            self.chromosomes[it] = self.prototype.make_new_from_genome(genome)
+        self._restore_state(checkpoint)
+
+    def _restore_state(self, checkpoint):
+        """
+        Restores the best chromosomes, the generation, the RNG state and the states of the
+        mutation control and the diversity tracker of a checkpoint.
+        """
+        self.clear_best()
+        for i, chromosome_index in enumerate(checkpoint.best_chromosomes):
+            self.best_chromosomes[i] = chromosome_index
+            self.best_flags[chromosome_index] = True
+        self.current_best_size = len(checkpoint.best_chromosomes)
+        self.current_generation = checkpoint.generation
+        self.random.setstate(checkpoint.rng_state)
+        if self.adaptation is not None and checkpoint.adaptation is not None:
+            self.adaptation.set_state(self.prototype, checkpoint.adaptation)
+        if self.diversity is not None and checkpoint.diversity is not None:
+            self.diversity.set_state(checkpoint.diversity)
+
+    def _is_stopped(self, max_generations, deadline, should_stop, stop_check_interval):
+        """Returns whether the evolution has to stop before the next generation."""
+        if max_generations is not None and self.current_generation >= max_generations:
+            return True
+
+        if deadline is not None and time.monotonic() >= deadline:
+            return True
+
+        return (
+            should_stop is not None
+            and self.current_generation % stop_check_interval == 0
+            and bool(should_stop())
+        )
 
     def get_best_chromosome(self):
         """Returns the best chromosome."""
         return self.chromosomes[self.best_chromosomes[0]]
 
+    def get_chromosome_fitness(self, chromosome_index):
+        """Returns the fitness of the chromosome at the given index."""
+        return self.chromosomes[chromosome_index].get_fitness()
+
     def add_to_best(self, chromosome_index):
         """Adds a chromosome to the best chromosomes list."""
         if (
             self.current_best_size == len(self.best_chromosomes)
-            and self.chromosomes[self.best_chromosomes[self.current_best_size - 1]].get_fitness()
-            >= self.chromosomes[chromosome_index].get_fitness()
+            and self.get_chromosome_fitness(self.best_chromosomes[self.current_best_size - 1])
+            >= self.get_chromosome_fitness(chromosome_index)
         ) or self.best_flags[chromosome_index]:
             return
 
@@ -606,10 +1684,9 @@ class Algorithm:
         j = 0
         for i in range(self.current_best_size, 0, -1):
             if i < len(self.best_chromosomes):
-                if (
-                    self.chromosomes[self.best_chromosomes[i - 1]].get_fitness()
-                    > self.chromosomes[chromosome_index].get_fitness()
-                ):
+                if self.get_chromosome_fitness(
+                    self.best_chromosomes[i - 1]
+                ) > self.get_chromosome_fitness(chromosome_index):
                     j = i
                     break
 
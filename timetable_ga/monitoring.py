@@ -0,0 +1,80 @@
+"""Prometheus metrics of the web service and the Celery workers."""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+TASK_LATENCY = Histogram(
+    "timetable_task_duration_seconds",
+    "Duration of timetable generation tasks.",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, float("inf")),
+)
+DATA_LOADING_TIME = Histogram(
+    "timetable_data_loading_seconds",
+    "Time spent loading the problem data from the backend.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf")),
+)
+BEST_FITNESS = Histogram(
+    "timetable_best_fitness",
+    "Fitness of the best schedule of finished runs.",
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0, float("inf")),
+)
+EVALUATIONS = Counter(
+    "timetable_evaluations",
+    "Schedules created and evaluated by the genetic algorithm.",
+)
+GENERATIONS = Counter(
+    "timetable_generations",
+    "Generations evolved by the genetic algorithm.",
+)
+CACHE_HITS = Counter(
+    "timetable_cache_hits",
+    "Requests served from a cache instead of a new run or a read of the result backend.",
+    ["cache"],
+)
+ACTIVE_RUNS = Gauge(
+    "timetable_active_runs",
+    "Timetable generation tasks currently running.",
+    multiprocess_mode="livesum",
+)
+QUEUE_DEPTH = Gauge(
+    "timetable_queue_depth",
+    "Messages waiting in the broker queue.",
+    ["queue"],
+    multiprocess_mode="max",
+)
+
+
+def get_registry():
+    """
+    Returns the registry to export.
+
+    When ``PROMETHEUS_MULTIPROC_DIR`` is set, metrics of all processes (prefork Celery children,
+    uvicorn workers) are collected from the shared directory.
+    """
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics():
+    """Returns the exposition of the metrics and its content type."""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int):
+    """Starts an HTTP server exporting the metrics in a background thread."""
+    start_http_server(port, registry=get_registry())
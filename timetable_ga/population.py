@@ -0,0 +1,307 @@
+"""Population of schedules stored in shared memory for multi-process evolution."""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from timetable_ga.ga_consts import RAND16_MAX
+from timetable_ga.models import Algorithm
+
+# State of a worker process, set up once by the pool initializer
+_worker = {}
+
+
+class SharedPopulation:
+    """
+    Genomes and fitness of a population stored in one shared memory block.
+
+    ``genomes[i]`` holds the slot positions of the classes of the i-th chromosome (see
+    ``Schedule.classes``) and ``fitness[i]`` its fitness. Processes attached to the block by
+    its name read and write both arrays in place, without serialization.
+    """
+
+    def __init__(self, number_of_chromosomes, number_of_classes, name=None):
+        """
+        Create a new shared block, or attach to the existing block ``name``.
+
+        Only the creator of the block unlinks it.
+        """
+        self.shape = (number_of_chromosomes, number_of_classes)
+        fitness_size = number_of_chromosomes * np.dtype(np.float64).itemsize
+        genomes_size = number_of_chromosomes * number_of_classes * np.dtype(np.int32).itemsize
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=fitness_size + genomes_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+
+        self.fitness = np.ndarray((number_of_chromosomes,), dtype=np.float64, buffer=self.shm.buf)
+        self.genomes = np.ndarray(
+            self.shape, dtype=np.int32, buffer=self.shm.buf, offset=fitness_size
+        )
+
+    @property
+    def name(self):
+        """Returns the name of the shared memory block."""
+        return self.shm.name
+
+    def close(self):
+        """Detaches from the shared memory block and unlinks it if owned."""
+        self.fitness = None
+        self.genomes = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        """Returns the population."""
+        return self
+
+    def __exit__(self, *_args):
+        """Closes the population."""
+        self.close()
+
+
+def _init_worker(prototype, population, offspring):
+    """
+    Attaches a worker process to the shared populations, its copy of the prototype drawing
+    from a generator seeded anew so that workers breed different offspring.
+    """
+    prototype.random.seed()
+    _worker["prototype"] = prototype
+    _worker["population"] = SharedPopulation(*population)
+    _worker["offspring"] = SharedPopulation(*offspring)
+
+
+def _make_new(chromosome_index):
+    """Writes a new random chromosome to the given row of the population."""
+    population = _worker["population"]
+    chromosome = _worker["prototype"].make_new_from_prototype()
+    population.genomes[chromosome_index] = chromosome.classes
+    population.fitness[chromosome_index] = chromosome.get_fitness()
+
+
+def _evaluate(chromosome_index):
+    """Evaluates the chromosome in the given row of the population."""
+    population = _worker["population"]
+    chromosome = _worker["prototype"].make_new_from_genome(population.genomes[chromosome_index])
+    population.fitness[chromosome_index] = chromosome.get_fitness()
+
+
+def _breed(task):
+    """Writes the offspring of two chromosomes of the population to a row of the offspring."""
+    offspring_index, parent1_index, parent2_index, mutation_probability, mutation_size = task
+    population = _worker["population"]
+    offspring = _worker["offspring"]
+    prototype = _worker["prototype"]
+    # The conflict-aware crossover needs the criteria of the parents, evaluated again for it
+    known = prototype.crossover_operator != "conflict_aware"
+
+    parent1 = prototype.make_new_from_genome(
+        population.genomes[parent1_index], population.fitness[parent1_index] if known else None
+    )
+    parent2 = prototype.make_new_from_genome(
+        population.genomes[parent2_index], population.fitness[parent2_index] if known else None
+    )
+    child = parent1.crossover(parent2)
+    child.mutation(mutation_probability, mutation_size)
+
+    offspring.genomes[offspring_index] = child.classes
+    offspring.fitness[offspring_index] = child.get_fitness()
+
+
+class ParallelAlgorithm(Algorithm):
+    """
+    Genetic algorithm evaluating chromosomes in a pool of worker processes.
+
+    The population lives in a ``SharedPopulation``; the main process only selects parents,
+    replaces chromosomes and tracks the best ones by index. Workers rebuild the schedules they
+    need from the shared genomes. Worker processes cannot be started from daemonic processes,
+    so inside Celery this requires a non-prefork worker pool.
+    """
+
+    def __init__(
+        self,
+        number_of_chromosomes,
+        replace_by_generation,
+        track_best,
+        prototype,
+        processes=None,
+        profiler=None,
+        adaptation=None,
+        diversity=None,
+    ):
+        """
+        Initialize the genetic algorithm with the given parameters.
+
+        ``processes`` is the number of worker processes, by default the number of CPUs.
+        Operators running in the workers are not profiled.
+        """
+        super().__init__(
+            number_of_chromosomes,
+            replace_by_generation,
+            track_best,
+            prototype,
+            adaptation=adaptation,
+            diversity=diversity,
+        )
+        self.processes = processes
+        self.population = None
+        self.pool = None
+        self.profiler = profiler
+        if self.profiler is not None:
+            self.profiler.instrument(self, ("add_to_best",))
+
+    def get_chromosome_fitness(self, chromosome_index):
+        """Returns the fitness of the chromosome at the given index."""
+        if self.population is None:
+            return super().get_chromosome_fitness(chromosome_index)
+        return self.population.fitness[chromosome_index]
+
+    def get_population(self):
+        """Returns copies of the genomes and the fitness of the shared population."""
+        if self.population is None:
+            return super().get_population()
+        return self.population.genomes.copy(), self.population.fitness.copy()
+
+    def restore(self, checkpoint):
+        """Restores the shared population and the state of the algorithm from a checkpoint."""
+        if self.population is None:
+            super().restore(checkpoint)
+            return
+        self.population.genomes[:] = checkpoint.genomes
+        self.population.fitness[:] = checkpoint.fitness
+        self._restore_state(checkpoint)
+
+    def inject_immigrants(self, count):
+        """Replaces ``count`` random chromosomes, the best ones excepted, by random ones."""
+        if self.population is None:
+            super().inject_immigrants(count)
+            return
+        indices = self._get_immigrant_indices(count)
+        self.pool.map(_make_new, indices)
+        for ci in indices:
+            self.add_to_best(ci)
+
+    def start(
+        self,
+        max_generations=None,
+        initial_genomes=None,
+        max_seconds=None,
+        should_stop=None,
+        stop_check_interval=10,
+        checkpointer=None,
+        progress=None,
+    ):
+        """
+        Starts the genetic algorithm.
+
+        The population is seeded with ``initial_genomes`` if given, and filled up with random
+        chromosomes, unless resumed from the checkpoint of the ``checkpointer``. Evolution stops
+        as in ``Algorithm.start``. Returns the best chromosome.
+        """
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        stop = (max_generations, deadline, should_stop, stop_check_interval)
+        number_of_chromosomes = len(self.chromosomes)
+        number_of_classes = len(self.prototype.classes)
+
+        with (
+            SharedPopulation(number_of_chromosomes, number_of_classes) as population,
+            SharedPopulation(self.replace_by_generation, number_of_classes) as offspring,
+            multiprocessing.get_context().Pool(
+                self.processes,
+                initializer=_init_worker,
+                initargs=(
+                    self.prototype,
+                    (*population.shape, population.name),
+                    (*offspring.shape, offspring.name),
+                ),
+            ) as pool,
+        ):
+            self.population = population
+            self.pool = pool
+            try:
+                checkpoint = checkpointer.load() if checkpointer is not None else None
+                if checkpoint is not None:
+                    self.restore(checkpoint)
+                else:
+                    self._initialize_shared(pool, initial_genomes or [])
+                self._evolve(pool, offspring, checkpointer, progress, *stop)
+            finally:
+                for chromosome_index in self.best_chromosomes[: self.current_best_size]:
+                    self.chromosomes[chromosome_index] = self.prototype.make_new_from_genome(
+                        population.genomes[chromosome_index]
+                    )
+                self.population = None
+                self.pool = None
+
+        return self.get_best_chromosome()
+
+    def _initialize_shared(self, pool, initial_genomes):
+        """Fills the shared population with ``initial_genomes`` and random chromosomes."""
+        population = self.population
+        number_of_chromosomes = len(self.chromosomes)
+        number_of_seeds = min(len(initial_genomes), number_of_chromosomes)
+
+        self.clear_best()
+        for it in range(number_of_seeds):
+            population.genomes[it] = initial_genomes[it]
+        pool.map(_evaluate, range(number_of_seeds))
+        pool.map(_make_new, range(number_of_seeds, number_of_chromosomes))
+        for it in range(number_of_chromosomes):
+            self.add_to_best(it)
+
+        self.current_generation = 0
+
+    def _evolve(
+        self,
+        pool,
+        offspring,
+        checkpointer,
+        progress,
+        max_generations,
+        deadline,
+        should_stop,
+        stop_check_interval,
+    ):
+        """Runs the generations of the algorithm on the shared population."""
+        population = self.population
+        number_of_chromosomes = len(self.chromosomes)
+
+        if self.profiler is not None:
+            self.profiler.end_generation(self.current_generation)
+
+        while 1:
+            if population.fitness[self.best_chromosomes[0]] >= 1:
+                break
+
+            if self._is_stopped(max_generations, deadline, should_stop, stop_check_interval):
+                break
+
+            pool.map(
+                _breed,
+                [
+                    (
+                        j,
+                        self.random.randint(0, RAND16_MAX) % number_of_chromosomes,
+                        self.random.randint(0, RAND16_MAX) % number_of_chromosomes,
+                        self.prototype.mutation_probability,
+                        self.prototype.mutation_size,
+                    )
+                    for j in range(self.replace_by_generation)
+                ],
+            )
+
+            for j in range(0, self.replace_by_generation):
+                ci = self.random.randint(0, RAND16_MAX) % number_of_chromosomes
+                while self.is_in_best(ci):
+                    ci = self.random.randint(0, RAND16_MAX) % number_of_chromosomes
+
+                population.genomes[ci] = offspring.genomes[j]
+                population.fitness[ci] = offspring.fitness[j]
+                self.add_to_best(ci)
+
+            self._end_generation(checkpointer, progress)
@@ -0,0 +1,293 @@
+"""Parameters of the genetic algorithm and problems submitted inline with a request."""
+
+import multiprocessing
+from typing import Annotated, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, model_validator
+
+from timetable_ga.adaptation import AdaptiveMutation
+from timetable_ga.constraints import SoftConstraints, SoftConstraintWeights
+from timetable_ga.diversity import DiversityTracker
+from timetable_ga.models import (
+    Algorithm,
+    Classroom,
+    Configuration,
+    Course,
+    CourseClass,
+    CrossoverOperator,
+    MutationOperator,
+    Schedule,
+    StudentsGroup,
+    Teacher,
+    TimeGrid,
+    start_entity_registry,
+)
+from timetable_ga.population import ParallelAlgorithm
+
+
+class GAParameters(BaseModel):
+    """
+    Model representing the parameters of a run of the genetic algorithm.
+
+    Probabilities are percentages, the crossover and mutation operators are described at
+    ``Schedule.crossover`` and ``Schedule.mutation``. With ``adaptive_mutation`` the mutation
+    probability and size are only initial values, see ``AdaptiveMutation``. The diversity of
+    the population is measured every ``diversity_interval`` generations (never if 0), and the
+    ``immigrants`` share of the population is replaced when its entropy falls under
+    ``min_entropy``, see ``DiversityTracker``. With ``soft_constraints`` the penalties of the
+    schedules lower their fitness, see ``SoftConstraints``. With ``assign_rooms`` only the days
+    and hours of the classes evolve, classrooms being matched to them, see
+    ``Schedule.calculate_fitness``. With ``decompose`` the independent subproblems of the
+    problem are solved separately first, see ``solve_decomposed``. With more than one of
+    ``processes`` the chromosomes are bred and evaluated, and the subproblems solved, in pools
+    of that many worker processes, see ``ParallelAlgorithm``, except inside daemonic processes
+    like prefork Celery workers, which cannot start any. Without ``max_generations``
+    or ``max_seconds`` the run evolves until a schedule satisfying all criteria, without any
+    penalty, is found, or until the time limit of its queue.
+    """
+
+    number_of_chromosomes: int = Field(100, ge=2, le=10000)
+    replace_by_generation: int = Field(8, ge=1)
+    track_best: int = Field(5, ge=1)
+    num_of_crossover_points: int = Field(2, ge=1, le=1000)
+    mutation_size: int = Field(2, ge=1, le=1000)
+    crossover_probability: float = Field(80.0, ge=0, le=100)
+    mutation_probability: float = Field(3.0, ge=0, le=100)
+    crossover_operator: CrossoverOperator = "n_point"
+    mutation_operator: MutationOperator = "relocate"
+    adaptive_mutation: bool = False
+    diversity_interval: int = Field(10, ge=0)
+    min_entropy: float = Field(0.0, ge=0, le=1)
+    immigrants: float = Field(0.1, ge=0, le=1)
+    soft_constraints: Optional[SoftConstraintWeights] = None
+    assign_rooms: bool = False
+    decompose: bool = False
+    processes: int = Field(1, ge=1, le=64)
+    max_generations: Optional[int] = Field(None, ge=0)
+    max_seconds: Optional[float] = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def check_population(self):
+        """Checks that the replaced and the best chromosomes fit in the population."""
+        if self.track_best >= self.number_of_chromosomes:
+            raise ValueError("track_best must be less than number_of_chromosomes")
+        if self.replace_by_generation > self.number_of_chromosomes - self.track_best:
+            raise ValueError(
+                "replace_by_generation must be at most number_of_chromosomes - track_best"
+            )
+        return self
+
+    def make_algorithm(self, configuration=None, profiler=None, seed=None) -> Algorithm:
+        """
+        Returns the algorithm and its prototype schedule set up with the parameters, for the
+        ``configuration`` of the run, the last configuration created by default. The random
+        generator of the run is seeded with ``seed`` if given, see ``Schedule``.
+        """
+        configuration = Configuration.instance if configuration is None else configuration
+        prototype = Schedule(
+            self.num_of_crossover_points,
+            self.mutation_size,
+            self.crossover_probability,
+            self.mutation_probability,
+            self.crossover_operator,
+            self.mutation_operator,
+            self.make_soft_constraints(configuration),
+            self.assign_rooms,
+            configuration,
+            seed,
+        )
+        adaptation = AdaptiveMutation() if self.adaptive_mutation else None
+        if self.processes > 1 and not multiprocessing.current_process().daemon:
+            return ParallelAlgorithm(
+                self.number_of_chromosomes,
+                self.replace_by_generation,
+                self.track_best,
+                prototype,
+                processes=self.processes,
+                profiler=profiler,
+                adaptation=adaptation,
+                diversity=self.make_diversity_tracker(),
+            )
+        return Algorithm(
+            self.number_of_chromosomes,
+            self.replace_by_generation,
+            self.track_best,
+            prototype,
+            profiler=profiler,
+            adaptation=adaptation,
+            diversity=self.make_diversity_tracker(),
+        )
+
+    def make_soft_constraints(self, configuration) -> Optional[SoftConstraints]:
+        """Returns the soft constraints of the configuration, ``None`` if not weighted."""
+        if self.soft_constraints is None:
+            return None
+        return SoftConstraints(configuration, self.soft_constraints)
+
+    def make_diversity_tracker(self) -> Optional[DiversityTracker]:
+        """Returns the diversity tracker of the run, or ``None`` if diversity is not measured."""
+        if self.diversity_interval == 0:
+            return None
+        return DiversityTracker(
+            self.diversity_interval, min_entropy=self.min_entropy, immigrants=self.immigrants
+        )
+
+
+class ClassroomPayload(BaseModel):
+    """
+    Model representing a classroom of an inline problem.
+    """
+
+    id: str
+    name: str
+    is_lab: bool = False
+    number_of_seats: int = Field(1000, ge=0)
+    unavailable_periods: List[Tuple[int, int]] = []
+
+
+class TeacherPayload(BaseModel):
+    """
+    Model representing a teacher of an inline problem.
+    """
+
+    id: str
+    name: str
+    lunch_break_needed: bool = False
+    preferred_hours: List[Annotated[int, Field(ge=0)]] = []
+
+
+class CoursePayload(BaseModel):
+    """
+    Model representing a course of an inline problem.
+    """
+
+    id: str
+    name: str
+
+
+class StudentsGroupPayload(BaseModel):
+    """
+    Model representing a group of students of an inline problem.
+    """
+
+    id: str
+    name: str
+    number_of_students: int = Field(ge=0)
+
+
+class CourseClassPayload(BaseModel):
+    """
+    Model representing a course class of an inline problem, referencing the other entities by
+    their IDs.
+    """
+
+    id: str
+    teacher: str
+    course: str
+    groups: List[str] = []
+    is_lab_required: bool = False
+    duration: int = Field(1, ge=1)
+
+
+class ProblemPayload(BaseModel):
+    """
+    Model representing a problem submitted inline instead of fetched from the backend, over
+    the week of its ``time_grid``.
+    """
+
+    time_grid: TimeGrid = TimeGrid()
+    classrooms: List[ClassroomPayload] = Field(min_length=1)
+    teachers: List[TeacherPayload]
+    courses: List[CoursePayload]
+    student_groups: List[StudentsGroupPayload]
+    course_classes: List[CourseClassPayload] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check_references(self):
+        """Checks that IDs are unique and that the classes reference existing entities."""
+        entities = {}
+        for field in ("classrooms", "teachers", "courses", "student_groups", "course_classes"):
+            ids = [entity.id for entity in getattr(self, field)]
+            if len(set(ids)) != len(ids):
+                raise ValueError(f"Duplicate IDs in {field}")
+            entities[field] = set(ids)
+
+        for course_class in self.course_classes:
+            if course_class.teacher not in entities["teachers"]:
+                raise ValueError(f"Unknown teacher {course_class.teacher}")
+            if course_class.course not in entities["courses"]:
+                raise ValueError(f"Unknown course {course_class.course}")
+            for group in course_class.groups:
+                if group not in entities["student_groups"]:
+                    raise ValueError(f"Unknown student group {group}")
+        return self
+
+    @model_validator(mode="after")
+    def check_time_grid(self):
+        """Checks that the durations, periods and hours of the problem fit its week."""
+        for course_class in self.course_classes:
+            if course_class.duration > self.time_grid.day_hours:
+                raise ValueError(f"Class {course_class.id} is longer than a day")
+        for room in self.classrooms:
+            for period in room.unavailable_periods:
+                self.time_grid.check_period(period)
+        for teacher in self.teachers:
+            if any(hour >= self.time_grid.day_hours for hour in teacher.preferred_hours):
+                raise ValueError(f"Preferred hours of teacher {teacher.id} past the end of the day")
+        return self
+
+    def to_configuration(self) -> Configuration:
+        """Returns the configuration of the problem, its entities in a new entity registry."""
+        registry = start_entity_registry()
+
+        classrooms = [
+            Classroom(
+                backend_id=room.id,
+                name=room.name,
+                is_lab=room.is_lab,
+                number_of_seats=room.number_of_seats,
+                unavailable_periods=room.unavailable_periods,
+            )
+            for room in self.classrooms
+        ]
+        teachers = [
+            Teacher(
+                backend_id=teacher.id,
+                name=teacher.name,
+                lunch_break_needed=teacher.lunch_break_needed,
+                preferred_hours=teacher.preferred_hours,
+            )
+            for teacher in self.teachers
+        ]
+        courses = [Course(backend_id=course.id, name=course.name) for course in self.courses]
+        student_groups = [
+            StudentsGroup(
+                backend_id=group.id,
+                name=group.name,
+                number_of_students=group.number_of_students,
+            )
+            for group in self.student_groups
+        ]
+        course_classes = [
+            CourseClass(
+                backend_id=course_class.id,
+                teacher=registry.get_by_backend_id(Teacher, course_class.teacher),
+                course=registry.get_by_backend_id(Course, course_class.course),
+                groups=[
+                    registry.get_by_backend_id(StudentsGroup, group)
+                    for group in course_class.groups
+                ],
+                is_lab_required=course_class.is_lab_required,
+                duration=course_class.duration,
+            )
+            for course_class in self.course_classes
+        ]
+
+        return Configuration(
+            classrooms=classrooms,
+            teachers=teachers,
+            courses=courses,
+            student_groups=student_groups,
+            course_classes=course_classes,
+            time_grid=self.time_grid,
+        )
@@ -0,0 +1,130 @@
+"""Lightweight per-operator profiling of the genetic algorithm."""
+
+import sys
+import time
+from functools import wraps
+
+# Operators of the schedules that are profiled
+SCHEDULE_OPERATORS = ("make_new_from_prototype", "crossover", "mutation", "calculate_fitness")
+
+# Operators of the algorithm that are profiled
+ALGORITHM_OPERATORS = ("add_to_best",)
+
+# Maximum number of records of generations kept by a profiler, see ``OperatorProfiler``
+MAX_GENERATION_RECORDS = 100
+
+
+class OperatorProfiler:
+    """
+    Records cumulative time, call counts and allocated memory blocks per operator and per
+    generation.
+
+    Times and blocks are exclusive: the cost of ``calculate_fitness`` called from ``crossover``
+    is only accounted to ``calculate_fitness``. Objects are instrumented by swapping their class
+    for a subclass with wrapped operators, so uninstrumented objects run at full speed.
+
+    Each record of ``generations`` covers ``generations`` consecutive generations from its
+    ``generation``. Past ``max_records`` records, adjacent records are merged in pairs and the
+    following records cover twice as many generations, so long runs keep a bounded profile of
+    their whole evolution; ``operators`` holds the totals of the run.
+    """
+
+    def __init__(self, max_records=MAX_GENERATION_RECORDS):
+        """Initialize an empty profiler."""
+        self.operators = {}
+        self.generations = []
+        self.max_records = max_records
+        self.generations_per_record = 1
+        self._stack = []
+        self._subclasses = {}
+        self._generation_start = time.perf_counter()
+        self._generation_totals = {}
+
+    def wrap(self, name, func):
+        """Returns ``func`` wrapped so that its calls are recorded under ``name``."""
+        stats = self.operators.setdefault(name, {"calls": 0, "time": 0.0, "allocated_blocks": 0})
+        stack = self._stack
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            stack.append([0.0, 0])
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                allocated = sys.getallocatedblocks() - blocks
+                child_time, child_allocated = stack.pop()
+                if stack:
+                    stack[-1][0] += elapsed
+                    stack[-1][1] += allocated
+                stats["calls"] += 1
+                stats["time"] += elapsed - child_time
+                stats["allocated_blocks"] += allocated - child_allocated
+
+        return wrapper
+
+    def instrument(self, obj, names):
+        """Makes the operators ``names`` of ``obj`` (and of its copies) recorded."""
+        cls = type(obj)
+        if cls not in self._subclasses.values():
+            if cls not in self._subclasses:
+                attributes = {name: self.wrap(name, getattr(cls, name)) for name in names}
+                self._subclasses[cls] = type(cls.__name__, (cls,), attributes)
+            obj.__class__ = self._subclasses[cls]
+        return obj
+
+    def end_generation(self, generation):
+        """Records the operator calls made since the end of the previous generation."""
+        now = time.perf_counter()
+        operators = {}
+        for name, stats in self.operators.items():
+            calls, spent = self._generation_totals.get(name, (0, 0.0))
+            operators[name] = {"calls": stats["calls"] - calls, "time": stats["time"] - spent}
+            self._generation_totals[name] = (stats["calls"], stats["time"])
+
+        record = {
+            "generation": generation,
+            "generations": 1,
+            "duration": now - self._generation_start,
+            "operators": operators,
+        }
+        self._generation_start = now
+
+        if self.generations and self.generations[-1]["generations"] < self.generations_per_record:
+            self.generations[-1] = _merge_records(self.generations[-1], record)
+        else:
+            self.generations.append(record)
+        if len(self.generations) > self.max_records:
+            self.generations = [
+                _merge_records(*self.generations[i : i + 2])
+                for i in range(0, len(self.generations), 2)
+            ]
+            self.generations_per_record *= 2
+
+    def to_dict(self):
+        """Returns the recorded statistics as a JSON serializable dictionary."""
+        return {
+            "operators": {name: dict(stats) for name, stats in self.operators.items()},
+            "generations": list(self.generations),
+        }
+
+
+def _merge_records(first, second=None):
+    """Returns the record of the generations of two consecutive records, or of ``first``."""
+    if second is None:
+        return first
+    operators = {}
+    for name in {**first["operators"], **second["operators"]}:
+        stats = [r["operators"].get(name, {"calls": 0, "time": 0.0}) for r in (first, second)]
+        operators[name] = {
+            "calls": stats[0]["calls"] + stats[1]["calls"],
+            "time": stats[0]["time"] + stats[1]["time"],
+        }
+    return {
+        "generation": first["generation"],
+        "generations": first["generations"] + second["generations"],
+        "duration": first["duration"] + second["duration"],
+        "operators": operators,
+    }
@@ -0,0 +1,36 @@
+"""Progress events of running timetable tasks."""
+
+import os
+import time
+
+# Celery state of the tasks reporting their progress
+PROGRESS = "PROGRESS"
+
+
+class ProgressReporter:
+    """
+    Callable publishing the progress events of an evolution as the ``PROGRESS`` state of its
+    task, to be passed as the ``progress`` callback of ``Algorithm.start``.
+
+    At most one event is published every ``interval`` seconds, the others are dropped.
+    """
+
+    def __init__(self, task, interval=1.0):
+        """Initialize the reporter of the current request of the task."""
+        self.task = task
+        self.interval = interval
+        self._last_report = None
+
+    def __call__(self, event: dict):
+        """Publishes the event unless one was published less than ``interval`` seconds ago."""
+        now = time.monotonic()
+        if self._last_report is not None and now - self._last_report < self.interval:
+            return
+
+        self._last_report = now
+        self.task.update_state(state=PROGRESS, meta=event)
+
+
+def get_progress_interval() -> float:
+    """Returns ``PROGRESS_INTERVAL``, the seconds between progress events, 1 by default."""
+    return float(os.getenv("PROGRESS_INTERVAL", "1"))
@@ -0,0 +1,137 @@
+"""Routing of timetable tasks to queues by problem size and per-tenant concurrency limits."""
+
+import os
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+from timetable_ga.models import Configuration
+
+# Prefix of the Redis keys holding the running tasks of the tenants
+TENANT_PREFIX = "timetable-ga:tenant-runs:"
+
+# Share of the soft time limit given to the evolution, the rest is left to store the result
+EVOLUTION_TIME_SHARE = 0.9
+
+
+class QueueRoute(BaseModel):
+    """
+    Model representing a queue of timetable tasks and the limits of the runs it takes.
+
+    Problems of at most ``max_size`` (classes x classrooms) are routed to the queue, without
+    ``max_size`` any problem is. Priorities are those of the Redis broker, 0 is the highest.
+    """
+
+    queue: str
+    max_size: Optional[int] = None
+    priority: int
+    soft_time_limit: int
+    time_limit: int
+
+    def get_options(self, priority: Optional[int] = None) -> dict:
+        """Returns the options of ``send_task`` sending a task to the queue."""
+        return {
+            "queue": self.queue,
+            "priority": self.priority if priority is None else priority,
+            "soft_time_limit": self.soft_time_limit,
+            "time_limit": self.time_limit,
+        }
+
+
+# Queues by increasing problem size
+QUEUE_ROUTES = (
+    QueueRoute(
+        queue="timetable-preview",
+        max_size=5_000,
+        priority=0,
+        soft_time_limit=60,
+        time_limit=90,
+    ),
+    QueueRoute(
+        queue="timetable-standard",
+        max_size=500_000,
+        priority=5,
+        soft_time_limit=900,
+        time_limit=960,
+    ),
+    QueueRoute(
+        queue="timetable-large",
+        priority=9,
+        soft_time_limit=7200,
+        time_limit=7500,
+    ),
+)
+
+# Queue of the tasks that are not routed by size
+DEFAULT_ROUTE = QUEUE_ROUTES[1]
+
+
+def get_problem_size(configuration: Configuration) -> int:
+    """Returns the estimated size of the problem, the number of (class, classroom) pairs."""
+    return configuration.get_number_of_course_classes() * configuration.get_number_of_classrooms()
+
+
+def route_problem(configuration: Configuration) -> QueueRoute:
+    """Returns the route of the smallest queue taking the problem."""
+    return route_size(get_problem_size(configuration))
+
+
+def route_size(size: int) -> QueueRoute:
+    """Returns the route of the smallest queue taking problems of the given size."""
+    for route in QUEUE_ROUTES:
+        if route.max_size is None or size <= route.max_size:
+            return route
+    return QUEUE_ROUTES[-1]
+
+
+def get_evolution_budget(soft_time_limit: Optional[float]) -> Optional[float]:
+    """Returns the seconds the evolution may take within the soft time limit of a task."""
+    if not soft_time_limit:
+        return None
+    return soft_time_limit * EVOLUTION_TIME_SHARE
+
+
+class TenantLimiter:
+    """
+    Limits the number of tasks of a tenant running at the same time.
+
+    Running tasks are kept in a Redis sorted set per tenant, scored by the expiry of their
+    lease, so slots of killed workers are freed when their lease expires. The set itself
+    expires with the longest lease it holds.
+    """
+
+    def __init__(self, client, limit: int):
+        """Initialize the limiter with a Redis client and the number of runs per tenant."""
+        self.client = client
+        self.limit = limit
+
+    def acquire(self, tenant: str, task_id: str, lease: float) -> bool:
+        """Takes a slot of the tenant for ``lease`` seconds, returns whether one was free."""
+        key = TENANT_PREFIX + tenant
+
+        def take_slot(pipe):
+            """Takes the slot if free, in a transaction watching the running tasks."""
+            now = time.time()
+            running = pipe.zcount(key, now, "+inf")
+            holding = (pipe.zscore(key, task_id) or 0) > now
+            longest = pipe.zrange(key, -1, -1, withscores=True)
+            expiry = max([now + lease] + [score for _task_id, score in longest])
+            pipe.multi()
+            pipe.zremrangebyscore(key, "-inf", now)
+            if not holding and running >= self.limit:
+                return False
+            pipe.zadd(key, {task_id: now + lease})
+            pipe.expireat(key, int(expiry) + 1)
+            return True
+
+        return self.client.transaction(take_slot, key, value_from_callable=True)
+
+    def release(self, tenant: str, task_id: str):
+        """Frees the slot of the tenant taken by the task."""
+        self.client.zrem(TENANT_PREFIX + tenant, task_id)
+
+
+def get_tenant_limit() -> int:
+    """Returns ``TENANT_MAX_CONCURRENT_RUNS``, 2 by default; 0 disables the limit."""
+    return int(os.getenv("TENANT_MAX_CONCURRENT_RUNS", "2"))
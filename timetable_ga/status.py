@@ -0,0 +1,126 @@
+"""Non-blocking reads of the states of Celery tasks from the Redis result backend."""
+
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from celery import states
+from redis import asyncio as aioredis
+
+from timetable_ga.monitoring import CACHE_HITS
+
+
+class StatusCache:
+    """
+    Bounded in-process cache of the metadata of tasks.
+
+    Tasks in a ready state (finished, failed or revoked) never change state and are kept until
+    evicted, the least recently read first. Other tasks are kept ``ttl`` seconds, so that the
+    clients polling a running task share a read of the backend per ``ttl``; 0 disables it.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        """Initialize an empty cache."""
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, task_id: str) -> Optional[dict]:
+        """Returns the cached metadata of the task, or ``None`` if missing or expired."""
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return None
+        expires, meta = entry
+        if expires is not None and expires < time.monotonic():
+            del self._entries[task_id]
+            return None
+        self._entries.move_to_end(task_id)
+        CACHE_HITS.labels(cache="status").inc()
+        return meta
+
+    def put(self, task_id: str, meta: dict):
+        """Caches the metadata of the task, forever if its state is ready."""
+        if meta["status"] in states.READY_STATES:
+            expires = None
+        elif self.ttl > 0:
+            expires = time.monotonic() + self.ttl
+        else:
+            self._entries.pop(task_id, None)
+            return
+        self._entries[task_id] = (expires, meta)
+        self._entries.move_to_end(task_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class TaskStatusReader:
+    """
+    Reads the metadata of tasks, as ``AsyncResult`` does, with an asyncio Redis client.
+
+    ``backend`` is the Redis result backend of Celery, only used to name and decode the keys of
+    the tasks, so that reading never blocks the event loop.
+    """
+
+    def __init__(self, client, backend, cache: Optional[StatusCache] = None):
+        """Initialize the reader with an asyncio Redis client and the result backend."""
+        self.client = client
+        self.backend = backend
+        self.cache = cache
+
+    async def get_meta(self, task_id: str) -> dict:
+        """Returns the metadata of the task, with its ``status`` and ``result``."""
+        meta = self.cache.get(task_id) if self.cache is not None else None
+        if meta is not None:
+            return meta
+
+        payload = await self.client.get(self.backend.get_key_for_task(task_id))
+        meta = self._decode(payload)
+        if self.cache is not None:
+            self.cache.put(task_id, meta)
+        return meta
+
+    async def get_metas(self, task_ids: List[str]) -> List[dict]:
+        """Returns the metadata of the tasks, reading all tasks not cached in a single ``MGET``."""
+        metas = [self.cache.get(t) if self.cache is not None else None for t in task_ids]
+        missing = [i for i, meta in enumerate(metas) if meta is None]
+        if not missing:
+            return metas
+
+        keys = [self.backend.get_key_for_task(task_ids[i]) for i in missing]
+        for i, payload in zip(missing, await self.client.mget(keys)):
+            metas[i] = self._decode(payload)
+            if self.cache is not None:
+                self.cache.put(task_ids[i], metas[i])
+        return metas
+
+    def _decode(self, payload) -> dict:
+        """Returns the metadata stored by the backend, pending if nothing is stored."""
+        if payload is None:
+            return {"status": states.PENDING, "result": None}
+        return self.backend.decode_result(payload)
+
+
+def make_status_reader(url: str, backend) -> TaskStatusReader:
+    """Returns a reader of the backend at ``url`` through a pool of connections."""
+    pool = aioredis.ConnectionPool.from_url(url, max_connections=get_redis_max_connections())
+    return TaskStatusReader(
+        aioredis.Redis(connection_pool=pool),
+        backend,
+        StatusCache(get_status_cache_ttl(), get_status_cache_size()),
+    )
+
+
+def get_redis_max_connections() -> int:
+    """Returns ``REDIS_MAX_CONNECTIONS``, the size of the connection pool, 50 by default."""
+    return int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+
+def get_status_cache_ttl() -> float:
+    """Returns ``STATUS_CACHE_TTL``, the seconds running tasks are cached, 1 by default."""
+    return float(os.getenv("STATUS_CACHE_TTL", "1"))
+
+
+def get_status_cache_size() -> int:
+    """Returns ``STATUS_CACHE_SIZE``, the number of cached tasks, 10000 by default."""
+    return int(os.getenv("STATUS_CACHE_SIZE", "10000"))
@@ -0,0 +1,314 @@
+"""Compact serialization and persistent storage of generated timetables."""
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from timetable_ga.ga_consts import CRITERIA_NUM
+from timetable_ga.models import Configuration
+from timetable_ga.warmstart import Placement
+
+# Version of the binary layout written by CompactSchedule.to_bytes
+FORMAT_VERSION = 1
+
+# Status of the runs that evolved until one of their stop criteria
+FINISHED = "finished"
+
+# Status of the runs cancelled before the end of their evolution
+CANCELLED = "cancelled"
+
+# Stores opened by the process, by path, see ``get_result_store``
+_result_stores = {}
+
+
+def fingerprint_configuration(configuration: Configuration) -> str:
+    """
+    Returns a fingerprint of the problem described by the configuration.
+
+    Equal problems have equal fingerprints, whatever the internal IDs of their entities.
+    """
+    grid = configuration.time_grid
+    problem = {
+        "time_grid": [grid.days, grid.day_hours, sorted(grid.blocked_periods)],
+        "classrooms": [
+            [room.backend_id, room.number_of_seats, room.is_lab, sorted(room.unavailable_periods)]
+            for room in configuration.classrooms
+        ],
+        "teachers": [
+            [teacher.backend_id, teacher.lunch_break_needed, sorted(teacher.preferred_hours)]
+            for teacher in configuration.teachers
+        ],
+        "student_groups": [
+            [group.backend_id, group.number_of_students] for group in configuration.student_groups
+        ],
+        "course_classes": [
+            [
+                course_class.backend_id,
+                course_class.teacher.backend_id,
+                course_class.course.backend_id,
+                [group.backend_id for group in course_class.groups],
+                course_class.is_lab_required,
+                course_class.duration,
+            ]
+            for course_class in configuration.course_classes
+        ],
+    }
+    canonical = json.dumps(problem, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CompactSchedule:
+    """
+    Columnar representation of a finished schedule.
+
+    The i-th class (``class_ids[i]``) starts at hour ``start[i]`` of day ``day[i]`` in the
+    classroom ``room_ids[room[i]]``; ``criteria`` holds the satisfied criteria of the classes as
+    a bitmap of ``CRITERIA_NUM`` bits per class.
+    """
+
+    def __init__(self, class_ids, room_ids, day, room, start, criteria, fitness):
+        """Initialize the schedule from its columns."""
+        self.class_ids = list(class_ids)
+        self.room_ids = list(room_ids)
+        self.day = np.asarray(day, dtype=np.uint8)
+        self.room = np.asarray(room, dtype=np.uint16)
+        self.start = np.asarray(start, dtype=np.uint8)
+        self.criteria = np.asarray(criteria, dtype=np.uint8)
+        self.fitness = float(fitness)
+
+    @classmethod
+    def from_schedule(cls, schedule):
+        """Returns the columns of a schedule of its configuration."""
+        configuration = schedule.configuration
+        placements = np.array(
+            [schedule.get_placement(i) for i in range(len(schedule.classes))], dtype=np.int64
+        ).reshape(-1, 3)
+        return cls(
+            class_ids=[c.get_backend_id() for c in configuration.get_course_classes()],
+            room_ids=[room.get_backend_id() for room in configuration.classrooms],
+            day=placements[:, 0],
+            room=placements[:, 1],
+            start=placements[:, 2],
+            criteria=np.packbits(np.asarray(schedule.criteria, dtype=np.bool_)),
+            fitness=schedule.get_fitness(),
+        )
+
+    def to_bytes(self) -> bytes:
+        """Returns the compressed binary representation of the schedule."""
+        header = json.dumps(
+            {"classes": self.class_ids, "rooms": self.room_ids, "fitness": self.fitness},
+            separators=(",", ":"),
+        ).encode()
+        body = b"".join(
+            (
+                struct.pack("<BI", FORMAT_VERSION, len(header)),
+                header,
+                self.day.tobytes(),
+                self.room.tobytes(),
+                self.start.tobytes(),
+                self.criteria.tobytes(),
+            )
+        )
+        return zlib.compress(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """Returns the schedule of a binary representation made by ``to_bytes``."""
+        body = zlib.decompress(data)
+        version, header_size = struct.unpack_from("<BI", body)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported schedule format version: {version}")
+
+        offset = struct.calcsize("<BI")
+        header = json.loads(body[offset : offset + header_size])
+        offset += header_size
+        n = len(header["classes"])
+
+        day = np.frombuffer(body, dtype=np.uint8, count=n, offset=offset)
+        offset += day.nbytes
+        room = np.frombuffer(body, dtype=np.uint16, count=n, offset=offset)
+        offset += room.nbytes
+        start = np.frombuffer(body, dtype=np.uint8, count=n, offset=offset)
+        offset += start.nbytes
+        criteria = np.frombuffer(body, dtype=np.uint8, offset=offset)
+
+        return cls(
+            header["classes"], header["rooms"], day, room, start, criteria, header["fitness"]
+        )
+
+    def get_criteria(self):
+        """Returns the satisfied criteria as a (classes x criteria) boolean matrix."""
+        bits = np.unpackbits(self.criteria, count=len(self.class_ids) * CRITERIA_NUM)
+        return bits.astype(np.bool_).reshape(len(self.class_ids), CRITERIA_NUM)
+
+    def get_placements(self) -> Dict[str, Placement]:
+        """Returns the placements of the classes, by backend ID of the classes."""
+        return {
+            class_id: Placement(day=int(d), room=self.room_ids[r], time=int(s))
+            for class_id, d, r, s in zip(self.class_ids, self.day, self.room, self.start)
+        }
+
+    def diff(self, other) -> List[str]:
+        """Returns the backend IDs of the classes placed differently, or missing, in ``other``."""
+        if self.class_ids == other.class_ids and self.room_ids == other.room_ids:
+            changed = (
+                (self.day != other.day) | (self.room != other.room) | (self.start != other.start)
+            )
+            return [self.class_ids[i] for i in np.flatnonzero(changed)]
+
+        placements = other.get_placements()
+        return [
+            class_id
+            for class_id, placement in self.get_placements().items()
+            if placements.get(class_id) != placement
+        ]
+
+
+class ResultStore:
+    """
+    Store of finished and cancelled runs in a local SQLite database, indexed by run ID and by
+    the fingerprint of the input problem. Runs of inline problems keep the problem as well.
+    """
+
+    def __init__(self, path: str):
+        """Open the store at the given path, creating it if needed."""
+        self.path = path
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "run_id TEXT PRIMARY KEY, "
+                "fingerprint TEXT NOT NULL, "
+                "parameters TEXT NOT NULL, "
+                "fitness REAL NOT NULL, "
+                "generations INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "schedule BLOB NOT NULL, "
+                f"status TEXT NOT NULL DEFAULT '{FINISHED}', "
+                "problem TEXT)"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(results)")]
+            if "status" not in columns:
+                connection.execute(
+                    f"ALTER TABLE results ADD COLUMN status TEXT NOT NULL DEFAULT '{FINISHED}'"
+                )
+            if "problem" not in columns:
+                connection.execute("ALTER TABLE results ADD COLUMN problem TEXT")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_fingerprint "
+                "ON results (fingerprint, parameters, created_at)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Yields a new connection to the database in a transaction, closed afterwards."""
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def save(
+        self,
+        run_id: str,
+        fingerprint: str,
+        schedule: CompactSchedule,
+        generations: int,
+        parameters: Optional[dict] = None,
+        status: str = FINISHED,
+        problem: Optional[dict] = None,
+    ):
+        """Stores the result of a run, with its inline ``problem`` if any."""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (run_id, fingerprint, parameters, fitness, "
+                "generations, created_at, schedule, status, problem) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    fingerprint,
+                    json.dumps(parameters or {}, sort_keys=True),
+                    schedule.fitness,
+                    generations,
+                    time.time(),
+                    schedule.to_bytes(),
+                    status,
+                    None if problem is None else json.dumps(problem),
+                ),
+            )
+
+    def get(self, run_id: str) -> Optional[dict]:
+        """Returns the stored run with the given ID, or ``None``."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT run_id, fingerprint, parameters, generations, created_at, schedule, "
+                "status, problem FROM results WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "run_id": row[0],
+            "fingerprint": row[1],
+            "parameters": json.loads(row[2]),
+            "generations": row[3],
+            "created_at": row[4],
+            "schedule": CompactSchedule.from_bytes(row[5]),
+            "status": row[6],
+            "problem": None if row[7] is None else json.loads(row[7]),
+        }
+
+    def find(
+        self,
+        fingerprint: str,
+        parameters: Optional[dict] = None,
+        since: Optional[float] = None,
+        status: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Returns the IDs of the runs of a problem, the most recent first.
+
+        Only runs with the given parameters, stored after the ``since`` timestamp and with the
+        given status are returned, if given.
+        """
+        query = "SELECT run_id FROM results WHERE fingerprint = ?"
+        arguments = [fingerprint]
+        if parameters is not None:
+            query += " AND parameters = ?"
+            arguments.append(json.dumps(parameters, sort_keys=True))
+        if since is not None:
+            query += " AND created_at >= ?"
+            arguments.append(since)
+        if status is not None:
+            query += " AND status = ?"
+            arguments.append(status)
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                query + " ORDER BY created_at DESC, rowid DESC", arguments
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, run_id: str):
+        """Deletes the run with the given ID."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+
+
+def get_result_store() -> ResultStore:
+    """
+    Returns the store at ``RESULT_STORE_PATH``, ``results.sqlite3`` by default, opened once per
+    process and path.
+    """
+    path = os.getenv("RESULT_STORE_PATH", "results.sqlite3")
+    store = _result_stores.get(path)
+    if store is None:
+        store = _result_stores.setdefault(path, ResultStore(path))
+    return store
@@ -0,0 +1,116 @@
+"""Seeded generator of synthetic institutions for benchmarks and tests."""
+
+import random
+from typing import Optional
+
+from timetable_ga.models import (
+    Classroom,
+    Configuration,
+    Course,
+    CourseClass,
+    StudentsGroup,
+    Teacher,
+    TimeGrid,
+    start_entity_registry,
+)
+
+# Named problem sizes, in number of course classes
+SIZES = {
+    "tiny": 10,
+    "small": 50,
+    "medium": 500,
+    "large": 5000,
+}
+
+
+def generate_institution(
+    number_of_classes: int,
+    seed: int = 0,
+    lab_ratio: float = 0.15,
+    max_duration: int = 3,
+    room_load: float = 0.5,
+    kernel: str = "auto",
+    time_grid: Optional[TimeGrid] = None,
+    departments: int = 1,
+) -> Configuration:
+    """
+    Generates a synthetic institution with the given number of course classes, its entities in
+    a new entity registry.
+
+    The number of rooms, teachers, groups and courses is derived from the number of classes
+    so that the generated problem is feasible with high probability.
+    Args:
+        number_of_classes (int): Number of course classes to generate.
+        seed (int): Seed of the generator, equal seeds give equal institutions.
+        lab_ratio (float): Share of classes that require a lab.
+        max_duration (int): Maximum duration of a class in hours.
+        room_load (float): Targeted share of occupied room hours.
+        kernel (str): Kernel of the configuration, see ``timetable_ga.models.get_kernel``.
+        time_grid (TimeGrid): Week of the institution, 5 days of 12 hours by default.
+        departments (int): Number of departments whose classes share no teacher nor group,
+            at most one per teacher and group.
+    Returns:
+        Configuration: The configuration of the generated institution.
+    """
+    start_entity_registry()
+    rng = random.Random(seed)
+    time_grid = time_grid if time_grid is not None else TimeGrid()
+
+    max_duration = min(max_duration, time_grid.day_hours)
+    durations = [rng.randint(1, max_duration) for _ in range(number_of_classes)]
+    hours_per_room = time_grid.days * time_grid.day_hours - len(set(time_grid.blocked_periods))
+    number_of_rooms = max(2, round(sum(durations) / (hours_per_room * room_load)))
+    number_of_labs = max(1, round(number_of_rooms * lab_ratio * 2))
+    number_of_teachers = max(1, number_of_classes // 6)
+    number_of_groups = max(1, number_of_classes // 8)
+    number_of_courses = max(1, number_of_classes // 4)
+    departments = max(1, min(departments, number_of_teachers, number_of_groups))
+
+    classrooms = [
+        Classroom(
+            backend_id=f"room-{i}",
+            name=f"Room {i}",
+            is_lab=i < number_of_labs,
+            number_of_seats=rng.choice((40, 60, 80, 120)),
+        )
+        for i in range(number_of_rooms)
+    ]
+    teachers = [
+        Teacher(backend_id=f"teacher-{i}", name=f"Teacher {i}") for i in range(number_of_teachers)
+    ]
+    student_groups = [
+        StudentsGroup(
+            backend_id=f"group-{i}", name=f"Group {i}", number_of_students=rng.randint(10, 20)
+        )
+        for i in range(number_of_groups)
+    ]
+    courses = [
+        Course(backend_id=f"course-{i}", name=f"Course {i}") for i in range(number_of_courses)
+    ]
+
+    course_classes = []
+    for i, duration in enumerate(durations):
+        department_teachers = teachers[i % departments :: departments]
+        department_groups = student_groups[i % departments :: departments]
+        course_classes.append(
+            CourseClass(
+                backend_id=f"class-{i}",
+                teacher=department_teachers[i // departments % len(department_teachers)],
+                course=courses[rng.randrange(number_of_courses)],
+                groups=rng.sample(
+                    department_groups, min(len(department_groups), rng.randint(1, 2))
+                ),
+                is_lab_required=rng.random() < lab_ratio,
+                duration=duration,
+            )
+        )
+
+    return Configuration(
+        teachers=teachers,
+        student_groups=student_groups,
+        courses=courses,
+        classrooms=classrooms,
+        course_classes=course_classes,
+        kernel=kernel,
+        time_grid=time_grid,
+    )
@@ -0,0 +1,169 @@
+"""Content negotiation, binary formats and compression of the timetables served by the API."""
+
+import gzip
+import importlib.util
+import json
+from typing import List, Optional, Tuple
+
+import msgpack
+
+# pyarrow is imported by the first Arrow response only, it is slow to import
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+
+# Media types of the timetables: JSON by default, msgpack and Arrow IPC streams of columns
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Other names of the media types accepted by the clients
+MEDIA_TYPE_ALIASES = {"*/*": JSON, "application/*": JSON, "application/x-msgpack": MSGPACK}
+
+# Bodies smaller than this many bytes are never compressed
+MIN_COMPRESSED_SIZE = 500
+
+
+def _parse_qualities(value: str) -> List[Tuple[str, float]]:
+    """Returns the tokens of an ``Accept`` header with their quality, in order."""
+    items = []
+    for item in value.split(","):
+        token, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        if token:
+            items.append((token.lower(), quality))
+    return items
+
+
+def _parse_header(value: str) -> List[str]:
+    """Returns the tokens of an ``Accept`` header by decreasing quality, without refused ones."""
+    items = [
+        (-quality, position, token)
+        for position, (token, quality) in enumerate(_parse_qualities(value))
+        if quality > 0
+    ]
+    return [token for _quality, _position, token in sorted(items)]
+
+
+def get_media_types() -> List[str]:
+    """Returns the media types the timetables can be served as here."""
+    return [JSON, MSGPACK] + ([ARROW] if ARROW_AVAILABLE else [])
+
+
+def negotiate_media_type(accept: Optional[str]) -> Optional[str]:
+    """
+    Returns the media type of the response to a request with the given ``Accept`` header, the
+    most preferred supported one, JSON without the header, or ``None`` if none is acceptable.
+
+    Arrow needs pyarrow to be installed.
+    """
+    if not accept:
+        return JSON
+    supported = get_media_types()
+    for token in _parse_header(accept):
+        media_type = MEDIA_TYPE_ALIASES.get(token, token)
+        if media_type in supported:
+            return media_type
+    return None
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Returns the content coding of the response to a request with the given
+    ``Accept-Encoding`` header: ``zstd`` if accepted and available, else ``gzip`` if accepted,
+    else ``None``. The ``*`` wildcard accepts the codings the header does not refuse with
+    ``q=0``.
+    """
+    qualities = _parse_qualities(accept_encoding or "")
+    accepted = {token for token, quality in qualities if quality > 0}
+    refused = {token for token, quality in qualities if quality <= 0}
+    if "*" in accepted:
+        accepted |= {"zstd", "gzip"} - refused
+    if zstd is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Returns the body compressed with the content coding, unless it is ``None``."""
+    if encoding == "zstd":
+        return zstd.compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def render_timetable(summary: dict, schedule, media_type: str) -> bytes:
+    """
+    Returns the body of a timetable in the media type.
+
+    JSON holds the ``summary`` of the run and the placements of the classes by backend ID, as
+    ``{"day", "room", "time"}`` objects. Binary formats hold the columns of the
+    ``CompactSchedule`` instead: msgpack the summary and the ``classes``, ``day``, ``room``
+    (indices into ``classrooms``) and ``time`` lists, Arrow IPC a stream of one table with the
+    ``class``, ``day``, ``room`` (dictionary-encoded) and ``time`` columns and the summary, as
+    JSON values, in its schema metadata.
+    """
+    if media_type == MSGPACK:
+        return msgpack.packb(
+            {
+                **summary,
+                "classes": schedule.class_ids,
+                "classrooms": schedule.room_ids,
+                "day": schedule.day.tolist(),
+                "room": schedule.room.tolist(),
+                "time": schedule.start.tolist(),
+            }
+        )
+    if media_type == ARROW:
+        return _render_arrow(summary, schedule)
+
+    room_ids = schedule.room_ids
+    placements = {
+        class_id: {"day": day, "room": room_ids[room], "time": time}
+        for class_id, day, room, time in zip(
+            schedule.class_ids,
+            schedule.day.tolist(),
+            schedule.room.tolist(),
+            schedule.start.tolist(),
+        )
+    }
+    return json.dumps({**summary, "placements": placements}, separators=(",", ":")).encode()
+
+
+def _render_arrow(summary: dict, schedule) -> bytes:
+    """Returns the Arrow IPC stream of the columns of a timetable."""
+    import pyarrow  # pylint: disable=import-outside-toplevel
+    import pyarrow.ipc  # pylint: disable=import-outside-toplevel
+
+    table = pyarrow.table(
+        {
+            "class": pyarrow.array(schedule.class_ids, type=pyarrow.string()),
+            "day": pyarrow.array(schedule.day),
+            "room": pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array(schedule.room),
+                pyarrow.array(schedule.room_ids, type=pyarrow.string()),
+            ),
+            "time": pyarrow.array(schedule.start),
+        },
+        metadata={key: json.dumps(value) for key, value in summary.items()},
+    )
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
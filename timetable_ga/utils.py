@@ -1,12 +1,8 @@
 """Utility functions for the application."""
 
-from timetable_ga.models import Classroom, Course, CourseClass, StudentsGroup, Teacher
+from timetable_ga.models import start_entity_registry
 
 
 def restart_id_counters() -> None:
-    """Restart the ID counters for all models."""
-    Classroom.restart_id_counter()
-    Teacher.restart_id_counter()
-    Course.restart_id_counter()
-    StudentsGroup.restart_id_counter()
-    CourseClass.restart_id_counter()
+    """Restart the ID counters for all models, starting a new entity registry for the run."""
+    start_entity_registry()
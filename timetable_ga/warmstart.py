@@ -0,0 +1,173 @@
+"""Warm-start re-optimization of a previously generated timetable."""
+
+import random
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from timetable_ga.ga_consts import CRITERIA_NUM, RAND16_MAX
+from timetable_ga.models import Configuration
+
+
+class Placement(BaseModel):
+    """
+    Model representing the placement of a class in a timetable.
+    """
+
+    day: int
+    room: str
+    time: int
+
+
+class ScheduleChanges(BaseModel):
+    """
+    Model representing the entities changed since a timetable was generated, by backend ID.
+    """
+
+    teachers: List[str] = []
+    student_groups: List[str] = []
+    classrooms: List[str] = []
+    course_classes: List[str] = []
+
+
+def get_placements(schedule) -> Dict[str, Placement]:
+    """
+    Returns the placements of the classes of a schedule, by backend ID of the classes.
+    """
+    configuration = schedule.configuration
+    placements = {}
+    for i, course_class in enumerate(configuration.get_course_classes()):
+        day, room, time = schedule.get_placement(i)
+        placements[course_class.get_backend_id()] = Placement(
+            day=day, room=configuration.classrooms[room].get_backend_id(), time=time
+        )
+    return placements
+
+
+def get_affected_classes(
+    previous: Dict[str, Placement], changes: ScheduleChanges, configuration=None
+) -> List[int]:
+    """
+    Returns the indices of the classes of the ``configuration``, the last one created by
+    default, that have to be placed again.
+
+    These are the classes of changed teachers and groups, the classes placed in changed
+    classrooms, the changed classes and the classes missing from the previous timetable.
+    """
+    configuration = Configuration.instance if configuration is None else configuration
+    teachers = set(changes.teachers)
+    student_groups = set(changes.student_groups)
+    classrooms = set(changes.classrooms)
+    course_classes = set(changes.course_classes)
+
+    affected = []
+    for i, course_class in enumerate(configuration.get_course_classes()):
+        placement = previous.get(course_class.get_backend_id())
+        if (
+            placement is None
+            or placement.room in classrooms
+            or course_class.get_backend_id() in course_classes
+            or course_class.get_teacher().get_backend_id() in teachers
+            or any(g.get_backend_id() in student_groups for g in course_class.get_groups())
+        ):
+            affected.append(i)
+    return affected
+
+
+def _random_position(configuration, course_class, rng):
+    """Returns a random slot position the class may start at, drawn from ``rng``."""
+    starts = configuration.get_valid_starts(course_class)
+    return starts[rng.randint(0, RAND16_MAX) % len(starts)]
+
+
+def get_previous_genome(
+    previous: Dict[str, Placement], configuration=None, rng=random
+) -> List[int]:
+    """
+    Returns the genome of the previous timetable in the ``configuration``, the last one
+    created by default.
+
+    Classes without a valid previous placement (new classes, removed classrooms, durations
+    not fitting the day anymore, periods blocked or unavailable since) are placed randomly,
+    drawing from ``rng``, the ``random`` module by default.
+    """
+    configuration = Configuration.instance if configuration is None else configuration
+    grid = configuration.time_grid
+    rooms = {room.get_backend_id(): i for i, room in enumerate(configuration.classrooms)}
+
+    genome = []
+    for course_class in configuration.get_course_classes():
+        placement = previous.get(course_class.get_backend_id())
+        if (
+            placement is None
+            or placement.room not in rooms
+            or not 0 <= placement.day < grid.days
+            or not 0 <= placement.time < grid.day_hours
+        ):
+            genome.append(_random_position(configuration, course_class, rng))
+            continue
+
+        position = configuration.get_position(placement.day, rooms[placement.room], placement.time)
+        if not configuration.get_start_mask(course_class)[position]:
+            position = _random_position(configuration, course_class, rng)
+        genome.append(position)
+    return genome
+
+
+def reoptimize(
+    algorithm,
+    previous: Dict[str, Placement],
+    changes: ScheduleChanges,
+    max_generations=None,
+    max_seconds=None,
+    should_stop=None,
+    stop_check_interval=10,
+    checkpointer=None,
+    progress=None,
+):
+    """
+    Re-optimizes a previous timetable after some entities changed.
+
+    The population is seeded with the previous timetable and perturbations of it in which the
+    affected classes are placed randomly. Only the affected classes and the classes that
+    violate a criterion in the previous timetable are mutated, all other classes keep their
+    placement. Evolution stops, is checkpointed and reports its progress as in
+    ``Algorithm.start``. Returns the best chromosome.
+    """
+    configuration = algorithm.configuration
+    c = configuration.get_course_classes()
+    prototype = algorithm.prototype
+
+    affected = get_affected_classes(previous, changes, configuration)
+    rng = prototype.random
+    genome = get_previous_genome(previous, configuration, rng)
+
+    criteria = prototype.make_new_from_genome(genome).criteria
+    violated = [
+        i for i in range(len(c)) if not all(criteria[i * CRITERIA_NUM : (i + 1) * CRITERIA_NUM])
+    ]
+    mutable = sorted(set(affected) | set(violated))
+    prototype.set_mutable_classes(mutable)
+
+    genomes = [genome]
+    for _i in range(len(algorithm.chromosomes) - 1):
+        perturbed = list(genome)
+        for class_index in affected:
+            perturbed[class_index] = _random_position(configuration, c[class_index], rng)
+        for _j in range(min(prototype.mutation_size, len(mutable))):
+            class_index = mutable[rng.randint(0, RAND16_MAX) % len(mutable)]
+            perturbed[class_index] = _random_position(configuration, c[class_index], rng)
+        genomes.append(perturbed)
+
+    try:
+        return algorithm.start(
+            max_generations=max_generations,
+            initial_genomes=genomes,
+            max_seconds=max_seconds,
+            should_stop=should_stop,
+            stop_check_interval=stop_check_interval,
+            checkpointer=checkpointer,
+            progress=progress,
+        )
+    finally:
+        prototype.set_mutable_classes(None)
@@ -0,0 +1,450 @@
+"""
+The web service submitting the generations and serving their states and results.
+
+Run it with ``uvicorn timetable_ga.web:app``. Tasks are sent to the workers by name, see
+``timetable_ga.broker``, so that the service never imports the modules of the workers.
+"""
+
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, model_validator
+
+from timetable_ga import transport
+from timetable_ga.api import load_configuration
+from timetable_ga.broker import GENERATION_TASK, REDIS_URL, REOPTIMIZATION_TASK, celery_app
+from timetable_ga.cancellation import request_cancellation
+from timetable_ga.coalescing import RequestCoalescer, get_coalescing_key, get_coalescing_ttl
+from timetable_ga.models import Configuration
+from timetable_ga.monitoring import QUEUE_DEPTH, render_metrics
+from timetable_ga.problem import GAParameters, ProblemPayload
+from timetable_ga.progress import PROGRESS
+from timetable_ga.scheduling import QUEUE_ROUTES, QueueRoute, route_problem, route_size
+from timetable_ga.status import TaskStatusReader, make_status_reader
+from timetable_ga.store import fingerprint_configuration, get_result_store
+from timetable_ga.warmstart import Placement, ScheduleChanges
+
+# Most generations submitted and task states read by a batch request
+MAX_BATCH_SUBMISSIONS = 100
+MAX_BATCH_STATUSES = 1000
+
+
+app = FastAPI()
+
+
+class ReoptimizationRequest(BaseModel):
+    """
+    Model representing a request to re-optimize a previously generated timetable.
+
+    The previous timetable is given either by its placements or by the ID of its stored run.
+    Without ``parameters`` and an inline ``problem`` those of the stored run are used, the
+    problem of the backend and the default parameters if given by its placements.
+    """
+
+    previous: Optional[Dict[str, Placement]] = None
+    previous_run_id: Optional[str] = None
+    changes: ScheduleChanges = ScheduleChanges()
+    parameters: Optional[GAParameters] = None
+    problem: Optional[ProblemPayload] = None
+
+    @model_validator(mode="after")
+    def check_previous(self):
+        """Checks that exactly one previous timetable is given."""
+        if (self.previous is None) == (self.previous_run_id is None):
+            raise ValueError("Exactly one of previous and previous_run_id is required")
+        return self
+
+
+class TimetableRequest(BaseModel):
+    """
+    Model representing a request to generate a timetable.
+
+    Without an inline ``problem`` the problem is fetched from the backend. The ``priority``
+    (0 is the highest) defaults to the priority of the queue the problem is routed to.
+    """
+
+    parameters: GAParameters = GAParameters()
+    problem: Optional[ProblemPayload] = None
+    priority: Optional[int] = Field(None, ge=0, le=9)
+
+
+class BatchTimetableRequest(BaseModel):
+    """
+    Model representing a batch of requests to generate timetables, submitted together.
+    """
+
+    requests: List[TimetableRequest] = Field(min_length=1, max_length=MAX_BATCH_SUBMISSIONS)
+
+
+class BatchStatusRequest(BaseModel):
+    """
+    Model representing the IDs of the tasks whose states are read together.
+    """
+
+    task_ids: List[str] = Field(min_length=1, max_length=MAX_BATCH_STATUSES)
+
+
+@app.get("/")
+async def read_root(profile: bool = False, tenant: str = Header("default", alias="X-Tenant-ID")):
+    """GET endpoint that starts timetable generation with the default parameters."""
+    try:
+        response = await run_in_threadpool(
+            _submit_generation, GAParameters(), None, profile, tenant
+        )
+        return await _add_task_status(response)
+    except Exception as e:
+        return {"response": "error", "error": str(e)}
+
+
+@app.post("/timetables")
+async def create_timetable(
+    request: TimetableRequest,
+    profile: bool = False,
+    tenant: str = Header("default", alias="X-Tenant-ID"),
+):
+    """POST endpoint that starts timetable generation with the given parameters and problem."""
+    try:
+        response = await run_in_threadpool(
+            _submit_generation,
+            request.parameters,
+            request.problem,
+            profile,
+            tenant,
+            request.priority,
+        )
+        return await _add_task_status(response)
+    except Exception as e:
+        return {"response": "error", "error": str(e)}
+
+
+@app.post("/timetables/batch")
+async def create_timetables(
+    request: BatchTimetableRequest,
+    profile: bool = False,
+    tenant: str = Header("default", alias="X-Tenant-ID"),
+):
+    """
+    POST endpoint that starts the timetable generations of a batch of requests.
+
+    Returns the response of each request in order, as ``POST /timetables`` would, the states
+    of the tasks read together.
+    """
+    try:
+        responses = await run_in_threadpool(_submit_generations, request.requests, profile, tenant)
+        return {"response": "ok", "tasks": await _add_task_statuses(responses)}
+    except Exception as e:
+        return {"response": "error", "error": str(e)}
+
+
+async def _add_task_status(response: dict) -> dict:
+    """Returns the response of a submission with the current state of its task."""
+    return (await _add_task_statuses([response]))[0]
+
+
+async def _add_task_statuses(responses: List[dict]) -> List[dict]:
+    """Returns the responses of submissions with the current states of their tasks."""
+    missing = [r for r in responses if r["response"] == "ok" and "task_status" not in r]
+    if missing:
+        metas = await _get_status_reader().get_metas([r["task_id"] for r in missing])
+        for response, meta in zip(missing, metas):
+            response["task_status"] = meta["status"]
+    return responses
+
+
+def _submit_generations(requests: List[TimetableRequest], profile: bool, tenant: str):
+    """
+    Starts the generations of a batch of requests, see ``_submit_generation``, and returns
+    their responses in order, an error response for each request that could not be submitted.
+
+    The problem of the backend is loaded at most once for the batch, and the tasks are
+    published through a single producer.
+    """
+    responses = []
+    backend_configuration = None
+    with celery_app.producer_or_acquire() as producer:
+        for request in requests:
+            try:
+                configuration = None
+                if request.problem is None:
+                    if backend_configuration is None:
+                        backend_configuration = load_configuration()
+                    configuration = backend_configuration
+                response = _submit_generation(
+                    request.parameters,
+                    request.problem,
+                    profile,
+                    tenant,
+                    request.priority,
+                    configuration=configuration,
+                    producer=producer,
+                )
+            except Exception as e:
+                response = {"response": "error", "error": str(e)}
+            responses.append(response)
+    return responses
+
+
+def _submit_generation(
+    parameters: GAParameters,
+    problem: Optional[ProblemPayload],
+    profile: bool,
+    tenant: str,
+    priority: Optional[int] = None,
+    configuration: Optional[Configuration] = None,
+    producer=None,
+):
+    """
+    Starts timetable generation and returns the response of the submitting endpoints, without
+    the state of the task unless it is known, see ``_add_task_status``. Blocks on the backend
+    and the broker, so it runs in the threadpool of the web service.
+
+    The task is routed to a queue by the size of the problem, with the time limits of the
+    queue. Identical requests are coalesced: while a run of the same problem with the same
+    parameters is in flight its task ID is returned, and a recently finished run is reused.
+    Profiled runs are never coalesced. The ``configuration`` of the problem is loaded unless
+    given, and the task is published by ``producer`` if given.
+    """
+    if configuration is None:
+        configuration = load_configuration() if problem is None else problem.to_configuration()
+    route = route_problem(configuration)
+    options = route.get_options(priority)
+    if producer is not None:
+        options["producer"] = producer
+    kwargs = {"parameters": parameters.model_dump(), "tenant": tenant}
+    if problem is not None:
+        kwargs["problem"] = problem.model_dump()
+
+    coalescer = _get_coalescer()
+    if profile or coalescer is None:
+        task = celery_app.send_task(
+            GENERATION_TASK, kwargs={"profile": profile, **kwargs}, **options
+        )
+        return {"response": "ok", "task_id": task.id, "queue": route.queue}
+
+    fingerprint = fingerprint_configuration(configuration)
+    run_id = coalescer.find_completed(fingerprint, kwargs["parameters"])
+    if run_id is not None:
+        return {"response": "ok", "task_id": run_id, "task_status": "SUCCESS", "cached": True}
+
+    key = get_coalescing_key(fingerprint, kwargs["parameters"])
+    task_id = str(uuid.uuid4())
+    existing = coalescer.claim(key, task_id)
+    if existing is not None:
+        return {"response": "ok", "task_id": existing, "cached": True}
+
+    try:
+        task = celery_app.send_task(
+            GENERATION_TASK, kwargs={"coalescing_key": key, **kwargs}, task_id=task_id, **options
+        )
+    except Exception:
+        coalescer.release(key, task_id)
+        raise
+    return {"response": "ok", "task_id": task.id, "queue": route.queue}
+
+
+@app.post("/reoptimize")
+async def reoptimize_timetable(
+    request: ReoptimizationRequest,
+    profile: bool = False,
+    tenant: str = Header("default", alias="X-Tenant-ID"),
+):
+    """POST endpoint that starts the re-optimization of a previously generated timetable."""
+    try:
+        response = await run_in_threadpool(_submit_reoptimization, request, profile, tenant)
+        return await _add_task_status(response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {"response": "error", "error": str(e)}
+
+
+def _submit_reoptimization(request: ReoptimizationRequest, profile: bool, tenant: str):
+    """
+    Starts the re-optimization of a timetable and returns the response of the endpoint,
+    without the state of the task, see ``_add_task_status``. Blocks on the result store, the
+    backend and the broker, so it runs in the threadpool of the web service.
+    """
+    previous = None
+    if request.previous is not None:
+        previous = {
+            backend_id: placement.model_dump() for backend_id, placement in request.previous.items()
+        }
+    route = _route_reoptimization(request)
+    kwargs = {
+        "previous": previous,
+        "previous_run_id": request.previous_run_id,
+        "changes": request.changes.model_dump(),
+        "profile": profile,
+        "tenant": tenant,
+    }
+    if request.parameters is not None:
+        kwargs["parameters"] = request.parameters.model_dump()
+    if request.problem is not None:
+        kwargs["problem"] = request.problem.model_dump()
+    task = celery_app.send_task(REOPTIMIZATION_TASK, kwargs=kwargs, **route.get_options())
+    return {"response": "ok", "task_id": task.id, "queue": route.queue}
+
+
+def _route_reoptimization(request: ReoptimizationRequest) -> QueueRoute:
+    """
+    Returns the route of a re-optimization, by the size of its inline problem, else of its
+    stored previous run, else of the problem of the backend.
+    """
+    if request.problem is not None:
+        return route_problem(request.problem.to_configuration())
+    if request.previous_run_id is not None:
+        schedule = _get_stored_schedule(request.previous_run_id)["schedule"]
+        return route_size(len(schedule.class_ids) * len(schedule.room_ids))
+    return route_problem(load_configuration())
+
+
+@app.get("/task-status/{task_id}")
+async def task_status(task_id: str):
+    """
+    GET endpoint to check the status of a Celery task.
+
+    The state is read without blocking, the states of running tasks cached for
+    ``STATUS_CACHE_TTL`` seconds, see ``StatusCache``.
+    """
+    return _format_status(await _get_status_reader().get_meta(task_id))
+
+
+@app.post("/task-status")
+async def task_statuses(request: BatchStatusRequest):
+    """
+    POST endpoint to check the statuses of several Celery tasks, by task ID, in a single
+    round trip to the result backend.
+    """
+    metas = await _get_status_reader().get_metas(request.task_ids)
+    return {
+        "statuses": {
+            task_id: _format_status(meta) for task_id, meta in zip(request.task_ids, metas)
+        }
+    }
+
+
+def _format_status(meta: dict) -> dict:
+    """Returns the status response of a task from its metadata."""
+    state = meta["status"]
+    if state == "PENDING":
+        return {"status": "pending", "message": "Task is still waiting to be executed."}
+    if state == "FAILURE":
+        return {"status": "failed", "error": str(meta["result"])}
+    if state == "SUCCESS":
+        return {"status": "success", "result": meta["result"]}
+    if state == "REVOKED":
+        return {"status": "revoked", "message": "Task was revoked."}
+    if state == PROGRESS:
+        return {"status": "progress", "progress": meta["result"]}
+    return {"status": state}
+
+
+@app.delete("/tasks/{task_id}")
+def cancel_task(task_id: str):
+    """
+    DELETE endpoint that cancels a task.
+
+    A queued task is revoked, a running one stops within a few generations and stores the best
+    schedule found so far.
+    """
+    try:
+        request_cancellation(celery_app.backend.client, task_id)
+        celery_app.control.revoke(task_id)
+    except Exception as e:
+        return {"response": "error", "error": str(e)}
+    return {"response": "ok", "task_id": task_id}
+
+
+def _get_stored_schedule(run_id: str):
+    """Returns the stored schedule of a run, or responds with 404 if it is not stored."""
+    stored = get_result_store().get(run_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    return stored
+
+
+@app.get("/results/{run_id}")
+def get_result(
+    run_id: str,
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    GET endpoint returning the timetable generated by a run, as JSON by default or in the
+    binary format and the compression negotiated with ``Accept`` and ``Accept-Encoding``.
+    """
+    media_type = transport.negotiate_media_type(accept)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406, detail=f"Acceptable media types: {transport.get_media_types()}"
+        )
+    stored = _get_stored_schedule(run_id)
+    schedule = stored["schedule"]
+    summary = {
+        "run_id": run_id,
+        "fitness": schedule.fitness,
+        "generations": stored["generations"],
+        "status": stored["status"],
+    }
+    body = transport.render_timetable(summary, schedule, media_type)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= transport.MIN_COMPRESSED_SIZE:
+        encoding = transport.negotiate_encoding(accept_encoding)
+        if encoding is not None:
+            body = transport.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
+
+
+@app.get("/results/{run_id}/diff/{other_run_id}")
+def diff_results(run_id: str, other_run_id: str):
+    """GET endpoint returning the classes placed differently by two runs."""
+    schedule = _get_stored_schedule(run_id)["schedule"]
+    other = _get_stored_schedule(other_run_id)["schedule"]
+    placements = schedule.get_placements()
+    other_placements = other.get_placements()
+    return {
+        "changed": {
+            backend_id: {
+                "before": placements[backend_id].model_dump(),
+                "after": (
+                    other_placements[backend_id].model_dump()
+                    if backend_id in other_placements
+                    else None
+                ),
+            }
+            for backend_id in schedule.diff(other)
+        }
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """GET endpoint exporting Prometheus metrics."""
+    for route in QUEUE_ROUTES:
+        try:
+            with celery_app.connection_or_acquire() as connection:
+                declared = connection.default_channel.queue_declare(queue=route.queue, passive=True)
+            QUEUE_DEPTH.labels(queue=route.queue).set(declared.message_count)
+        except Exception as e:
+            print(f"Could not read depth of queue {route.queue}: {e}")
+
+    data, content_type = render_metrics()
+    return Response(content=data, media_type=content_type)
+
+
+def _get_status_reader() -> TaskStatusReader:
+    """Returns the reader of the states of the tasks of the web service, created on first use."""
+    if getattr(app.state, "status_reader", None) is None:
+        app.state.status_reader = make_status_reader(REDIS_URL, celery_app.backend)
+    return app.state.status_reader
+
+
+def _get_coalescer() -> Optional[RequestCoalescer]:
+    """Returns the coalescer of the generation requests, or ``None`` if disabled."""
+    ttl = get_coalescing_ttl()
+    if ttl <= 0:
+        return None
+    return RequestCoalescer(celery_app.backend.client, get_result_store(), ttl)
@@ -0,0 +1,404 @@
+"""
+The Celery tasks generating the timetables, imported by the workers only.
+
+Run the workers with ``celery -A timetable_ga.worker.celery_app worker``. Each worker process
+loads the static data of the backend and compiles the kernel once when it starts, see
+``preload_worker``, so that its first task does not pay for it.
+"""
+
+import os
+import threading
+import uuid
+from typing import Optional
+
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import worker_init, worker_process_init
+
+from timetable_ga.api import get_classrooms, get_time_grid, load_configuration
+from timetable_ga.broker import GENERATION_TASK, REOPTIMIZATION_TASK, celery_app
+from timetable_ga.cancellation import CancellationFlag, get_stop_check_interval
+from timetable_ga.checkpoint import Checkpointer, get_checkpoint_dir, get_checkpoint_interval
+from timetable_ga.coalescing import RequestCoalescer, get_coalescing_key, get_coalescing_ttl
+from timetable_ga.decomposition import solve_decomposed
+from timetable_ga.models import Configuration
+from timetable_ga.monitoring import (
+    ACTIVE_RUNS,
+    BEST_FITNESS,
+    EVALUATIONS,
+    GENERATIONS,
+    TASK_LATENCY,
+    start_metrics_server,
+)
+from timetable_ga.problem import GAParameters, ProblemPayload
+from timetable_ga.profiling import OperatorProfiler
+from timetable_ga.progress import ProgressReporter, get_progress_interval
+from timetable_ga.scheduling import (
+    DEFAULT_ROUTE,
+    TenantLimiter,
+    get_evolution_budget,
+    get_tenant_limit,
+)
+from timetable_ga.store import (
+    CANCELLED,
+    FINISHED,
+    CompactSchedule,
+    fingerprint_configuration,
+    get_result_store,
+)
+from timetable_ga.synthetic import generate_institution
+from timetable_ga.utils import restart_id_counters
+from timetable_ga.warmstart import Placement, ScheduleChanges, reoptimize
+
+# Seconds before a task of a tenant without a free slot is retried
+TENANT_RETRY_DELAY = 15
+
+# Static data of the backend loaded once by the worker process, see ``preload_worker``
+_preloaded = {}
+
+# Thread preparing the worker process, started by ``preload_worker``
+_preload_thread = None
+
+
+@worker_process_init.connect
+def preload_worker(**_kwargs):
+    """
+    Starts preparing the worker process for its tasks in a background thread, see ``_preload``.
+
+    Celery restarts the child processes not ready within ``worker_proc_alive_timeout`` (4
+    seconds by default), which compiling the kernel and a slow backend could exceed; tasks wait
+    for the preparation instead, see ``_wait_for_preload``.
+    """
+    global _preload_thread  # pylint: disable=global-statement
+    _preload_thread = threading.Thread(target=_preload, name="preload-worker", daemon=True)
+    _preload_thread.start()
+
+
+def _wait_for_preload():
+    """Waits until the preparation of the worker process, if started, is over."""
+    if _preload_thread is not None:
+        _preload_thread.join()
+
+
+def _preload():
+    """
+    Prepares a worker process for its tasks: compiles the kernel and, if
+    ``PRELOAD_STATIC_DATA`` is set, loads the classrooms and the time grid of the backend,
+    used by the tasks of the process instead of fetching them again.
+    """
+    _compile_kernel()
+    _preloaded.clear()
+    if get_preload_static_data():
+        classrooms = get_classrooms()
+        # Fetched by every task instead if the backend was unavailable
+        if classrooms:
+            _preloaded["classrooms"] = classrooms
+        _preloaded["time_grid"] = get_time_grid()
+
+
+def _compile_kernel():
+    """Compiles the kernel functions by evolving a tiny synthetic problem for a generation."""
+    configuration = generate_institution(10)
+    parameters = GAParameters(
+        number_of_chromosomes=10, replace_by_generation=2, track_best=2, assign_rooms=True
+    )
+    parameters.make_algorithm(configuration).start(max_generations=1)
+    restart_id_counters()
+
+
+def _load_configuration() -> Configuration:
+    """Loads the problem from the backend, with the static data preloaded by the process."""
+    _wait_for_preload()
+    return load_configuration(**_preloaded)
+
+
+@worker_init.connect
+def start_worker_metrics(**_kwargs):
+    """Exports the metrics of the worker if ``WORKER_METRICS_PORT`` is set."""
+    port = os.getenv("WORKER_METRICS_PORT")
+    if port:
+        start_metrics_server(int(port))
+
+
+def _get_coalescer() -> Optional[RequestCoalescer]:
+    """Returns the coalescer of the generation requests, or ``None`` if disabled."""
+    ttl = get_coalescing_ttl()
+    if ttl <= 0:
+        return None
+    return RequestCoalescer(celery_app.backend.client, get_result_store(), ttl)
+
+
+def _get_tenant_limiter() -> Optional[TenantLimiter]:
+    """Returns the limiter of the concurrent runs of the tenants, or ``None`` if disabled."""
+    limit = get_tenant_limit()
+    if limit <= 0:
+        return None
+    return TenantLimiter(celery_app.backend.client, limit)
+
+
+def _get_time_limits(task):
+    """Returns the hard and soft time limits of the current request of a task."""
+    time_limit, soft_time_limit = task.request.timelimit or (None, None)
+    return time_limit or task.time_limit, soft_time_limit or task.soft_time_limit
+
+
+def _get_cancellation_flag(task) -> Optional[CancellationFlag]:
+    """Returns the cancellation flag of the current request of a task."""
+    if task.request.id is None:
+        return None
+    return CancellationFlag(celery_app.backend.client, task.request.id)
+
+
+def _get_progress_reporter(task) -> Optional[ProgressReporter]:
+    """Returns the reporter of the progress of the current request of a task."""
+    if task.request.id is None:
+        return None
+    return ProgressReporter(task, get_progress_interval())
+
+
+def _get_checkpointer(run_id: Optional[str], fingerprint: str) -> Optional[Checkpointer]:
+    """Returns the checkpointer of a run, or ``None`` if disabled or the run has no ID."""
+    checkpoint_dir = get_checkpoint_dir()
+    if run_id is None or checkpoint_dir is None:
+        return None
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    return Checkpointer(
+        os.path.join(checkpoint_dir, f"{run_id}.npz"), fingerprint, get_checkpoint_interval()
+    )
+
+
+def _get_evolve(parameters: Optional[dict]):
+    """Returns how a generation run evolves its algorithm, by subproblems if decomposed."""
+    ga_parameters = GAParameters(**(parameters or {}))
+    if ga_parameters.decompose:
+        return lambda instance, stop: solve_decomposed(
+            instance, ga_parameters, processes=ga_parameters.processes, **stop
+        )
+    return lambda instance, stop: instance.start(**stop)
+
+
+def _generate(
+    run_id: Optional[str],
+    profile: bool,
+    evolve,
+    parameters: Optional[dict] = None,
+    problem: Optional[dict] = None,
+    max_seconds: Optional[float] = None,
+    cancellation: Optional[CancellationFlag] = None,
+    progress: Optional[ProgressReporter] = None,
+):
+    """
+    Loads the problem, evolves it with ``evolve(algorithm, stop)`` and stores the best schedule.
+
+    ``parameters`` are the ``GAParameters`` of the run and ``problem`` the inline
+    ``ProblemPayload``, the problem is fetched from the backend without it. ``stop`` holds the
+    stop criteria and observers of ``Algorithm.start``, the evolution taking at most
+    ``max_seconds`` seconds if given, stopping once the ``cancellation`` flag is set and
+    reporting its events to ``progress``. When the soft time limit of the task is exceeded or
+    the run is cancelled, the best schedule found so far is stored. Runs with an ID are
+    checkpointed and resume from their checkpoint when run again, e.g. when redelivered after
+    the loss of their worker. Returns the summary of the run; the timetable itself is fetched
+    from the result store by the run ID, which is the task ID when run by a worker.
+    """
+    parameters = GAParameters(**(parameters or {}))
+    time_budgets = [t for t in (parameters.max_seconds, max_seconds) if t is not None]
+    stop = {
+        "max_generations": parameters.max_generations,
+        "max_seconds": min(time_budgets, default=None),
+        "should_stop": cancellation,
+        "stop_check_interval": get_stop_check_interval(),
+        "progress": progress,
+    }
+    with ACTIVE_RUNS.track_inprogress(), TASK_LATENCY.time():
+        if problem is None:
+            configuration = _load_configuration()
+        else:
+            configuration = ProblemPayload(**problem).to_configuration()
+        fingerprint = fingerprint_configuration(configuration)
+        checkpointer = _get_checkpointer(
+            run_id, get_coalescing_key(fingerprint, parameters.model_dump())
+        )
+        stop["checkpointer"] = checkpointer
+        run_id = run_id or str(uuid.uuid4())
+
+        profiler = OperatorProfiler() if profile else None
+        instance = parameters.make_algorithm(configuration, profiler=profiler)
+
+        try:
+            best_chromosome = evolve(instance, stop)
+        except SoftTimeLimitExceeded:
+            if instance.current_best_size == 0:
+                raise
+            print(f"Soft time limit of run {run_id} exceeded, storing the best schedule")
+            best_chromosome = instance.get_best_chromosome()
+
+    GENERATIONS.inc(instance.current_generation)
+    EVALUATIONS.inc(
+        len(instance.chromosomes) + instance.current_generation * instance.replace_by_generation
+    )
+    BEST_FITNESS.observe(best_chromosome.get_fitness())
+
+    status = CANCELLED if cancellation is not None and cancellation.cancelled else FINISHED
+    get_result_store().save(
+        run_id,
+        fingerprint,
+        CompactSchedule.from_schedule(best_chromosome),
+        instance.current_generation,
+        parameters.model_dump(),
+        status,
+        problem,
+    )
+    if checkpointer is not None:
+        checkpointer.remove()
+
+    result = {
+        "run_id": run_id,
+        "fitness": best_chromosome.get_fitness(),
+        "generations": instance.current_generation,
+        "status": status,
+    }
+    soft_constraints = instance.prototype.soft_constraints
+    if soft_constraints is not None:
+        result["penalty"] = float(soft_constraints.evaluate(best_chromosome.classes).sum())
+    if profiler is not None:
+        result["profile"] = profiler.to_dict()
+        if checkpointer is not None:
+            result["profile"]["checkpoints"] = {
+                "saves": checkpointer.saves,
+                "seconds": checkpointer.save_time,
+                "overhead": checkpointer.get_overhead(),
+            }
+    return result
+
+
+def _run_in_tenant_slot(task, tenant: Optional[str], run):
+    """
+    Returns ``run()`` run in a slot of the tenant, retrying the task later if none is free.
+
+    The slot is leased for the hard time limit of the task.
+    """
+    limiter = _get_tenant_limiter() if tenant is not None else None
+    if limiter is not None:
+        time_limit, _soft_time_limit = _get_time_limits(task)
+        if not limiter.acquire(tenant, task.request.id, time_limit or DEFAULT_ROUTE.time_limit):
+            raise task.retry(countdown=TENANT_RETRY_DELAY, max_retries=None)
+
+    try:
+        return run()
+    finally:
+        if limiter is not None:
+            limiter.release(tenant, task.request.id)
+
+
+@celery_app.task(
+    name=GENERATION_TASK,
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    soft_time_limit=DEFAULT_ROUTE.soft_time_limit,
+    time_limit=DEFAULT_ROUTE.time_limit,
+)
+def timetable_generation(
+    self,
+    profile: bool = False,
+    coalescing_key: Optional[str] = None,
+    parameters: Optional[dict] = None,
+    problem: Optional[dict] = None,
+    tenant: Optional[str] = None,
+):
+    """
+    Celery task to generate the timetable.
+
+    ``parameters`` are the ``GAParameters`` of the run, the defaults if not given, and
+    ``problem`` an inline ``ProblemPayload``. With ``profile`` set, per-operator timings of the
+    run are included in the result. The run claimed under ``coalescing_key`` is released when
+    the task ends. The evolution stops in time to store its best schedule before the soft
+    time limit of the task or when the task is cancelled, at most as many tasks of the
+    ``tenant`` run at the same time as its limit allows.
+    """
+    _time_limit, soft_time_limit = _get_time_limits(self)
+
+    def generate():
+        """Generates the timetable and releases the coalesced run."""
+        try:
+            return _generate(
+                self.request.id,
+                profile,
+                _get_evolve(parameters),
+                parameters,
+                problem,
+                get_evolution_budget(soft_time_limit),
+                _get_cancellation_flag(self),
+                _get_progress_reporter(self),
+            )
+        finally:
+            coalescer = _get_coalescer()
+            if coalescing_key is not None and coalescer is not None:
+                coalescer.release(coalescing_key, self.request.id)
+
+    return _run_in_tenant_slot(self, tenant, generate)
+
+
+@celery_app.task(
+    name=REOPTIMIZATION_TASK,
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    soft_time_limit=DEFAULT_ROUTE.soft_time_limit,
+    time_limit=DEFAULT_ROUTE.time_limit,
+)
+def timetable_reoptimization(
+    self,
+    previous: Optional[dict] = None,
+    changes: Optional[dict] = None,
+    profile: bool = False,
+    previous_run_id: Optional[str] = None,
+    tenant: Optional[str] = None,
+    parameters: Optional[dict] = None,
+    problem: Optional[dict] = None,
+):
+    """
+    Celery task to re-optimize a previously generated timetable after some entities changed.
+
+    ``previous`` holds the placements of the previous result, or ``previous_run_id`` the ID of
+    its stored run; ``changes`` the backend IDs of the changed entities (see
+    ``ScheduleChanges``). ``parameters`` and ``problem`` are those of ``timetable_generation``,
+    by default those of the stored run, whose inline problem is re-optimized instead of the
+    problem of the backend. Time limits and tenant slots are handled as in
+    ``timetable_generation``.
+    """
+    if previous_run_id is not None:
+        stored = get_result_store().get(previous_run_id)
+        if stored is None:
+            raise ValueError(f"Run {previous_run_id} not found")
+        previous = stored["schedule"].get_placements()
+        parameters = stored["parameters"] if parameters is None else parameters
+        problem = stored["problem"] if problem is None else problem
+    else:
+        previous = {
+            backend_id: Placement(**placement) for backend_id, placement in previous.items()
+        }
+    changes = ScheduleChanges(**(changes or {}))
+    _time_limit, soft_time_limit = _get_time_limits(self)
+
+    return _run_in_tenant_slot(
+        self,
+        tenant,
+        lambda: _generate(
+            self.request.id,
+            profile,
+            lambda instance, stop: reoptimize(instance, previous, changes, **stop),
+            parameters,
+            problem,
+            max_seconds=get_evolution_budget(soft_time_limit),
+            cancellation=_get_cancellation_flag(self),
+            progress=_get_progress_reporter(self),
+        ),
+    )
+
+
+def get_preload_static_data() -> bool:
+    """
+    Returns ``PRELOAD_STATIC_DATA``, whether worker processes load the classrooms and the time
+    grid once, 1 by default; workers must be restarted to see changed classrooms then.
+    """
+    return bool(int(os.getenv("PRELOAD_STATIC_DATA", "1")))